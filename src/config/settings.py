@@ -27,9 +27,13 @@ RFI_DIR = RAW_DATA_DIR / "rfi"
 DIMENSIONS_DIR = DIMENSIONAL_DATA_DIR / "dimensions"
 FACTS_DIR = DIMENSIONAL_DATA_DIR / "facts"
 BRIDGE_DIR = DIMENSIONAL_DATA_DIR / "bridge"
+AGGREGATES_DIR = DIMENSIONAL_DATA_DIR / "aggregates"
 
-# File patterns
-GA_DATA_PATTERN = "Raw GA Data*.xlsx"
+# File patterns: every export in GOOGLE_ANALYTICS_DIR / RFI_DIR that matches
+# is extracted (one export per market and month) and concatenated. Exports
+# may be .csv or .xlsx; "Raw GA Data_202504.xlsx" holds the same rows as
+# "Raw GA Data.csv", so only one of the two formats is matched
+GA_DATA_PATTERN = "Raw GA Data*.csv"
 RFI_DATA_PATTERN = "RFI*.csv"
 
 # Output file names
@@ -38,6 +42,9 @@ SITE_PERFORMANCE_FILE = "site_performance.csv"
 CREATIVE_PERFORMANCE_FILE = "creative_performance.csv"
 ANALYSIS_REPORT_FILE = "analysis_report.txt"
 
+# Per-stage profile of the last run (wall/CPU time, peak RSS, rows, bytes)
+RUN_MANIFEST_FILE = OUTPUTS_DIR / "run_manifest.json"
+
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -47,6 +54,37 @@ LOG_FILE = LOGS_DIR / "etl_execution.log"
 CHUNK_SIZE = 10000  # For processing large files in chunks
 RANDOM_STATE = 42   # For reproducible results
 
+# Benchmarks on synthetic RFI/GA exports (python src/etl/run_benchmarks.py)
+BENCHMARK_DIR = DATA_DIR / "benchmarks"
+BENCHMARK_ROW_COUNTS = [10_000, 1_000_000, 10_000_000]
+BENCHMARK_TOLERANCE = 0.25    # Allowed per-stage throughput/memory regression
+BENCHMARK_MIN_SECONDS = 0.05  # Stages faster than this in the baseline are not compared
+
+# Storage format for staging, dimensions, bridge and facts ("csv" or "parquet")
+STORAGE_FORMAT = "csv"
+PARQUET_COMPRESSION = "snappy"
+
+# Optional embedded database load target (None, "sqlite" or "duckdb"); the
+# extension of the backend is added to DATABASE_FILE
+DATABASE_FORMAT = None
+DATABASE_FILE = DIMENSIONAL_DATA_DIR / "marketing_analytics"
+
+# Threads for independent ETL stages (1 runs every stage sequentially)
+MAX_WORKERS = 4
+
+# Incremental loads: per-month fingerprints of the last successful load
+INCREMENTAL_STATE_FILE = PROCESSED_DATA_DIR / "incremental_state.json"
+
+# Stage cache: fingerprints of each stage's inputs, sources and code in the
+# last successful run; unchanged stages are skipped. Any change to the code
+# under src/etl invalidates every stage; bump the version to invalidate them
+# for other reasons (e.g. a change in src/config/settings.py)
+STAGE_CACHE_FILE = PROCESSED_DATA_DIR / "stage_cache.json"
+STAGE_CACHE_VERSION = 3
+
+# Formats of data/outputs/analysis_report ("txt", "md", "html", "json")
+REPORT_FORMATS = ["txt"]
+
 # Validation settings
 MIN_CTR_THRESHOLD = 0.001  # Minimum CTR threshold for validation
 MAX_CTR_THRESHOLD = 0.5    # Maximum CTR threshold for validation
@@ -64,11 +102,12 @@ def ensure_directories():
         RFI_DIR,
         DIMENSIONS_DIR,
         FACTS_DIR,
-        BRIDGE_DIR
+        BRIDGE_DIR,
+        AGGREGATES_DIR
     ]
     
     for directory in directories:
         directory.mkdir(parents=True, exist_ok=True)
 
 if __name__ == "__main__":
-    ensure_directories() 
\ No newline at end of file
+    ensure_directories() 
\ No newline at end of file
@@ -2,8 +2,20 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import glob
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# src/ para config.settings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.utils import *
+from utils.storage import find_table_storage, load_table, open_table_writer, save_table, table_path
+from utils.profiling import record_read, record_write
+from utils.incremental import merge_partitions
+from utils.schema import apply_schema
+from utils.stage_cache import hash_file
+from config.settings import RFI_DATA_PATTERN, GA_DATA_PATTERN
 import openpyxl  # Importar la librería para lectura de bajo nivel
 
 logger = setup_logging()
@@ -13,29 +25,237 @@ def get_project_root():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def extract_rfi_data():
-    """Extrae y limpia datos RFI"""
-    logger.info("Extrayendo datos RFI...")
-    
-    project_root = get_project_root()
-    
-    # Leer CSV con separador punto y coma
-    rfi_file = os.path.join(project_root, 'data', 'raw', 'rfi', 'RFI.csv')
-    df = pd.read_csv(rfi_file, sep=';')
-    
-    # Renombrar columnas para normalizar
-    column_mapping = {
-        'Campaign': 'campaign',
-        'Month': 'month_year', 
-        'Site (Site Directory)': 'site',
-        'Placement - DCM': 'placement',
-        'Creative': 'creative',
-        'Creative Dimensions': 'size',
-        'Platform Type': 'platform_type',
-        'Impressions': 'impressions',
-        'Clicks': 'clicks'
-    }
-    df = df.rename(columns=column_mapping)
+# Renombrado de columnas del export RFI
+RFI_COLUMN_MAPPING = {
+    'Campaign': 'campaign',
+    'Month': 'month_year', 
+    'Site (Site Directory)': 'site',
+    'Placement - DCM': 'placement',
+    'Creative': 'creative',
+    'Creative Dimensions': 'size',
+    'Platform Type': 'platform_type',
+    'Impressions': 'impressions',
+    'Clicks': 'clicks'
+}
+
+RFI_STAGING_COLUMNS = ['date', 'campaign', 'site', 'placement',
+                       'creative', 'size', 'impressions', 'clicks']
+
+# Renombrado de columnas según la estructura real del CSV de GA
+GA_COLUMN_MAPPING = {
+    'Source': 'source',
+    'Month of Year': 'month_year',
+    'Device Category': 'device',
+    'Ad Content': 'ad_content',
+    'Sessions': 'sessions',
+    'Users': 'users',
+    'New Users': 'new_users',
+    'Pageviews': 'pageviews',
+    'Session Duration': 'session_duration',
+    'Calculated AToS': 'avg_session_duration'
+}
+
+GA_STAGING_COLUMNS = ['date', 'campaign', 'source', 'device', 'ad_content',
+                      'users', 'new_users', 'sessions', 'pageviews', 
+                      'avg_session_duration_sec', 'bounce_rate']
+
+# Linaje de cada fila del staging: export de origen y fila dentro de él (1 = primera fila de datos)
+LINEAGE_COLUMNS = ['source_file', 'source_row']
+
+# Versión del formato de los xlsx convertidos en caché: cambiarla invalida las conversiones anteriores
+XLSX_CACHE_VERSION = 1
+
+def get_staging_dir():
+    """Directorio de las tablas de staging"""
+    return os.path.join(get_project_root(), 'data', 'processed', 'staging')
+
+def find_source_files(source, directory, pattern):
+    """Exports a extraer, en orden: source es un archivo, un patrón glob o una lista de ellos.
+
+    Sin source se toman los archivos de directory que coinciden con pattern.
+    """
+    if source is None:
+        source = os.path.join(directory, pattern)
+    files = []
+    for item in (source if isinstance(source, (list, tuple)) else [source]):
+        item = str(item)
+        files.extend(sorted(glob.glob(item)) if any(char in item for char in '*?[') else [item])
+    if not files:
+        raise FileNotFoundError(f"Ningún export coincide con {source}")
+    return list(dict.fromkeys(files))
+
+def get_rfi_source_files(source_file=None):
+    """Exports RFI a extraer (por defecto, los RFI_DATA_PATTERN de data/raw/rfi)"""
+    return find_source_files(source_file, os.path.join(get_project_root(), 'data', 'raw', 'rfi'),
+                             RFI_DATA_PATTERN)
+
+def get_ga_source_files(source_file=None):
+    """Exports GA a extraer (por defecto, los GA_DATA_PATTERN de data/raw/google_analytics)"""
+    return find_source_files(source_file, os.path.join(get_project_root(), 'data', 'raw', 'google_analytics'),
+                             GA_DATA_PATTERN)
+
+def get_staging_path(table_name):
+    return table_path(get_staging_dir(), table_name)
+
+def load_staging(table_name):
+    """Lee una tabla de staging ya escrita ('rfi_staging' o 'ga_staging')"""
+    return load_table(get_staging_dir(), table_name)
+
+def select_changed_months(df, incremental, source, months):
+    """Filtra el export crudo a los meses nuevos o modificados desde la última carga"""
+    # La huella es del contenido: mover filas entre archivos no cambia el mes
+    changed = incremental.detect_changes(source, df.drop(columns=lineage_columns(df)), months)
+    return df[months.isin(changed).values]
+
+def save_staging_delta(delta, table_name, dates):
+    """Reemplaza en el staging en disco los meses cargados en esta ejecución"""
+    staging_dir = get_staging_dir()
+    storage = find_table_storage(staging_dir, table_name)
+    existing = load_table(staging_dir, table_name, storage=storage) if storage is not None else None
+    save_table(merge_partitions(existing, delta, 'date', dates), staging_dir, table_name)
+
+# Valores de ejemplo que se conservan por columna al juntar los fallos de varios bloques
+FAILURE_SAMPLE_SIZE = 5
+
+def merge_failures(total, chunk_failures):
+    """Suma a total los fallos de un bloque, conservando una muestra acotada de valores"""
+    for col, failed in chunk_failures.items():
+        previous = total.get(col, 0)
+        samples = getattr(previous, 'samples', []) + getattr(failed, 'samples', [])
+        if samples:
+            samples = list(dict.fromkeys(samples))[:FAILURE_SAMPLE_SIZE]
+            total[col] = ParseFailures(previous + failed, samples)
+        else:
+            total[col] = previous + failed
+    return total
+
+def log_failures(failures):
+    """Registra, una línea por columna, las celdas que no se pudieron convertir"""
+    for col, failed in failures.items():
+        if failed:
+            samples = getattr(failed, 'samples', None)
+            example = f" (ejemplos: {samples})" if samples else ""
+            logger.warning(f"Columna {col}: {failed} valores no numéricos convertidos a 0{example}")
+
+def get_xlsx_cache_dir():
+    """Directorio de los xlsx ya convertidos a Parquet"""
+    return os.path.join(get_project_root(), 'data', 'processed', 'xlsx_cache')
+
+def iter_xlsx_frames(source_file, chunksize=None):
+    """Recorre la primera hoja de un xlsx en modo solo lectura, en DataFrames de chunksize filas.
+
+    openpyxl entrega las filas de a una sin cargar el libro completo. La
+    primera fila es la cabecera; las filas vacías se saltan, como en
+    read_csv. El índice de cada bloque sigue al del anterior.
+    """
+    workbook = openpyxl.load_workbook(source_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value) for value in next(rows, ())]
+        rows = (row for row in rows if any(value is not None for value in row))
+        start = 0
+        while True:
+            block = list(itertools.islice(rows, chunksize)) if chunksize else list(rows)
+            if not block and start > 0:
+                break
+            yield pd.DataFrame(block, columns=header, index=pd.RangeIndex(start, start + len(block)))
+            start += len(block)
+            if not chunksize:
+                break
+    finally:
+        workbook.close()
+
+def read_xlsx(source_file):
+    """Lee un xlsx completo; la primera lectura se guarda como Parquet con el hash del libro.
+
+    Mientras el libro no cambie, las lecturas siguientes cargan ese Parquet
+    en vez de volver a recorrer el xlsx. Sin pyarrow, o si una columna
+    mezcla números y texto (Parquet no lo admite), se lee siempre del xlsx.
+    """
+    cache_path = os.path.join(get_xlsx_cache_dir(), f"{hash_file(source_file)}-v{XLSX_CACHE_VERSION}.parquet")
+    if os.path.exists(cache_path):
+        logger.info(f"{os.path.basename(source_file)}: leído de la caché {os.path.basename(cache_path)}")
+        return pd.read_parquet(cache_path)
+    df = next(iter_xlsx_frames(source_file))
+    try:
+        os.makedirs(get_xlsx_cache_dir(), exist_ok=True)
+        # Se escribe a un temporal para que una lectura concurrente nunca vea un archivo a medias
+        df.to_parquet(cache_path + '.tmp', index=False)
+        os.replace(cache_path + '.tmp', cache_path)
+    except Exception as e:
+        logger.warning(f"{os.path.basename(source_file)}: no se guardó la conversión en caché ({e})")
+    return df
+
+def is_xlsx(source_file):
+    return str(source_file).lower().endswith('.xlsx')
+
+def lineage_columns(df):
+    return [col for col in LINEAGE_COLUMNS if col in df.columns]
+
+def add_lineage(df, source_file):
+    """Agrega a un bloque crudo su archivo de origen y el número de fila (según el índice de lectura)"""
+    df['source_file'] = os.path.basename(source_file)
+    df['source_row'] = df.index + 1
+    return df
+
+def read_source(source_file, clean_func=None):
+    """Lee un export (CSV separado por ';' o xlsx) con su linaje; con clean_func devuelve clean_func(df)"""
+    df = read_xlsx(source_file) if is_xlsx(source_file) else pd.read_csv(source_file, sep=';')
+    df = add_lineage(df, source_file)
+    if clean_func is None:
+        return df, {}
+    return clean_func(df)
+
+def read_sources(source_files, clean_func=None, max_workers=1):
+    """Lee (y limpia con clean_func) varios exports, en paralelo si hay más de uno.
+
+    Cada archivo se procesa en un proceso del pool (hasta max_workers).
+    Devuelve (filas de todos los archivos en el orden de source_files,
+    fallos numéricos sumados).
+    """
+    workers = min(max_workers or 1, len(source_files))
+    if workers > 1:
+        logger.info(f"Leyendo {len(source_files)} exports con {workers} procesos")
+        # spawn: las etapas del ETL corren en hilos y hacer fork de un proceso con hilos no es seguro
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(read_source, source_files, [clean_func] * len(source_files)))
+    else:
+        results = [read_source(source_file, clean_func) for source_file in source_files]
+    failures = {}
+    for source_file, (df, file_failures) in zip(source_files, results):
+        record_read(source_file)
+        merge_failures(failures, file_failures)
+        logger.info(f"{os.path.basename(source_file)}: {len(df)} filas")
+    if len(results) == 1:
+        return results[0][0], failures
+    return pd.concat([df for df, _ in results], ignore_index=True), failures
+
+def stream_to_staging(source_file, clean_func, staging_dir, table_name, chunksize, columns,
+                      storage=None):
+    """Lee uno o varios exports por bloques de chunksize filas, limpia cada bloque y lo agrega al staging.
+
+    Solo un bloque está en memoria a la vez. Devuelve (filas escritas, fallos numéricos por columna).
+    """
+    failures = {}
+    writer = open_table_writer(staging_dir, table_name, storage=storage)
+    for path in (source_file if isinstance(source_file, (list, tuple)) else [source_file]):
+        chunks = iter_xlsx_frames(path, chunksize) if is_xlsx(path) else pd.read_csv(path, sep=';', chunksize=chunksize)
+        for chunk in chunks:
+            chunk_final, chunk_failures = clean_func(add_lineage(chunk, path))
+            merge_failures(failures, chunk_failures)
+            writer.write(chunk_final)
+        record_read(path)
+    writer.close(columns=columns)
+    record_write(writer.path)
+    logger.info(f"Guardado: {writer.path} ({writer.rows} filas)")
+    return writer.rows, failures
+
+def clean_rfi_frame(df):
+    """Renombra, limpia y filtra un bloque del export RFI.
+
+    Devuelve (staging, fallos numéricos por columna).
+    """
+    df = df.rename(columns=RFI_COLUMN_MAPPING)
     
     # Convertir fechas del formato 2021-01 a 2021-01-01
     def convert_month_to_date(month_str):
@@ -55,8 +275,9 @@ def extract_rfi_data():
     df['date'] = df['month_year'].apply(convert_month_to_date)
     
     # Limpiar métricas numéricas
-    df['impressions'] = df['impressions'].apply(clean_numeric)
-    df['clicks'] = df['clicks'].apply(clean_numeric)
+    failures = {}
+    for col in ['impressions', 'clicks']:
+        df[col], failures[col] = clean_numeric_series(df[col])
     
     # Limpiar valores nulos en campos categóricos
     df['site'] = df['site'].fillna('Unknown')
@@ -65,95 +286,91 @@ def extract_rfi_data():
     df['size'] = df['size'].fillna('Unknown')
     
     # Seleccionar columnas finales
-    df_final = df[['date', 'campaign', 'site', 'placement', 
-                   'creative', 'size', 'impressions', 'clicks']]
+    df_final = df[RFI_STAGING_COLUMNS + lineage_columns(df)]
     
     # Filtrar filas con valores válidos
     df_final = df_final[(df_final['impressions'] > 0) | (df_final['clicks'] > 0)]
     
-    # Crear directorio de staging si no existe
-    staging_dir = os.path.join(project_root, 'data', 'processed', 'staging')
-    os.makedirs(staging_dir, exist_ok=True)
-    
-    # Guardar staging
-    staging_file = os.path.join(staging_dir, 'rfi_staging.csv')
-    save_csv(df_final, staging_file)
-    logger.info(f"RFI staging creado: {len(df_final)} filas")
-    
-    return df_final
+    return apply_schema(df_final, 'rfi_staging'), failures
 
-def extract_ga_data():
-    """Extrae y limpia datos GA"""
-    logger.info("==================== INICIANDO EXTRACCIÓN GA (CSV) ====================")
-    
-    project_root = get_project_root()
-    ga_file = os.path.join(project_root, 'data', 'raw', 'google_analytics', 'Raw GA Data.csv')
-    logger.info(f"Intentando leer archivo: {ga_file}")
+def extract_rfi_data(save=True, chunksize=None, incremental=None, source_file=None, max_workers=1):
+    """Extrae y limpia datos RFI. Con save=False no escribe el staging a disco.
+
+    Se extraen todos los exports que coinciden con el patrón (un export por
+    mercado y mes), en paralelo con hasta max_workers procesos, y cada fila
+    lleva su archivo y fila de origen (LINEAGE_COLUMNS).
     
-    # Leer CSV (no Excel)
-    df = pd.read_csv(ga_file, sep=';')
-    logger.info(f"Archivo CSV leído exitosamente: {df.shape}")
-    logger.info(f"Dimensiones del DataFrame: {df.shape}")
-    logger.info(f"Columnas encontradas: {list(df.columns)}")
-    logger.info(f"Primeras 3 filas:\n{df.head(3)}")
+    Con chunksize el export se procesa por bloques y se escribe al staging de forma
+    incremental; en ese modo la función devuelve None y las etapas siguientes leen
+    el staging desde disco.
     
-    # Renombrar columnas según la estructura real del CSV
-    column_mapping = {
-        'Source': 'source',
-        'Month of Year': 'month_year',
-        'Device Category': 'device',
-        'Ad Content': 'ad_content',
-        'Sessions': 'sessions',
-        'Users': 'users',
-        'New Users': 'new_users',
-        'Pageviews': 'pageviews',
-        'Session Duration': 'session_duration',
-        'Calculated AToS': 'avg_session_duration'
-    }
+    Con incremental (IncrementalState) solo se procesan los meses nuevos o
+    modificados: se devuelven esas filas y se reemplazan esos meses en el staging.
     
-    logger.info("--- INICIANDO PROCESAMIENTO DETALLADO GA ---")
-    logger.info(f"Columnas originales: {list(df.columns)}")
-    logger.info(f"Columnas renombradas: {column_mapping}")
+    source_file (archivo, patrón glob o lista) reemplaza los exports de
+    data/raw (por ejemplo, en benchmarks).
+    """
+    logger.info("Extrayendo datos RFI...")
     
-    df = df.rename(columns=column_mapping)
-    logger.info(f"Columnas después del renombre: {list(df.columns)}")
+    rfi_files = get_rfi_source_files(source_file)
+    
+    if chunksize:
+        if not save:
+            raise ValueError("La extracción por bloques requiere escribir el staging a disco")
+        if incremental is not None:
+            raise ValueError("La carga incremental no admite extracción por bloques")
+        logger.info(f"Extracción RFI por bloques de {chunksize} filas")
+        rows, failures = stream_to_staging(rfi_files, clean_rfi_frame, get_staging_dir(), 'rfi_staging',
+                                           chunksize, RFI_STAGING_COLUMNS + LINEAGE_COLUMNS)
+        log_failures(failures)
+        logger.info(f"RFI staging creado: {rows} filas")
+        return None
+    
+    if incremental is not None:
+        # Los meses cambiados se detectan sobre todos los exports juntos, antes de limpiar
+        df, _ = read_sources(rfi_files, max_workers=max_workers)
+        months = df['Month'].fillna('1970-01').astype(str).str.strip() + '-01'
+        df = select_changed_months(df, incremental, 'rfi', months)
+        df_final, failures = clean_rfi_frame(df)
+    else:
+        df_final, failures = read_sources(rfi_files, clean_rfi_frame, max_workers=max_workers)
+        df_final = apply_schema(df_final, 'rfi_staging')
+    log_failures(failures)
+    
+    if save and incremental is not None:
+        save_staging_delta(df_final, 'rfi_staging', incremental.changed_dates('rfi'))
+    elif save:
+        save_table(df_final, get_staging_dir(), 'rfi_staging')
+    logger.info(f"RFI staging creado: {len(df_final)} filas")
     
-    # Limpiar y convertir columnas numéricas con logging
+    return df_final
+
+def clean_ga_frame(df):
+    """Renombra y limpia un bloque del export GA.
+
+    Devuelve (staging, fallos numéricos por columna). Los de la duración de
+    sesión incluyen valores de ejemplo (ParseFailures).
+    """
+    df = df.rename(columns=GA_COLUMN_MAPPING)
+    logger.debug(f"Columnas después del renombre: {list(df.columns)}")
+    
+    # Limpiar y convertir columnas numéricas (el export GA usa coma decimal)
+    failures = {}
     numeric_cols = ['users', 'new_users', 'sessions', 'pageviews']
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = df[col].apply(clean_numeric)
-            logger.info(f"Columna {col} convertida - suma total: {df[col].sum()}")
+            df[col], failures[col] = clean_numeric_series(df[col], decimal=',')
+            logger.debug(f"Columna {col} convertida - suma total: {df[col].sum()}")
         else:
             logger.warning(f"Columna {col} no encontrada en DataFrame")
     
     # Convertir fecha desde month_year (formato 202104 -> 2021-04-01)
     df['date'] = pd.to_datetime(df['month_year'].astype(str), format='%Y%m')
     df['date'] = df['date'].dt.strftime('%Y-%m-01')
-    logger.info(f"Fechas procesadas desde month_year. Ejemplo: {df['date'].iloc[0]}")
-    
-    # Procesar duración de sesión desde session_duration
-    def duration_to_seconds(duration):
-        if pd.isna(duration) or duration == '00:00:00' or str(duration).strip() == '':
-            return 0
-        try:
-            duration_str = str(duration).strip().replace(',', '.')
-            if ':' in duration_str:
-                parts = duration_str.split(':')
-                if len(parts) == 2:  # MM:SS
-                    return int(parts[0]) * 60 + int(parts[1])
-                elif len(parts) == 3:  # HH:MM:SS
-                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-            else:
-                # Asumir que son segundos directamente
-                return float(duration_str)
-        except Exception as e:
-            logger.warning(f"Error procesando duración '{duration}': {e}")
-            return 0
     
+    # Procesar duración de sesión desde session_duration (H:MM:SS, MM:SS o segundos)
     if 'session_duration' in df.columns:
-        df['avg_session_duration_sec'] = df['session_duration'].apply(duration_to_seconds)
-        logger.info(f"Duración procesada desde session_duration. Promedio: {df['avg_session_duration_sec'].mean():.2f} seg")
+        df['avg_session_duration_sec'], failures['session_duration'] = parse_duration_series(df['session_duration'])
     else:
         df['avg_session_duration_sec'] = 0
         logger.warning("Columna session_duration no encontrada, usando 0")
@@ -163,39 +380,79 @@ def extract_ga_data():
                                   1 - (df['pageviews'] / df['sessions']), 
                                   0)
     df['bounce_rate'] = df['bounce_rate'].clip(0, 1)
-    logger.info(f"Bounce rate calculado. Promedio: {df['bounce_rate'].mean():.3f}")
     
     # Crear campaign desde source
     df['campaign'] = 'GA_Campaign_' + df['source'].astype(str)
-    logger.info("Columna campaign creada desde source")
     
     # Limpiar valores nulos
     df['device'] = df['device'].fillna('desktop')
     df['ad_content'] = df['ad_content'].fillna('Unknown')
     
-    logger.info("--- PROCESAMIENTO COMPLETADO ---")
-    logger.info(f"Filas finales: {len(df)}")
-    
     # Seleccionar columnas finales
-    df_final = df[['date', 'campaign', 'source', 'device', 'ad_content',
-                   'users', 'new_users', 'sessions', 'pageviews', 
-                   'avg_session_duration_sec', 'bounce_rate']]
+    return apply_schema(df[GA_STAGING_COLUMNS + lineage_columns(df)], 'ga_staging'), failures
+
+def extract_ga_data(save=True, chunksize=None, incremental=None, source_file=None, max_workers=1):
+    """Extrae y limpia datos GA. Con save=False no escribe el staging a disco.
+
+    Como en extract_rfi_data, se extraen en paralelo todos los exports que
+    coinciden con el patrón, con su linaje.
+
+    Con chunksize el export se procesa por bloques y se escribe al staging de forma
+    incremental; en ese modo la función devuelve None y las etapas siguientes leen
+    el staging desde disco.
+    
+    Con incremental (IncrementalState) solo se procesan los meses nuevos o
+    modificados: se devuelven esas filas y se reemplazan esos meses en el staging.
+    
+    source_file (archivo, patrón glob o lista) reemplaza los exports de
+    data/raw (por ejemplo, en benchmarks).
+    """
+    logger.info("==================== INICIANDO EXTRACCIÓN GA ==========================")
+    
+    ga_files = get_ga_source_files(source_file)
+    logger.info(f"Exports GA: {[os.path.basename(ga_file) for ga_file in ga_files]}")
+    
+    if chunksize:
+        if not save:
+            raise ValueError("La extracción por bloques requiere escribir el staging a disco")
+        if incremental is not None:
+            raise ValueError("La carga incremental no admite extracción por bloques")
+        logger.info(f"Extracción GA por bloques de {chunksize} filas")
+        rows, failures = stream_to_staging(ga_files, clean_ga_frame, get_staging_dir(), 'ga_staging',
+                                           chunksize, GA_STAGING_COLUMNS + LINEAGE_COLUMNS)
+        log_failures(failures)
+        logger.info(f"GA staging creado: {rows} filas")
+        logger.info("==================== FINALIZANDO EXTRACCIÓN GA ====================")
+        return None
+    
+    logger.info("--- INICIANDO PROCESAMIENTO DETALLADO GA ---")
+    if incremental is not None:
+        # Los meses cambiados se detectan sobre todos los exports juntos, antes de limpiar
+        df, _ = read_sources(ga_files, max_workers=max_workers)
+        logger.info(f"Exports GA leídos: {df.shape}")
+        months = pd.to_datetime(df['Month of Year'].astype(str), format='%Y%m').dt.strftime('%Y-%m-01')
+        df = select_changed_months(df, incremental, 'ga', months)
+        df_final, failures = clean_ga_frame(df)
+    else:
+        df_final, failures = read_sources(ga_files, clean_ga_frame, max_workers=max_workers)
+        df_final = apply_schema(df_final, 'ga_staging')
+    log_failures(failures)
+    logger.info("--- PROCESAMIENTO COMPLETADO ---")
+    logger.info(f"Filas finales: {len(df_final)}")
     
     logger.info("Resumen de métricas:")
     logger.info(f"  - Total sesiones: {df_final['sessions'].sum():,}")
     logger.info(f"  - Total usuarios: {df_final['users'].sum():,}")
     logger.info(f"  - Total pageviews: {df_final['pageviews'].sum():,}")
+    logger.info(f"  - Duración promedio: {df_final['avg_session_duration_sec'].mean():.2f} seg")
+    logger.info(f"  - Bounce rate promedio: {df_final['bounce_rate'].mean():.3f}")
     
     logger.info(f"Primeras 3 filas procesadas:\n{df_final.head(3)}")
     
-    # Crear directorio de staging si no existe
-    staging_dir = os.path.join(project_root, 'data', 'processed', 'staging')
-    os.makedirs(staging_dir, exist_ok=True)
-    
-    # Guardar staging
-    staging_file = os.path.join(staging_dir, 'ga_staging.csv')
-    save_csv(df_final, staging_file)
-    logger.info(f"Guardado: {staging_file} ({len(df_final)} filas)")
+    if save and incremental is not None:
+        save_staging_delta(df_final, 'ga_staging', incremental.changed_dates('ga'))
+    elif save:
+        save_table(df_final, get_staging_dir(), 'ga_staging')
     logger.info(f"GA staging creado: {len(df_final)} filas")
     logger.info("==================== FINALIZANDO EXTRACCIÓN GA ====================")
     
@@ -268,8 +525,9 @@ def process_real_ga_data(df):
     for col in numeric_cols:
         if col in df.columns:
             # Limpiar formato numérico (comas como separadores decimales)
-            df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col], failed = clean_numeric_series(df[col], decimal=',')
+            if failed:
+                logger.warning(f"Columna {col}: {failed} valores no numéricos convertidos a 0")
             logger.info(f"Columna {col} convertida - suma total: {df[col].sum()}")
         else:
             df[col] = 0
@@ -284,26 +542,7 @@ def process_real_ga_data(df):
         df['date'] = '2024-01-01'
         logger.warning("Columna month_year no encontrada, usando fecha por defecto")
     
-    # 5. Procesar duración de sesión
-    def parse_duration(duration_str):
-        """Convierte duración en formato H:MM:SS o segundos a segundos"""
-        if pd.isna(duration_str):
-            return 0
-        try:
-            duration_str = str(duration_str).strip()
-            if ':' in duration_str:
-                # Formato H:MM:SS o MM:SS
-                parts = duration_str.split(':')
-                if len(parts) == 3:  # H:MM:SS
-                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                elif len(parts) == 2:  # MM:SS
-                    return int(parts[0]) * 60 + int(parts[1])
-            else:
-                # Asumir que son segundos
-                return float(duration_str.replace(',', '.'))
-        except:
-            return 0
-    
+    # 5. Procesar duración de sesión (H:MM:SS, MM:SS o segundos)
     # Buscar columna de duración
     duration_col = None
     for col in ['session_duration', 'avg_session_duration', 'Session Duration', 'Calculated AToS']:
@@ -312,7 +551,8 @@ def process_real_ga_data(df):
             break
     
     if duration_col:
-        df['avg_session_duration_sec'] = df[duration_col].apply(parse_duration)
+        df['avg_session_duration_sec'], failed = parse_duration_series(df[duration_col])
+        log_failures({duration_col: failed})
         logger.info(f"Duración procesada desde {duration_col}. Promedio: {df['avg_session_duration_sec'].mean():.2f} seg")
     else:
         df['avg_session_duration_sec'] = 0
@@ -354,8 +594,8 @@ def process_real_ga_data(df):
     logger.info(f"  - Total pageviews: {df_final['pageviews'].sum():,}")
     logger.info(f"Primeras 3 filas procesadas:\n{df_final.head(3).to_string()}")
     
-    return df_final
+    return apply_schema(df_final, 'ga_staging')
 
 if __name__ == "__main__":
     rfi_data = extract_rfi_data()
-    ga_data = extract_ga_data() 
\ No newline at end of file
+    ga_data = extract_ga_data() 
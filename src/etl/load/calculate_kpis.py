@@ -2,8 +2,15 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import argparse
+from functools import partial
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.utils import *
+from utils.storage import load_table, load_partitioned_table
+from utils.profiling import record_write
+from utils.pipeline import Pipeline, PipelineContext
+from load.kpi_engine import compute_kpi_aggregates, compute_kpi_aggregates_sql, fact_columns
+from load.kpi_format import KPI_COLUMNS, format_kpis
 
 logger = setup_logging()
 
@@ -12,112 +19,157 @@ def get_project_root():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def calculate_summary_kpis():
+# Cortes de KPIs (ver load/kpi_engine.py). Todos los cortes de un hecho
+# salen de una sola agregación de ese hecho.
+KPI_CUTS = {
+    'ad_totals': {
+        'fact': 'fact_ad_performance', 'group_by': [],
+        'measures': {'impressions': 'sum', 'clicks': 'sum'},
+    },
+    'web_totals': {
+        'fact': 'fact_web_analytics', 'group_by': [],
+        'measures': {'sessions': 'sum', 'users': 'sum', 'pageviews': 'sum',
+                     'avg_session_duration_sec': 'mean', 'bounce_rate': 'mean'},
+    },
+    'by_site': {
+        'fact': 'fact_ad_performance', 'group_by': ['site_key'],
+        'measures': {'impressions': 'sum', 'clicks': 'sum'},
+        'ratios': {'ctr': ('clicks', 'impressions', 100)},
+    },
+    'by_creative': {
+        'fact': 'fact_ad_performance', 'group_by': ['creative_key'],
+        'measures': {'impressions': 'sum', 'clicks': 'sum'},
+        'ratios': {'ctr': ('clicks', 'impressions', 100)},
+    },
+    'by_ad_content': {
+        'fact': 'fact_web_analytics', 'group_by': ['ad_content_key'],
+        'measures': {'sessions': 'sum', 'users': 'sum', 'bounce_rate': 'mean'},
+    },
+    'by_device': {
+        'fact': 'fact_web_analytics', 'group_by': ['device_key'],
+        'measures': {'users': 'sum', 'sessions': 'sum', 'pageviews': 'sum',
+                     'avg_session_duration_sec': 'mean', 'bounce_rate': 'mean'},
+        'ratios': {'pages_per_session': ('pageviews', 'sessions', 1)},
+    },
+}
+
+def load_fact(name, columns=None, start=None, end=None):
+    """Lee desde disco una tabla de hechos (solo las columnas y los meses indicados)"""
+    return load_partitioned_table(os.path.join(get_project_root(), 'data', 'dimensional', 'facts'), name,
+                                  columns=columns, start=start, end=end)
+
+def load_dimension(name):
+    """Lee desde disco una dimensión"""
+    return load_table(os.path.join(get_project_root(), 'data', 'dimensional', 'dimensions'), name)
+
+def get_output_path(file_name):
+    return os.path.join(get_project_root(), 'data', 'outputs', file_name)
+
+def save_output(df, file_name):
+    """Guarda una tabla de KPIs en data/outputs"""
+    path = get_output_path(file_name)
+    save_csv(df, path)
+    record_write(path)
+
+def load_output(file_name):
+    """Lee una tabla de KPIs ya escrita en data/outputs"""
+    return pd.read_csv(get_output_path(file_name))
+
+def calculate_kpi_aggregates(fact_ad=None, fact_web=None, cuts=None, start=None, end=None):
+    """Calcula los cortes de KPIs (por defecto KPI_CUTS) con una pasada por hecho.
+
+    Los hechos que no se pasan en memoria se leen de disco, solo con las
+    columnas que usan los cortes y, con start/end (date_key), solo las
+    particiones de esos meses. Devuelve {corte: DataFrame}.
+    """
+    logger.info("Calculando agregaciones de KPIs...")
+    cuts = cuts or KPI_CUTS
+    facts = {'fact_ad_performance': fact_ad, 'fact_web_analytics': fact_web}
+    for name in facts:
+        if facts[name] is None and any(cut['fact'] == name for cut in cuts.values()):
+            facts[name] = load_fact(name, columns=fact_columns(cuts, name), start=start, end=end)
+    return compute_kpi_aggregates(facts, cuts)
+
+def calculate_kpi_aggregates_sql(database, cuts=None):
+    """Calcula los cortes de KPIs con SQL sobre la base de datos embebida.
+
+    La agregación de cada hecho corre en el motor (utils/database.py) y
+    solo vuelve a pandas el resultado, que es pequeño.
+    """
+    logger.info(f"Calculando agregaciones de KPIs en {database.name}...")
+    return compute_kpi_aggregates_sql(database, cuts or KPI_CUTS)
+
+def get_aggregates(aggregates, names):
+    """Usa las agregaciones ya calculadas o calcula solo los cortes indicados"""
+    if aggregates is None:
+        aggregates = calculate_kpi_aggregates(cuts={name: KPI_CUTS[name] for name in names})
+    return aggregates
+
+def calculate_summary_kpis(aggregates=None, save=True):
     logger.info("Calculando KPIs resumen...")
-    project_root = get_project_root()
+    aggregates = get_aggregates(aggregates, ['ad_totals', 'web_totals'])
+    ad_totals = aggregates['ad_totals'].iloc[0]
+    web_totals = aggregates['web_totals'].iloc[0]
     
-    fact_ad_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_ad_performance.csv')
-    fact_web_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_web_analytics.csv')
-    
-    fact_ad = pd.read_csv(fact_ad_file)
-    fact_web = pd.read_csv(fact_web_file)
-    
-    total_impressions = fact_ad['impressions'].sum()
-    total_clicks = fact_ad['clicks'].sum()
+    total_impressions = ad_totals['impressions']
+    total_clicks = ad_totals['clicks']
     ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
-    total_sessions = fact_web['sessions'].sum()
-    total_users = fact_web['users'].sum()
-    total_pageviews = fact_web['pageviews'].sum()
-    avg_session_duration = fact_web['avg_session_duration_sec'].mean()
-    avg_bounce_rate = fact_web['bounce_rate'].mean()
+    total_sessions = web_totals['sessions']
+    total_users = web_totals['users']
+    total_pageviews = web_totals['pageviews']
+    avg_session_duration = web_totals['avg_session_duration_sec']
+    avg_bounce_rate = web_totals['bounce_rate']
     click_to_session_rate = (total_sessions / total_clicks * 100) if total_clicks > 0 else 0
-    summary_kpis = pd.DataFrame([{
-        'metric': 'Total Impressions',
-        'value': f"{total_impressions:,.0f}",
-        'category': 'Advertising'
-    }, {
-        'metric': 'Total Clicks',
-        'value': f"{total_clicks:,.0f}",
-        'category': 'Advertising'
-    }, {
-        'metric': 'CTR (%)',
-        'value': f"{ctr:.2f}%",
-        'category': 'Advertising'
-    }, {
-        'metric': 'Total Sessions',
-        'value': f"{total_sessions:,.0f}",
-        'category': 'Web Analytics'
-    }, {
-        'metric': 'Total Users',
-        'value': f"{total_users:,.0f}",
-        'category': 'Web Analytics'
-    }, {
-        'metric': 'Total Pageviews',
-        'value': f"{total_pageviews:,.0f}",
-        'category': 'Web Analytics'
-    }, {
-        'metric': 'Avg Session Duration (sec)',
-        'value': f"{avg_session_duration:.0f}",
-        'category': 'Web Analytics'
-    }, {
-        'metric': 'Avg Bounce Rate (%)',
-        'value': f"{avg_bounce_rate:.1%}",
-        'category': 'Web Analytics'
-    }, {
-        'metric': 'Click to Session Rate (%)',
-        'value': f"{click_to_session_rate:.1f}%",
-        'category': 'Conversion'
-    }])
-    
-    outputs_dir = os.path.join(project_root, 'data', 'outputs')
-    os.makedirs(outputs_dir, exist_ok=True)
+    # Valores numéricos con su unidad; el texto se arma en load/kpi_format.py
+    summary_kpis = pd.DataFrame([
+        ('Total Impressions', total_impressions, 'count', 'Advertising'),
+        ('Total Clicks', total_clicks, 'count', 'Advertising'),
+        ('CTR (%)', ctr, 'percent', 'Advertising'),
+        ('Total Sessions', total_sessions, 'count', 'Web Analytics'),
+        ('Total Users', total_users, 'count', 'Web Analytics'),
+        ('Total Pageviews', total_pageviews, 'count', 'Web Analytics'),
+        ('Avg Session Duration (sec)', avg_session_duration, 'seconds', 'Web Analytics'),
+        ('Avg Bounce Rate (%)', avg_bounce_rate * 100, 'percent', 'Web Analytics'),
+        ('Click to Session Rate (%)', click_to_session_rate, 'percent', 'Conversion'),
+    ], columns=KPI_COLUMNS)
+    summary_kpis['value'] = summary_kpis['value'].astype('float64')
     
-    save_csv(summary_kpis, os.path.join(outputs_dir, 'kpi_summary.csv'))
+    if save:
+        save_output(format_kpis(summary_kpis), 'kpi_summary.csv')
     return summary_kpis
 
-def calculate_kpis_by_site():
+def calculate_kpis_by_site(aggregates=None, dimensions=None, save=True):
     logger.info("Calculando KPIs por sitio...")
-    project_root = get_project_root()
-    
-    fact_ad_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_ad_performance.csv')
-    site_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_site.csv')
+    aggregates = get_aggregates(aggregates, ['by_site'])
+    dim_site = dimensions['dim_site'] if dimensions is not None else load_dimension('dim_site')
     
-    fact_ad = pd.read_csv(fact_ad_file)
-    dim_site = pd.read_csv(site_file)
-    
-    df = fact_ad.merge(dim_site, on='site_key')
-    kpis_by_site = df.groupby(['site_name', 'site_category']).agg({
-        'impressions': 'sum',
-        'clicks': 'sum'
-    }).reset_index()
-    kpis_by_site['ctr'] = (kpis_by_site['clicks'] / kpis_by_site['impressions'] * 100)
+    kpis_by_site = aggregates['by_site'].merge(dim_site, on='site_key')
+    kpis_by_site = kpis_by_site.sort_values('site_name')[['site_name', 'site_category', 'impressions',
+                                                          'clicks', 'ctr']]
     kpis_by_site['ctr'] = kpis_by_site['ctr'].round(2)
     kpis_by_site = kpis_by_site.sort_values('impressions', ascending=False)
     
-    outputs_dir = os.path.join(project_root, 'data', 'outputs')
-    os.makedirs(outputs_dir, exist_ok=True)
-    
-    save_csv(kpis_by_site, os.path.join(outputs_dir, 'kpi_by_site.csv'))
+    if save:
+        save_output(kpis_by_site, 'kpi_by_site.csv')
     return kpis_by_site
 
-def calculate_kpis_by_creative():
+def calculate_kpis_by_creative(aggregates=None, dimensions=None, save=True):
     logger.info("Calculando KPIs por creativo...")
     project_root = get_project_root()
     
-    fact_ad_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_ad_performance.csv')
-    fact_web_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_web_analytics.csv')
-    creative_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_creative.csv')
-    ad_content_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_ad_content.csv')
-    
-    fact_ad = pd.read_csv(fact_ad_file)
-    fact_web = pd.read_csv(fact_web_file)
-    dim_creative = pd.read_csv(creative_file)
-    dim_ad_content = pd.read_csv(ad_content_file)
+    aggregates = get_aggregates(aggregates, ['by_creative', 'by_ad_content'])
+    if dimensions is None:
+        dimensions = {}
+    dim_creative = dimensions['dim_creative'] if 'dim_creative' in dimensions else load_dimension('dim_creative')
+    dim_ad_content = dimensions['dim_ad_content'] if 'dim_ad_content' in dimensions else load_dimension('dim_ad_content')
     
     # Check if bridge table exists and has data
-    bridge_file = os.path.join(project_root, 'data', 'dimensional', 'bridge', 'bridge_creative_adcontent.csv')
+    bridge_dir = os.path.join(project_root, 'data', 'dimensional', 'bridge')
     try:
-        bridge = pd.read_csv(bridge_file)
+        if 'bridge_creative_adcontent' in dimensions:
+            bridge = dimensions['bridge_creative_adcontent']
+        else:
+            bridge = load_table(bridge_dir, 'bridge_creative_adcontent')
         if len(bridge) == 0:
             logger.warning("Bridge table is empty, creating simplified creative KPIs without web analytics data")
             bridge = None
@@ -126,22 +178,24 @@ def calculate_kpis_by_creative():
         bridge = None
     
     # Calculate ad performance KPIs
-    ad_kpis = fact_ad.merge(dim_creative, on='creative_key')
-    ad_kpis = ad_kpis.groupby(['creative_key', 'creative_name']).agg({
-        'impressions': 'sum',
-        'clicks': 'sum'
-    }).reset_index()
-    ad_kpis['ctr'] = (ad_kpis['clicks'] / ad_kpis['impressions'] * 100).round(2)
+    ad_kpis = aggregates['by_creative'].merge(dim_creative[['creative_key', 'creative_name']], on='creative_key')
+    ad_kpis = ad_kpis.sort_values('creative_key')[['creative_key', 'creative_name', 'impressions',
+                                                   'clicks', 'ctr']]
+    ad_kpis['ctr'] = ad_kpis['ctr'].round(2)
     
     if bridge is not None and len(bridge) > 0:
         # Full analysis with bridge table
-        web_kpis = fact_web.merge(dim_ad_content, on='ad_content_key')
-        web_kpis = web_kpis.groupby(['ad_content_key', 'ad_content_name']).agg({
-            'sessions': 'sum',
-            'users': 'sum',
-            'bounce_rate': 'mean'
-        }).reset_index()
-        creative_web = bridge.merge(web_kpis, on='ad_content_key')
+        web_kpis = aggregates['by_ad_content'].merge(dim_ad_content[['ad_content_key', 'ad_content_name']],
+                                                     on='ad_content_key')
+        # Cada ad_content se atribuye a su creativo de mayor confianza, para no
+        # contar sus sesiones en varios creativos (el puente es muchos a muchos)
+        best_match = bridge.sort_values(['confidence_score', 'creative_key'], ascending=[False, True])
+        best_match = best_match.drop_duplicates('ad_content_key')
+        creative_web = best_match.merge(web_kpis, on='ad_content_key')
+        creative_web['weighted_bounce'] = creative_web['bounce_rate'] * creative_web['sessions']
+        creative_web = creative_web.groupby('creative_key', as_index=False)[
+            ['sessions', 'users', 'weighted_bounce']].sum()
+        creative_web['bounce_rate'] = (creative_web['weighted_bounce'] / creative_web['sessions']).fillna(0)
         creative_complete = ad_kpis.merge(creative_web, on='creative_key', how='left')
         creative_complete['click_to_session_rate'] = (
             creative_complete['sessions'] / creative_complete['clicks'] * 100
@@ -155,45 +209,76 @@ def calculate_kpis_by_creative():
         final_cols = ['creative_name', 'impressions', 'clicks', 'ctr']
         creative_complete = ad_kpis[final_cols].round(2)
     
-    outputs_dir = os.path.join(project_root, 'data', 'outputs')
-    os.makedirs(outputs_dir, exist_ok=True)
-    
-    save_csv(creative_complete, os.path.join(outputs_dir, 'kpi_by_creative.csv'))
+    if save:
+        save_output(creative_complete, 'kpi_by_creative.csv')
     return creative_complete
 
-def calculate_kpis_by_device():
+def calculate_kpis_by_device(aggregates=None, dimensions=None, save=True):
     logger.info("Calculando KPIs por dispositivo...")
-    project_root = get_project_root()
-    
-    fact_web_file = os.path.join(project_root, 'data', 'dimensional', 'facts', 'fact_web_analytics.csv')
-    device_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_device.csv')
+    aggregates = get_aggregates(aggregates, ['by_device'])
+    dim_device = dimensions['dim_device'] if dimensions is not None else load_dimension('dim_device')
     
-    fact_web = pd.read_csv(fact_web_file)
-    dim_device = pd.read_csv(device_file)
-    
-    df = fact_web.merge(dim_device, on='device_key')
-    kpis_by_device = df.groupby('device_category').agg({
-        'users': 'sum',
-        'sessions': 'sum',
-        'pageviews': 'sum',
-        'avg_session_duration_sec': 'mean',
-        'bounce_rate': 'mean'
-    }).reset_index()
-    kpis_by_device['pages_per_session'] = (
-        kpis_by_device['pageviews'] / kpis_by_device['sessions']
-    ).round(2)
+    kpis_by_device = aggregates['by_device'].merge(dim_device, on='device_key')
+    kpis_by_device = kpis_by_device.sort_values('device_category')[[
+        'device_category', 'users', 'sessions', 'pageviews', 'avg_session_duration_sec',
+        'bounce_rate', 'pages_per_session'
+    ]]
+    kpis_by_device['pages_per_session'] = kpis_by_device['pages_per_session'].round(2)
     kpis_by_device['avg_session_duration_sec'] = kpis_by_device['avg_session_duration_sec'].round(0)
     kpis_by_device['bounce_rate'] = (kpis_by_device['bounce_rate'] * 100).round(1)
     
-    outputs_dir = os.path.join(project_root, 'data', 'outputs')
-    os.makedirs(outputs_dir, exist_ok=True)
-    
-    save_csv(kpis_by_device, os.path.join(outputs_dir, 'kpi_by_device.csv'))
+    if save:
+        save_output(kpis_by_device, 'kpi_by_device.csv')
     return kpis_by_device
 
+# Tablas de KPIs y sus entradas en el pipeline. No dependen unas de otras:
+# todas salen de las mismas agregaciones y se calculan en paralelo.
+KPI_TABLES = {
+    'kpi_summary': (calculate_summary_kpis, ['kpi_aggregates']),
+    'kpi_by_site': (calculate_kpis_by_site, ['kpi_aggregates', 'dimensions']),
+    'kpi_by_creative': (calculate_kpis_by_creative, ['kpi_aggregates', 'dimensions']),
+    'kpi_by_device': (calculate_kpis_by_device, ['kpi_aggregates', 'dimensions']),
+}
+# Dimensiones que leen las tablas de KPIs (la tabla puente se lee aparte)
+KPI_DIMENSIONS = ['dim_site', 'dim_creative', 'dim_ad_content', 'dim_device']
+
+def add_kpi_stages(pipeline, step=None):
+    """Registra una etapa por tabla de KPIs (entradas kpi_aggregates y dimensions)"""
+    for name, (func, inputs) in KPI_TABLES.items():
+        pipeline.add_stage(name, func, inputs=inputs, outputs=[name], step=step,
+                           artifacts=[get_output_path(f'{name}.csv')],
+                           load=partial(load_output, f'{name}.csv'))
+    return pipeline
+
+def calculate_all_kpis(aggregates=None, dimensions=None, save=True, max_workers=4):
+    """Calcula las tablas de KPIs en paralelo con max_workers hilos.
+
+    Las agregaciones y las dimensiones se calculan o leen una sola vez y se
+    comparten entre las tablas. Devuelve {tabla: DataFrame}, que es lo que
+    recibe generate_analysis_report.
+    """
+    if aggregates is None:
+        aggregates = calculate_kpi_aggregates()
+    if dimensions is None:
+        dimensions = {name: load_dimension(name) for name in KPI_DIMENSIONS}
+    context = PipelineContext(save_csv=save)
+    context.put('kpi_aggregates', aggregates)
+    context.put('dimensions', dimensions)
+    add_kpi_stages(Pipeline(context)).run(max_workers=max_workers)
+    return {name: context.get(name) for name in KPI_TABLES}
+
+def parse_month(text):
+    """'2021-03' o '202103' -> 20210301 (date_key del mes)"""
+    digits = text.replace('-', '')
+    if len(digits) != 6 or not digits.isdigit():
+        raise argparse.ArgumentTypeError(f"Mes inválido '{text}': se espera AAAA-MM")
+    return int(digits + '01')
+
 if __name__ == "__main__":
-    calculate_summary_kpis()
-    calculate_kpis_by_site()
-    calculate_kpis_by_creative()
-    calculate_kpis_by_device()
-    logger.info("Todos los KPIs calculados exitosamente") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Calcula los KPIs desde las tablas de hechos")
+    parser.add_argument('--start', type=parse_month, help="Primer mes a incluir (AAAA-MM)")
+    parser.add_argument('--end', type=parse_month, help="Último mes a incluir (AAAA-MM)")
+    args = parser.parse_args()
+    # Solo se abren las particiones de los meses pedidos
+    calculate_all_kpis(calculate_kpi_aggregates(start=args.start, end=args.end))
+    logger.info("Todos los KPIs calculados exitosamente")
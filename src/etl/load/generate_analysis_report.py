@@ -1,181 +1,201 @@
 import pandas as pd
-import numpy as np
 from datetime import datetime
+import argparse
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.utils import setup_logging
+from utils.profiling import record_write
+from load.kpi_format import kpi_value
+from load.report_engine import (REPORT_FORMATS, bullet_list, format_values, limit_items, line, section,
+                                text_values, write_report)
 
 logger = setup_logging()
 
+REPORT_TITLE = "REPORTE DE ANÁLISIS DE MARKETING ANALYTICS"
+# Ítems por lista del reporte; con miles de sitios se listan los de más impresiones
+REPORT_MAX_ITEMS = 20
+
 def get_project_root():
     """Get the project root directory"""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def generate_analysis_report():
-    """Genera reporte de análisis con conclusiones"""
-    logger.info("Generando reporte de análisis...")
-    
-    project_root = get_project_root()
-    
-    # Cargar KPIs
-    summary_file = os.path.join(project_root, 'data', 'outputs', 'kpi_summary.csv')
-    site_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_site.csv')
-    creative_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_creative.csv')
-    device_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_device.csv')
-    
-    summary_kpis = pd.read_csv(summary_file)
-    site_kpis = pd.read_csv(site_file)
-    creative_kpis = pd.read_csv(creative_file)
-    device_kpis = pd.read_csv(device_file)
-    
-    # Cargar datos de staging para análisis adicional
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    
-    rfi_staging = pd.read_csv(rfi_file)
-    ga_staging = pd.read_csv(ga_file)
-    
-    report = []
-    report.append("=" * 80)
-    report.append("REPORTE DE ANÁLISIS DE MARKETING ANALYTICS")
-    report.append(f"Fecha de generación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report.append("=" * 80)
-    
+def build_sections(summary_kpis, site_kpis, creative_kpis, device_kpis, max_items=REPORT_MAX_ITEMS):
+    """(secciones del reporte, métricas del resumen ejecutivo)"""
     # 1. RESUMEN EJECUTIVO
-    report.append("\nRESUMEN EJECUTIVO")
-    report.append("-" * 40)
-    
-    total_impressions = float(summary_kpis[summary_kpis['metric'] == 'Total Impressions']['value'].iloc[0].replace(',', ''))
-    total_clicks = float(summary_kpis[summary_kpis['metric'] == 'Total Clicks']['value'].iloc[0].replace(',', ''))
-    ctr = float(summary_kpis[summary_kpis['metric'] == 'CTR (%)']['value'].iloc[0].replace('%', ''))
-    
-    report.append(f"• Impresiones totales: {total_impressions:,.0f}")
-    report.append(f"• Clicks totales: {total_clicks:,.0f}")
-    report.append(f"• CTR promedio: {ctr:.2f}%")
+    total_impressions = kpi_value(summary_kpis, 'Total Impressions')
+    total_clicks = kpi_value(summary_kpis, 'Total Clicks')
+    ctr = kpi_value(summary_kpis, 'CTR (%)')
+    sections = [section("RESUMEN EJECUTIVO", [bullet_list([
+        f"Impresiones totales: {total_impressions:,.0f}",
+        f"Clicks totales: {total_clicks:,.0f}",
+        f"CTR promedio: {ctr:.2f}%",
+    ])])]
     
     # 2. ANÁLISIS POR SITIO
-    report.append("\nANÁLISIS POR SITIO")
-    report.append("-" * 40)
+    site_names = text_values(site_kpis['site_name'])
+    site_ctr = format_values(site_kpis['ctr'], '{:.2f}') + '%'
+    site_impressions = format_values(site_kpis['impressions'], '{:,.0f}')
     
     # Top 5 sitios por impresiones
     top_sites = site_kpis.nlargest(5, 'impressions')
-    report.append("Top 5 sitios por impresiones:")
-    for _, row in top_sites.iterrows():
-        report.append(f"  • {row['site_name']}: {row['impressions']:,.0f} impresiones, CTR: {row['ctr']:.2f}%")
-    
+    blocks = [bullet_list(site_names[top_sites.index] + ': ' + site_impressions[top_sites.index]
+                          + ' impresiones, CTR: ' + site_ctr[top_sites.index],
+                          title="Top 5 sitios por impresiones:")]
     # Mejor CTR
     best_ctr_site = site_kpis.nlargest(1, 'ctr').iloc[0]
-    report.append(f"\nMejor CTR: {best_ctr_site['site_name']} ({best_ctr_site['ctr']:.2f}%)")
+    blocks.append(line(f"Mejor CTR: {best_ctr_site['site_name']} ({best_ctr_site['ctr']:.2f}%)", spaced=True))
+    sections.append(section("ANÁLISIS POR SITIO", blocks))
     
     # 3. ANÁLISIS POR CREATIVO
-    report.append("\nANÁLISIS POR CREATIVO")
-    report.append("-" * 40)
-    
+    blocks = []
     if 'ctr' in creative_kpis.columns:
         best_creative = creative_kpis.nlargest(1, 'ctr').iloc[0]
-        report.append(f"Mejor creativo por CTR: {best_creative['creative_name']} ({best_creative['ctr']:.2f}%)")
+        blocks.append(line(f"Mejor creativo por CTR: {best_creative['creative_name']} ({best_creative['ctr']:.2f}%)"))
         
         # Análisis por tamaño
-        creative_kpis['size'] = creative_kpis['creative_name'].str.extract(r'(\d+x\d+)')
-        if 'size' in creative_kpis.columns:
-            size_performance = creative_kpis.groupby('size')['ctr'].mean().sort_values(ascending=False)
-            report.append("\nRendimiento por tamaño de creativo:")
-            for size, ctr in size_performance.items():
-                if pd.notna(size):
-                    report.append(f"  • {size}: {ctr:.2f}% CTR promedio")
+        sizes = creative_kpis['creative_name'].astype(str).str.extract(r'(\d+x\d+)', expand=False)
+        size_performance = creative_kpis['ctr'].groupby(sizes).mean().sort_values(ascending=False)
+        size_performance, omitted = limit_items(size_performance.to_frame(), max_items, 'ctr')
+        blocks.append(bullet_list(text_values(size_performance.index.to_series()) + ': '
+                                  + format_values(size_performance['ctr'], '{:.2f}') + '% CTR promedio',
+                                  title="Rendimiento por tamaño de creativo:", omitted=omitted, spaced=True))
+    sections.append(section("ANÁLISIS POR CREATIVO", blocks))
     
     # 4. ANÁLISIS POR DISPOSITIVO
-    report.append("\nANÁLISIS POR DISPOSITIVO")
-    report.append("-" * 40)
-    
+    blocks = []
     if len(device_kpis) > 0:
-        for _, row in device_kpis.iterrows():
-            report.append(f"• {row['device_category']}: {row['users']:,.0f} usuarios, {row['sessions']:,.0f} sesiones")
-            if row['sessions'] > 0:
-                report.append(f"  - Duración promedio: {row['avg_session_duration_sec']:.0f}s")
-                report.append(f"  - Bounce rate: {row['bounce_rate']:.1f}%")
+        with_sessions = device_kpis['sessions'] > 0
+        blocks.append(bullet_list(
+            text_values(device_kpis['device_category']) + ': '
+            + format_values(device_kpis['users'], '{:,.0f}') + ' usuarios, '
+            + format_values(device_kpis['sessions'], '{:,.0f}') + ' sesiones',
+            details=[('Duración promedio: ' + format_values(device_kpis['avg_session_duration_sec'], '{:.0f}')
+                      + 's').where(with_sessions),
+                     ('Bounce rate: ' + format_values(device_kpis['bounce_rate'], '{:.1f}') + '%')
+                     .where(with_sessions)]))
+    sections.append(section("ANÁLISIS POR DISPOSITIVO", blocks))
     
     # 5. CONCLUSIONES
-    report.append("\nCONCLUSIONES")
-    report.append("-" * 40)
-    
     # Análisis de rendimiento general
     if ctr > 0.5:
-        report.append("El CTR general es BUENO (>0.5%), indicando que los anuncios son relevantes")
+        blocks = [line("El CTR general es BUENO (>0.5%), indicando que los anuncios son relevantes")]
     elif ctr > 0.2:
-        report.append("El CTR general es MODERADO (0.2-0.5%), hay espacio para mejora")
+        blocks = [line("El CTR general es MODERADO (0.2-0.5%), hay espacio para mejora")]
     else:
-        report.append("El CTR general es BAJO (<0.2%), requiere optimización urgente")
+        blocks = [line("El CTR general es BAJO (<0.2%), requiere optimización urgente")]
     
     # Análisis de distribución de impresiones
     top_3_sites_share = top_sites['impressions'].sum() / total_impressions * 100
-    report.append(f"Los 3 principales sitios concentran el {top_3_sites_share:.1f}% de las impresiones")
-    
+    blocks.append(line(f"Los 3 principales sitios concentran el {top_3_sites_share:.1f}% de las impresiones"))
     if top_3_sites_share > 70:
-        report.append("Alta concentración en pocos sitios - considerar diversificación")
+        blocks.append(line("Alta concentración en pocos sitios - considerar diversificación"))
     else:
-        report.append("Buena distribución de impresiones entre sitios")
+        blocks.append(line("Buena distribución de impresiones entre sitios"))
+    sections.append(section("CONCLUSIONES", blocks))
+    
+    # Recomendaciones: con muchos sitios se listan los de más impresiones
+    blocks = []
+    low_performing = site_kpis['ctr'] < 0.1
+    if low_performing.any():
+        sites, omitted = limit_items(site_kpis[low_performing], max_items, 'impressions')
+        blocks.append(bullet_list(site_names[sites.index] + ': ' + site_ctr[sites.index] + ' CTR',
+                                  title="Sitios con bajo rendimiento (CTR < 0.1%):", omitted=omitted,
+                                  note="Considerar pausar o optimizar estos sitios"))
+    
+    # Identificar oportunidades
+    high_volume_low_ctr = (site_kpis['impressions'] > 1000000) & (site_kpis['ctr'] < 0.15)
+    if high_volume_low_ctr.any():
+        sites, omitted = limit_items(site_kpis[high_volume_low_ctr], max_items, 'impressions')
+        blocks.append(bullet_list(site_names[sites.index] + ': ' + site_impressions[sites.index]
+                                  + ' impresiones, ' + site_ctr[sites.index] + ' CTR',
+                                  title="Oportunidades de optimización (alto volumen, CTR mejorable):",
+                                  omitted=omitted, note="Priorizar optimización de creativos para estos sitios",
+                                  spaced=True))
+    sections.append(section("RECOMENDACIONES", blocks))
+    
+    executive = {'total_impressions': total_impressions, 'total_clicks': total_clicks, 'ctr': ctr,
+                 'top_3_sites_share': top_3_sites_share, 'low_performing_sites': int(low_performing.sum())}
+    return sections, executive
+
+def get_report_path(fmt):
+    return os.path.join(get_project_root(), 'data', 'outputs', f'analysis_report.{fmt}')
+
+def generate_analysis_report(summary_kpis=None, site_kpis=None, creative_kpis=None, device_kpis=None,
+                             formats=('txt',)):
+    """Genera reporte de análisis con conclusiones en cada formato de formats.
+
+    Las tablas de KPIs que no se pasen en memoria se leen de data/outputs.
+    Devuelve {formato: ruta del reporte}.
+    """
+    logger.info("Generando reporte de análisis...")
     
-    # Recomendaciones
-    report.append("\nRECOMENDACIONES")
-    report.append("-" * 40)
+    project_root = get_project_root()
     
-    # Identificar sitios con bajo rendimiento
-    low_performing_sites = site_kpis[site_kpis['ctr'] < 0.1]
-    if len(low_performing_sites) > 0:
-        report.append("Sitios con bajo rendimiento (CTR < 0.1%):")
-        for _, row in low_performing_sites.iterrows():
-            report.append(f"  • {row['site_name']}: {row['ctr']:.2f}% CTR")
-        report.append("  → Considerar pausar o optimizar estos sitios")
+    # Cargar KPIs
+    summary_file = os.path.join(project_root, 'data', 'outputs', 'kpi_summary.csv')
+    site_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_site.csv')
+    creative_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_creative.csv')
+    device_file = os.path.join(project_root, 'data', 'outputs', 'kpi_by_device.csv')
     
-    # Identificar oportunidades
-    high_volume_low_ctr = site_kpis[(site_kpis['impressions'] > 1000000) & (site_kpis['ctr'] < 0.15)]
-    if len(high_volume_low_ctr) > 0:
-        report.append("\nOportunidades de optimización (alto volumen, CTR mejorable):")
-        for _, row in high_volume_low_ctr.iterrows():
-            report.append(f"  • {row['site_name']}: {row['impressions']:,.0f} impresiones, {row['ctr']:.2f}% CTR")
-        report.append("  → Priorizar optimización de creativos para estos sitios")
+    if summary_kpis is None:
+        summary_kpis = pd.read_csv(summary_file)
+    if site_kpis is None:
+        site_kpis = pd.read_csv(site_file)
+    if creative_kpis is None:
+        creative_kpis = pd.read_csv(creative_file)
+    if device_kpis is None:
+        device_kpis = pd.read_csv(device_file)
+    
+    sections, executive = build_sections(summary_kpis, site_kpis.reset_index(drop=True), creative_kpis,
+                                         device_kpis)
     
     # Guardar reporte
     outputs_dir = os.path.join(project_root, 'data', 'outputs')
     os.makedirs(outputs_dir, exist_ok=True)
     
-    report_path = os.path.join(outputs_dir, 'analysis_report.txt')
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(report))
-    
-    logger.info(f"Reporte de análisis guardado en: {report_path}")
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    reports = {}
+    for fmt in formats:
+        report_path = write_report(sections, get_report_path(fmt), fmt, REPORT_TITLE, generated_at)
+        record_write(report_path)
+        reports[fmt] = report_path
+        logger.info(f"Reporte de análisis guardado en: {report_path}")
     
     # También crear resumen ejecutivo en CSV
     executive_summary = pd.DataFrame([{
         'metric': 'Total Impressions',
-        'value': total_impressions,
+        'value': executive['total_impressions'],
         'insight': 'Volumen total de campaña'
     }, {
         'metric': 'Total Clicks', 
-        'value': total_clicks,
+        'value': executive['total_clicks'],
         'insight': 'Engagement total'
     }, {
         'metric': 'CTR Average',
-        'value': ctr,
+        'value': executive['ctr'],
         'insight': 'Efectividad general de anuncios'
     }, {
         'metric': 'Top Site Share',
-        'value': top_3_sites_share,
+        'value': executive['top_3_sites_share'],
         'insight': 'Concentración en principales sitios'
     }, {
         'metric': 'Low Performing Sites',
-        'value': len(low_performing_sites),
+        'value': executive['low_performing_sites'],
         'insight': 'Sitios que requieren optimización'
     }])
     
     executive_file = os.path.join(outputs_dir, 'executive_summary.csv')
     executive_summary.to_csv(executive_file, index=False)
+    record_write(executive_file)
     logger.info("Resumen ejecutivo guardado en CSV")
     
-    return report
+    return reports
 
 if __name__ == "__main__":
-    generate_analysis_report() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Genera el reporte de análisis a partir de los KPIs en data/outputs")
+    parser.add_argument('--formats', nargs='+', choices=REPORT_FORMATS, default=['txt'],
+                        help="Formatos del reporte (por defecto: %(default)s)")
+    args = parser.parse_args()
+    generate_analysis_report(formats=args.formats) 
\ No newline at end of file
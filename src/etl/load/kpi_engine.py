@@ -0,0 +1,137 @@
+"""
+Motor de agregación de KPIs.
+
+Cada corte se declara como un dict::
+
+    {'fact': 'fact_ad_performance',
+     'group_by': ['site_key'],                         # [] para totales
+     'measures': {'impressions': 'sum', 'clicks': 'sum'},
+     'ratios': {'ctr': ('clicks', 'impressions', 100)},  # numerador, denominador, escala
+     'row_count': True}                                 # opcional: filas del hecho por grupo
+
+Todos los cortes de un mismo hecho salen de una sola agregación del hecho,
+al grano de la unión de sus claves (suma y conteo por medida). Cada corte es
+después un rollup de ese resultado, que es pequeño, así que agregar un corte
+no agrega otra pasada por la tabla de hechos.
+
+compute_kpi_aggregates_sql hace esa misma agregación base como un GROUP BY
+en la base de datos embebida (utils/database.py), que devuelve solo el
+resultado agregado; el hecho no se carga en memoria.
+"""
+import pandas as pd
+
+AGGREGATIONS = ('sum', 'mean')
+ROW_COUNT = 'row_count'
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def fact_columns(cuts, fact_name):
+    """Columnas de fact_name que necesitan los cortes (claves y medidas)"""
+    fact_cuts = [cut for cut in cuts.values() if cut['fact'] == fact_name]
+    return _unique([key for cut in fact_cuts for key in cut.get('group_by', [])] +
+                   [measure for cut in fact_cuts for measure in cut['measures']])
+
+
+def rollup(sums, counts, cut):
+    """Calcula un corte a partir de las sumas y conteos del grano base"""
+    group_by = list(cut.get('group_by', []))
+    columns = list(cut['measures'])
+    count_columns = columns + [ROW_COUNT]
+    if group_by:
+        # Las claves nulas (filas sin miembro en la dimensión) quedan fuera, como en un inner join
+        sums = sums.groupby(level=group_by)[columns].sum()
+        counts = counts.groupby(level=group_by)[count_columns].sum()
+    else:
+        sums = sums[columns].sum().to_frame().T
+        counts = counts[count_columns].sum().to_frame().T
+
+    result = pd.DataFrame(index=sums.index)
+    for column, how in cut['measures'].items():
+        if how == 'sum':
+            result[column] = sums[column]
+        elif how == 'mean':
+            result[column] = sums[column] / counts[column]
+        else:
+            raise ValueError(f"Agregación '{how}' no soportada para {column}. Opciones: {AGGREGATIONS}")
+    for name, (numerator, denominator, scale) in cut.get('ratios', {}).items():
+        result[name] = result[numerator] / result[denominator] * scale
+    if cut.get('row_count'):
+        result[ROW_COUNT] = counts[ROW_COUNT]
+    return result.reset_index(drop=not group_by)
+
+
+def base_aggregates(fact, keys, measures):
+    """Sumas y conteos por medida (más las filas) al grano de keys, en una pasada"""
+    if keys:
+        grouped = fact.groupby(keys, dropna=False, sort=False)
+        sums = grouped[measures].sum()
+        counts = grouped[measures].count()
+        counts[ROW_COUNT] = grouped.size()
+    else:
+        sums = fact[measures].sum().to_frame().T
+        counts = fact[measures].count().to_frame().T
+        counts[ROW_COUNT] = len(fact)
+    return sums, counts
+
+
+def fact_grain(cuts):
+    """Claves y medidas de la agregación base de un grupo de cortes"""
+    keys = _unique([key for cut in cuts.values() for key in cut.get('group_by', [])])
+    measures = _unique([measure for cut in cuts.values() for measure in cut['measures']])
+    return keys, measures
+
+
+def cuts_by_fact(cuts):
+    by_fact = {}
+    for name, cut in cuts.items():
+        by_fact.setdefault(cut['fact'], {})[name] = cut
+    return by_fact
+
+
+def aggregate_fact(fact, cuts):
+    """Una pasada por el hecho para todos sus cortes; devuelve {corte: DataFrame}"""
+    sums, counts = base_aggregates(fact, *fact_grain(cuts))
+    return {name: rollup(sums, counts, cut) for name, cut in cuts.items()}
+
+
+def compute_kpi_aggregates(facts, cuts):
+    """Calcula los cortes agrupándolos por hecho; facts es {nombre: DataFrame}"""
+    results = {}
+    for fact_name, fact_cuts in cuts_by_fact(cuts).items():
+        results.update(aggregate_fact(facts[fact_name], fact_cuts))
+    return results
+
+
+def base_aggregates_sql(database, fact_name, keys, measures):
+    """base_aggregates calculado con un GROUP BY en database"""
+    select = [_quote(key) for key in keys]
+    # COALESCE: en pandas la suma de un grupo sin valores es 0, en SQL es NULL
+    select += [f"COALESCE(SUM({_quote(measure)}), 0) AS {_quote(measure)}" for measure in measures]
+    select += [f"COUNT({_quote(measure)}) AS {_quote(measure + '__count')}" for measure in measures]
+    select.append(f"COUNT(*) AS {ROW_COUNT}")
+    sql = f"SELECT {', '.join(select)} FROM {_quote(fact_name)}"
+    if keys:
+        sql += f" GROUP BY {', '.join(_quote(key) for key in keys)}"
+    result = database.query(sql)
+    if keys:
+        result = result.set_index(keys)
+    sums = result[measures]
+    counts = result[[measure + '__count' for measure in measures] + [ROW_COUNT]]
+    counts.columns = measures + [ROW_COUNT]
+    return sums, counts
+
+
+def compute_kpi_aggregates_sql(database, cuts):
+    """compute_kpi_aggregates sobre los hechos guardados en database"""
+    results = {}
+    for fact_name, fact_cuts in cuts_by_fact(cuts).items():
+        sums, counts = base_aggregates_sql(database, fact_name, *fact_grain(fact_cuts))
+        results.update({name: rollup(sums, counts, cut) for name, cut in fact_cuts.items()})
+    return results
@@ -0,0 +1,45 @@
+"""
+Presentación de los KPIs resumen.
+
+calculate_kpis guarda cada KPI como número con su unidad (``count``,
+``percent`` en puntos porcentuales, ``seconds``); el texto para mostrar se
+arma aquí, solo al escribir el CSV o el reporte. Quien consuma los KPIs
+(el reporte, alertas por umbral) usa el número sin volver a parsear texto.
+"""
+import pandas as pd
+
+# Columnas del resumen de KPIs
+KPI_COLUMNS = ['metric', 'value', 'unit', 'category']
+
+UNIT_FORMATS = {
+    'count': '{:,.0f}',
+    'seconds': '{:.0f}',
+    'percent': '{:.1f}%',
+}
+# Métricas que se muestran con otra precisión que la de su unidad
+METRIC_FORMATS = {
+    'CTR (%)': '{:.2f}%',
+}
+
+
+def format_kpi(value, unit, metric=None):
+    """Texto de un valor según la métrica o su unidad ('' si es nulo)"""
+    if pd.isna(value):
+        return ''
+    template = METRIC_FORMATS.get(metric) or UNIT_FORMATS.get(unit, '{}')
+    return template.format(value)
+
+
+def format_kpis(kpis):
+    """Copia de la tabla de KPIs con la columna display (texto para mostrar)"""
+    display = [format_kpi(value, unit, metric)
+               for metric, value, unit in zip(kpis['metric'], kpis['value'], kpis['unit'])]
+    return kpis.assign(display=display)
+
+
+def kpi_value(kpis, metric):
+    """Valor numérico de una métrica de la tabla de KPIs"""
+    values = kpis.loc[kpis['metric'] == metric, 'value']
+    if len(values) == 0:
+        raise KeyError(f"KPI desconocido: '{metric}'")
+    return float(values.iloc[0])
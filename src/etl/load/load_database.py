@@ -0,0 +1,71 @@
+"""
+Carga del modelo dimensional en una base de datos embebida (SQLite o DuckDB).
+
+Un solo archivo tipado con las 9 dimensiones, la tabla puente y los 2
+hechos, como fuente alternativa a los CSV para Power BI y para calcular
+los KPIs con SQL (load/kpi_engine.compute_kpi_aggregates_sql).
+"""
+import pandas as pd
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.utils import *
+from utils.storage import load_table, load_partitioned_table
+from utils.database import DATABASE_BACKENDS, get_database, write_tables
+from utils.profiling import record_write
+from utils.schema import apply_schema
+from transform.create_dimensions import DIMENSION_KEYS
+
+logger = setup_logging()
+
+FACT_TABLES = ['fact_ad_performance', 'fact_web_analytics']
+BRIDGE_TABLE = 'bridge_creative_adcontent'
+
+def get_project_root():
+    """Get the project root directory"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+
+def get_database_path():
+    """Ruta (sin extensión) del archivo de base de datos"""
+    return os.path.join(get_project_root(), 'data', 'dimensional', 'marketing_analytics')
+
+def key_columns(df):
+    return [column for column in df.columns if column.endswith('_key')]
+
+def load_star_schema(database, dimensions=None, fact_ad=None, fact_web=None):
+    """Escribe dimensiones, puente y hechos en database (ver utils/database.py).
+
+    Las tablas que no se pasan en memoria se leen de disco. Cada dimensión
+    lleva su clave subrogada como clave primaria; la tabla puente y los
+    hechos, un índice por cada columna *_key. Devuelve database.
+    """
+    logger.info(f"Cargando modelo dimensional en {database.path}...")
+    root = os.path.join(get_project_root(), 'data', 'dimensional')
+    dimensions = dimensions or {}
+    tables = []
+    for name, (key_col, _) in DIMENSION_KEYS.items():
+        df = dimensions[name] if name in dimensions else load_table(os.path.join(root, 'dimensions'), name)
+        tables.append((name, df, key_col, []))
+    bridge = dimensions[BRIDGE_TABLE] if BRIDGE_TABLE in dimensions else load_table(os.path.join(root, 'bridge'),
+                                                                                   BRIDGE_TABLE)
+    # La tabla puente puede estar vacía: sin filas pandas no infiere los tipos
+    bridge = apply_schema(bridge, BRIDGE_TABLE)
+    tables.append((BRIDGE_TABLE, bridge, None, key_columns(bridge)))
+    for name, df in zip(FACT_TABLES, [fact_ad, fact_web]):
+        if df is None:
+            df = load_partitioned_table(os.path.join(root, 'facts'), name)
+        tables.append((name, df, None, key_columns(df)))
+
+    write_tables(database, tables)
+    record_write(database.path)
+    logger.info(f"Modelo dimensional cargado en {database.path}")
+    return database
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga el modelo dimensional en una base de datos embebida")
+    parser.add_argument('--database', choices=sorted(DATABASE_BACKENDS), default='sqlite',
+                        help="Motor de base de datos (por defecto: %(default)s)")
+    args = parser.parse_args()
+    load_star_schema(get_database(args.database, get_database_path()))
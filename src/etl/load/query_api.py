@@ -0,0 +1,295 @@
+"""
+API de consultas sobre el modelo dimensional.
+
+Una consulta elige un hecho, sus medidas, las columnas por las que agrupar
+y filtros. Las columnas pueden ser del hecho (claves y medidas) o atributos
+de cualquier dimensión enlazada por clave subrogada (``site_name``,
+``month_name``, ``device_category``...)::
+
+    engine = QueryEngine()
+    engine.query('fact_ad_performance',
+                 measures={'impressions': 'sum', 'clicks': 'sum'},
+                 group_by=['site_category'],
+                 filters={'year': 2021, 'size_key': [1, 2]},
+                 ratios={'ctr': ('clicks', 'impressions', 100)},
+                 order_by=['-clicks'], limit=10)
+
+Medidas, agregaciones y ratios son los del motor de KPIs
+(load/kpi_engine.py). El hecho se agrega una vez al grano de las claves
+subrogadas y los atributos se resuelven después sobre ese resultado, que es
+pequeño. Los resultados quedan en una caché LRU cuya clave es la consulta
+más la versión de los datos (fecha de modificación y tamaño de las tablas
+que usa): una consulta repetida no vuelve a leer ni a agregar el hecho, y
+una nueva carga del ETL invalida la caché sola.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.storage import load_partitioned_table, stored_table_columns, stored_table_path, table_exists
+from load.kpi_engine import AGGREGATIONS, base_aggregates, rollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 128
+
+# Dimensión enlazada por cada clave subrogada de los hechos
+DIMENSION_BY_KEY = {
+    'date_key': 'dim_date',
+    'campaign_key': 'dim_campaign',
+    'site_key': 'dim_site',
+    'creative_key': 'dim_creative',
+    'placement_key': 'dim_placement',
+    'size_key': 'dim_creative_size',
+    'source_key': 'dim_source',
+    'device_key': 'dim_device',
+    'ad_content_key': 'dim_ad_content',
+}
+
+
+def get_project_root():
+    """Get the project root directory"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+
+
+class ResultCache:
+    """Caché LRU de resultados: al llenarse descarta el usado hace más tiempo"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'max_size': self.max_size}
+
+
+def as_list(values):
+    return list(values) if isinstance(values, (list, tuple, set)) else [values]
+
+
+def query_key(fact, measures, group_by, filters, ratios, order_by, limit):
+    """Clave canónica de una consulta: el orden de medidas y filtros no la cambia"""
+    return json.dumps({
+        'fact': fact,
+        'measures': sorted(measures.items()),
+        'group_by': list(group_by),
+        'filters': sorted((column, sorted(as_list(values), key=str)) for column, values in filters.items()),
+        'ratios': sorted((name, list(ratio)) for name, ratio in ratios.items()),
+        'order_by': list(order_by),
+        'limit': limit,
+    }, default=str)
+
+
+class QueryEngine:
+    """Consultas sobre los hechos y dimensiones guardados en directory"""
+
+    def __init__(self, directory=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory or os.path.join(get_project_root(), 'data', 'dimensional')
+        self.cache = ResultCache(cache_size)
+        self._tables = {}
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def table_dir(self, name):
+        return os.path.join(self.directory, 'facts' if name.startswith('fact_') else 'dimensions')
+
+    def table_version(self, name):
+        """(mtime, tamaño) de la tabla en disco; cambia con cada carga del ETL.
+
+        De un hecho particionado se toma el manifiesto, que se reescribe con
+        cada partición.
+        """
+        path = stored_table_path(self.table_dir(name), name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No existe la tabla {name} ({path}). Ejecutar antes el ETL.")
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, name, columns=None):
+        """Lee una tabla y la conserva en memoria mientras no cambie en disco.
+
+        Con columns se leen solo esas columnas (más las ya leídas antes), así
+        que de los hechos grandes no se carga lo que ninguna consulta usó.
+        """
+        version = self.table_version(name)
+        with self._lock:
+            cached = self._tables.get(name)
+            if cached is not None and cached[0] == version:
+                loaded = cached[1]
+                if (columns is None and cached[2]) or (columns is not None and set(columns) <= set(loaded.columns)):
+                    return loaded
+                if columns is not None:
+                    columns = list(dict.fromkeys(list(loaded.columns) + list(columns)))
+            df = load_partitioned_table(self.table_dir(name), name, columns=columns)
+            self._tables[name] = (version, df, columns is None)
+            return df
+
+    def columns(self, fact):
+        """{columna consultable: dimensión que la aporta (None si es del hecho)}"""
+        dimensions = sorted(DIMENSION_BY_KEY.values())
+        version = self.data_version(fact, [name for name in dimensions
+                                           if table_exists(self.table_dir(name), name)])
+        cached = self._schemas.get(fact)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        schema = {}
+        fact_columns = stored_table_columns(self.table_dir(fact), fact)
+        for column in fact_columns:
+            schema[column] = None
+        for key in fact_columns:
+            dimension = DIMENSION_BY_KEY.get(key)
+            if dimension is None:
+                continue
+            for column in stored_table_columns(self.table_dir(dimension), dimension):
+                schema.setdefault(column, dimension)
+        self._schemas[fact] = (version, schema)
+        return schema
+
+    def data_version(self, fact, dimensions):
+        return [(name, self.table_version(name)) for name in [fact] + sorted(dimensions)]
+
+    def query(self, fact, measures, group_by=(), filters=None, ratios=None, order_by=(), limit=None):
+        """Agrega fact por group_by con filters; devuelve un DataFrame.
+
+        measures es {medida: 'sum' | 'mean'}; filters es {columna: valor o
+        lista de valores}; ratios es {nombre: (numerador, denominador, escala)}
+        sobre las medidas; order_by admite '-columna' para orden descendente.
+        """
+        group_by, order_by = list(group_by), list(order_by)
+        filters, ratios = dict(filters or {}), dict(ratios or {})
+        schema = self.columns(fact)
+        self._validate(fact, schema, measures, group_by, filters, ratios, order_by)
+        dimensions = {schema[column] for column in group_by + list(filters) if schema[column] is not None}
+
+        key = (query_key(fact, measures, group_by, filters, ratios, order_by, limit),
+               json.dumps(self.data_version(fact, dimensions)))
+        start = time.perf_counter()
+        result = self.cache.get(key)
+        if result is None:
+            result = self._execute(fact, schema, measures, group_by, filters, ratios, order_by, limit)
+            self.cache.put(key, result)
+            source = 'calculada'
+        else:
+            source = 'desde caché'
+        logger.info(f"Consulta sobre {fact} {source} en {(time.perf_counter() - start) * 1000:.1f} ms "
+                    f"({len(result)} filas)")
+        return result.copy()
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def _validate(self, fact, schema, measures, group_by, filters, ratios, order_by):
+        if not measures:
+            raise ValueError("La consulta necesita al menos una medida")
+        unknown = [column for column in list(measures) + group_by + list(filters) if column not in schema]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas para {fact}: {unknown}. Opciones: {sorted(schema)}")
+        not_in_fact = [measure for measure in measures if schema[measure] is not None]
+        if not_in_fact:
+            raise ValueError(f"Las medidas deben ser columnas de {fact}: {not_in_fact}")
+        for measure, how in measures.items():
+            if how not in AGGREGATIONS:
+                raise ValueError(f"Agregación '{how}' no soportada para {measure}. Opciones: {AGGREGATIONS}")
+        for name, (numerator, denominator, scale) in ratios.items():
+            if numerator not in measures or denominator not in measures:
+                raise ValueError(f"El ratio {name} usa medidas que no están en la consulta: "
+                                 f"{numerator}, {denominator}")
+        output = group_by + list(measures) + list(ratios)
+        unknown_order = [column for column in order_by if column.lstrip('-') not in output]
+        if unknown_order:
+            raise ValueError(f"No se puede ordenar por {unknown_order}. Opciones: {output}")
+
+    def _dimension_key(self, dimension):
+        return next(key for key, name in DIMENSION_BY_KEY.items() if name == dimension)
+
+    def _execute(self, fact, schema, measures, group_by, filters, ratios, order_by, limit):
+        # Claves del hecho: las columnas propias y la clave de cada dimensión usada
+        keys = []
+        for column in group_by + list(filters):
+            dimension = schema[column]
+            keys.append(column if dimension is None else self._dimension_key(dimension))
+        keys = list(dict.fromkeys(keys))
+        frame = self.load(fact, columns=list(dict.fromkeys(keys + list(measures))))
+
+        # Filtros sobre la dimensión: se traducen a las claves que cumplen y se aplican al hecho de una vez
+        mask = None
+        for column, values in filters.items():
+            dimension = schema[column]
+            if dimension is None:
+                condition = frame[column].isin(as_list(values))
+            else:
+                dim = self.load(dimension)
+                key_col = self._dimension_key(dimension)
+                condition = frame[key_col].isin(dim.loc[dim[column].isin(as_list(values)), key_col])
+            mask = condition if mask is None else mask & condition
+        if mask is not None:
+            frame = frame[mask]
+
+        # Una agregación del hecho al grano de las claves; los atributos se mapean sobre el resultado
+        group_keys = list(dict.fromkeys(column if schema[column] is None else self._dimension_key(schema[column])
+                                        for column in group_by))
+        sums, counts = base_aggregates(frame, group_keys, list(dict.fromkeys(measures)))
+        if group_keys:
+            index = sums.index.to_frame(index=False)
+            for column in group_by:
+                dimension = schema[column]
+                if dimension is not None:
+                    key_col = self._dimension_key(dimension)
+                    index[column] = index[key_col].map(self.load(dimension).set_index(key_col)[column])
+            sums.index = counts.index = index.set_index(group_by).index
+        result = rollup(sums, counts, {'measures': measures, 'group_by': group_by, 'ratios': ratios})
+
+        if order_by:
+            result = result.sort_values([column.lstrip('-') for column in order_by],
+                                        ascending=[not column.startswith('-') for column in order_by])
+        if limit is not None:
+            result = result.head(limit)
+        return result.reset_index(drop=True)
+
+
+_default_engine = None
+
+
+def get_query_engine():
+    """Motor compartido sobre data/dimensional (su caché dura lo que el proceso)"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = QueryEngine()
+    return _default_engine
+
+
+def query(fact, measures, group_by=(), filters=None, ratios=None, order_by=(), limit=None):
+    """Atajo para QueryEngine.query con el motor compartido"""
+    return get_query_engine().query(fact, measures, group_by, filters, ratios, order_by, limit)
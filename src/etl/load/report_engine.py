@@ -0,0 +1,233 @@
+"""
+Motor de reportes: secciones declarativas, plantillas por formato y escritura por partes.
+
+Un reporte es una lista de secciones (``section``) con un título y bloques:
+
+- ``line``: una línea de texto; ``spaced`` la separa de lo anterior.
+- ``bullet_list``: ítems (una Series de textos) con título, detalles por
+  ítem (Series alineadas; un nulo omite el detalle), nota final y la
+  cantidad de ítems que se dejaron fuera.
+
+Los textos de los ítems se arman con operaciones sobre columnas enteras
+(``format_values`` y concatenación de Series), no fila por fila. Cada
+formato (txt, md, html) tiene sus plantillas; ``render_report`` produce el
+reporte por partes, de a STREAM_BATCH_ROWS ítems por lista, y
+``write_report`` las escribe al archivo a medida que se generan. El
+formato json no usa plantillas: cada sección se serializa como un objeto.
+"""
+import html
+import json
+import re
+import string
+
+import pandas as pd
+
+REPORT_FORMATS = ('txt', 'md', 'html', 'json')
+
+# Ítems de una lista que se renderizan y escriben juntos
+STREAM_BATCH_ROWS = 1000
+
+TEXT_RULE = '=' * 80
+TEXT_SECTION_RULE = '-' * 40
+
+# Plantillas por formato; una clave ausente no escribe nada. {text} es el
+# texto ya escapado, {details} los detalles del ítem y {count} los ítems omitidos
+TEMPLATES = {
+    'txt': {
+        'header': TEXT_RULE + '\n{title}\nFecha de generación: {generated_at}\n' + TEXT_RULE,
+        'section': '\n{title}\n' + TEXT_SECTION_RULE,
+        'line': '{text}',
+        'spaced_line': '\n{text}',
+        'list_title': '{text}',
+        'spaced_list_title': '\n{text}',
+        'item': '• {text}{details}',
+        'titled_item': '  • {text}{details}',
+        'detail': '\n  - {text}',
+        'details': '{details}',
+        'more': '  … y {count} más',
+        'note': '  → {text}',
+    },
+    'md': {
+        'header': '# {title}\n\n_Fecha de generación: {generated_at}_\n',
+        'section': '## {title}\n',
+        'line': '{text}\n',
+        'spaced_line': '{text}\n',
+        'list_title': '{text}\n',
+        'spaced_list_title': '{text}\n',
+        'item': '- {text}{details}',
+        'titled_item': '- {text}{details}',
+        'detail': '\n  - {text}',
+        'details': '{details}',
+        'more': '- … y {count} más',
+        'list_end': '',
+        'note': '→ {text}\n',
+        'footer': '',
+    },
+    'html': {
+        'header': ('<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="utf-8">\n'
+                   '<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n'
+                   '<p>Fecha de generación: {generated_at}</p>'),
+        'section': '<section>\n<h2>{title}</h2>',
+        'section_end': '</section>',
+        'line': '<p>{text}</p>',
+        'spaced_line': '<p>{text}</p>',
+        'list_title': '<p>{text}</p>',
+        'spaced_list_title': '<p>{text}</p>',
+        'list_start': '<ul>',
+        'item': '<li>{text}{details}</li>',
+        'titled_item': '<li>{text}{details}</li>',
+        'detail': '<li>{text}</li>',
+        'details': '<ul>{details}</ul>',
+        'more': '<li>… y {count} más</li>',
+        'list_end': '</ul>',
+        'note': '<p>→ {text}</p>',
+        'footer': '</body>\n</html>\n',
+    },
+}
+
+MARKDOWN_SPECIAL = re.compile(r'([\\`*_\[\]<>#|])')
+HTML_ESCAPES = [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;')]
+
+
+def section(title, blocks):
+    return {'title': title, 'blocks': list(blocks)}
+
+
+def line(text, spaced=False):
+    return {'type': 'line', 'text': text, 'spaced': spaced}
+
+
+def bullet_list(items, title=None, details=(), note=None, omitted=0, spaced=False):
+    """Bloque de lista; items y cada serie de details van alineados por posición"""
+    items = pd.Series(items, dtype=object).reset_index(drop=True)
+    details = [pd.Series(detail, dtype=object).reset_index(drop=True) for detail in details]
+    return {'type': 'list', 'title': title, 'items': items, 'details': details,
+            'note': note, 'omitted': omitted, 'spaced': spaced}
+
+
+def format_values(series, template):
+    """Columna de textos con template (p. ej. '{:,.0f}') aplicado a cada valor"""
+    return series.map(template.format).astype(object)
+
+
+def text_values(series):
+    """Columna de textos (dtype object) para concatenar; con texto arrow una lista vacía falla"""
+    return series.astype(str).astype(object)
+
+
+def limit_items(df, max_items, by):
+    """(las max_items filas con mayor by, cantidad de filas omitidas); sin límite si cabe"""
+    if max_items is None or len(df) <= max_items:
+        return df, 0
+    return df.nlargest(max_items, by), len(df) - max_items
+
+
+def escape(values, fmt):
+    """Escapa un texto o una Series de textos para el formato"""
+    if not isinstance(values, pd.Series):
+        return escape(pd.Series([values], dtype=object), fmt).iloc[0]
+    if fmt == 'md':
+        return values.str.replace(MARKDOWN_SPECIAL, r'\\\1', regex=True)
+    if fmt == 'html':
+        for char, entity in HTML_ESCAPES:
+            values = values.str.replace(char, entity, regex=False)
+    return values
+
+
+def fill(template, **fields):
+    """template con sus campos reemplazados; con algún campo Series, una Series"""
+    result = ''
+    for literal, field, _, _ in string.Formatter().parse(template):
+        result = result + literal
+        if field is not None:
+            result = result + fields[field]
+    return result
+
+
+def render_block(block, templates, fmt):
+    """Partes de texto de un bloque"""
+    prefix = 'spaced_' if block['spaced'] else ''
+    if block['type'] == 'line':
+        yield fill(templates[prefix + 'line'], text=escape(block['text'], fmt))
+        return
+    if block['title'] is not None:
+        yield fill(templates[prefix + 'list_title'], text=escape(block['title'], fmt))
+    if 'list_start' in templates:
+        yield templates['list_start']
+    item_template = templates['titled_item' if block['title'] is not None else 'item']
+    for start in range(0, len(block['items']), STREAM_BATCH_ROWS):
+        batch = slice(start, start + STREAM_BATCH_ROWS)
+        details = pd.Series('', index=block['items'].index[batch], dtype=object)
+        for detail in block['details']:
+            values = detail[batch]
+            rendered = fill(templates['detail'], text=escape(values.fillna(''), fmt))
+            details = details + rendered.where(values.notna(), '')
+        details = fill(templates['details'], details=details).where(details != '', '')
+        yield '\n'.join(fill(item_template, text=escape(block['items'][batch], fmt), details=details))
+    if block['omitted']:
+        yield templates['more'].format(count=block['omitted'])
+    if 'list_end' in templates:
+        yield templates['list_end']
+    if block['note'] is not None:
+        yield fill(templates['note'], text=escape(block['note'], fmt))
+
+
+def block_json(block):
+    """Bloque como objeto serializable"""
+    if block['type'] == 'line':
+        return {'type': 'line', 'text': block['text']}
+    details = [[value for value in values if pd.notna(value)]
+               for values in zip(*block['details'])] if block['details'] else [[]] * len(block['items'])
+    return {'type': 'list', 'title': block['title'],
+            'items': [{'text': text, 'details': item_details}
+                      for text, item_details in zip(block['items'], details)],
+            'omitted': int(block['omitted']), 'note': block['note']}
+
+
+def render_json(sections, title, generated_at):
+    yield '{'
+    yield f'"title": {json.dumps(title, ensure_ascii=False)},'
+    yield f'"generated_at": {json.dumps(generated_at)},'
+    yield '"sections": ['
+    previous = None
+    for report_section in sections:
+        if previous is not None:
+            yield previous + ','
+        previous = json.dumps({'title': report_section['title'],
+                               'blocks': [block_json(block) for block in report_section['blocks']]},
+                              ensure_ascii=False)
+    if previous is not None:
+        yield previous
+    yield ']'
+    yield '}\n'
+
+
+def render_report(sections, fmt, title, generated_at):
+    """Partes del reporte en el formato fmt; unidas con saltos de línea forman el archivo"""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Formato de reporte desconocido: '{fmt}'. Opciones: {list(REPORT_FORMATS)}")
+    if fmt == 'json':
+        yield from render_json(sections, title, generated_at)
+        return
+    templates = TEMPLATES[fmt]
+    if fmt == 'html':
+        title = html.escape(title)
+    yield templates['header'].format(title=title, generated_at=generated_at)
+    for report_section in sections:
+        yield fill(templates['section'], title=escape(report_section['title'], fmt))
+        for block in report_section['blocks']:
+            yield from render_block(block, templates, fmt)
+        if 'section_end' in templates:
+            yield templates['section_end']
+    if 'footer' in templates:
+        yield templates['footer']
+
+
+def write_report(sections, path, fmt, title, generated_at):
+    """Escribe el reporte en path a medida que se renderiza"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, chunk in enumerate(render_report(sections, fmt, title, generated_at)):
+            if i:
+                f.write('\n')
+            f.write(chunk)
+    return path
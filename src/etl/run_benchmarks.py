@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Benchmarks del ETL sobre exports RFI/GA sintéticos.
+
+Para cada tamaño genera (una sola vez, con settings.RANDOM_STATE) un RFI y
+un GA sintéticos de ese número de filas, ejecuta las etapas del ETL en
+memoria con el perfilador activo y reporta throughput (filas/s) y memoria
+por etapa. Con --baseline compara contra una ejecución anterior y termina
+con código 1 si alguna etapa empeora más que la tolerancia.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+# Add current directory (and src/ for config) to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.utils import setup_logging
+from utils.pipeline import PipelineContext
+from utils.profiling import start_profiling, stop_profiling
+from utils.synthetic_data import generate_synthetic_sources
+from config.settings import (RANDOM_STATE, BENCHMARK_DIR, BENCHMARK_ROW_COUNTS, BENCHMARK_TOLERANCE,
+                             BENCHMARK_MIN_SECONDS)
+from run_full_etl import build_pipeline
+
+logger = setup_logging()
+
+# El reporte escribe en data/outputs; no forma parte del benchmark
+SKIPPED_STAGES = {'analysis_report'}
+
+def stage_result(profile):
+    """Métricas de una etapa con su throughput en filas por segundo"""
+    result = profile.to_dict()
+    rows = result['rows_in'] if result['rows_in'] is not None else result['rows_out']
+    wall = result['wall_seconds']
+    result['rows_per_second'] = round(rows / wall, 1) if rows and wall else None
+    return result
+
+def run_benchmark(n_rows, random_state=RANDOM_STATE, max_workers=1):
+    """Ejecuta el ETL en memoria sobre exports sintéticos de n_rows filas"""
+    logger.info(f"Benchmark con {n_rows:,} filas por export")
+    start = time.perf_counter()
+    rfi_file, ga_file = generate_synthetic_sources(str(BENCHMARK_DIR), n_rows, random_state)
+    generation_seconds = round(time.perf_counter() - start, 2)
+
+    pipeline = build_pipeline(PipelineContext(save_csv=False), max_workers=max_workers,
+                              rfi_file=rfi_file, ga_file=ga_file)
+    pipeline.stages = [stage for stage in pipeline.stages if stage.name not in SKIPPED_STAGES]
+    profiler = start_profiling()
+    try:
+        pipeline.run(max_workers=max_workers)
+    finally:
+        stop_profiling()
+    manifest = profiler.manifest()
+    return {
+        'rows': n_rows,
+        'generation_seconds': generation_seconds,
+        'wall_seconds': manifest['wall_seconds'],
+        'peak_rss_mb': manifest['peak_rss_mb'],
+        'stages': {profile.name: stage_result(profile) for profile in profiler.stages},
+    }
+
+def compare_to_baseline(results, baseline, tolerance=BENCHMARK_TOLERANCE, min_seconds=BENCHMARK_MIN_SECONDS):
+    """Lista las regresiones respecto de baseline.
+
+    Una etapa regresa si su throughput cae o su pico de memoria crece más
+    que tolerance (fracción). Las etapas que en la baseline tardan menos de
+    min_seconds se ignoran: a esa escala el tiempo es ruido.
+    """
+    regressions = []
+    for size, run in results['runs'].items():
+        base_run = baseline.get('runs', {}).get(size)
+        if base_run is None:
+            continue
+        for name, stage in run['stages'].items():
+            base = base_run['stages'].get(name)
+            if base is None or (base['wall_seconds'] or 0) < min_seconds:
+                continue
+            if base['rows_per_second'] and stage['rows_per_second'] is not None \
+                    and stage['rows_per_second'] < base['rows_per_second'] * (1 - tolerance):
+                regressions.append(f"{size} filas, {name}: throughput {stage['rows_per_second']:,.0f} filas/s "
+                                   f"(baseline {base['rows_per_second']:,.0f})")
+            if base['peak_rss_mb'] and stage['peak_rss_mb'] is not None \
+                    and stage['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+                regressions.append(f"{size} filas, {name}: pico de memoria {stage['peak_rss_mb']} MB "
+                                   f"(baseline {base['peak_rss_mb']} MB)")
+    return regressions
+
+def print_report(results):
+    for size, run in results['runs'].items():
+        print(f"\n{int(size):,} filas por export - {run['wall_seconds']:.2f} s, pico {run['peak_rss_mb']} MB "
+              f"(generación: {run['generation_seconds']:.2f} s)")
+        print(f"  {'etapa':<28}{'segundos':>10}{'cpu':>10}{'filas/s':>14}{'pico MB':>10}")
+        for name, stage in run['stages'].items():
+            throughput = f"{stage['rows_per_second']:,.0f}" if stage['rows_per_second'] else '-'
+            print(f"  {name:<28}{stage['wall_seconds']:>10.3f}{stage['cpu_seconds']:>10.3f}"
+                  f"{throughput:>14}{str(stage['peak_rss_mb']):>10}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del ETL con datos sintéticos")
+    parser.add_argument('--rows', type=int, nargs='+', default=BENCHMARK_ROW_COUNTS,
+                        help="Filas por export (por defecto: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Hilos del pipeline; 1 mide cada etapa sin interferencias (por defecto: 1)")
+    parser.add_argument('--output', default=str(BENCHMARK_DIR / 'benchmark_results.json'),
+                        help="Archivo JSON de resultados")
+    parser.add_argument('--baseline', help="Resultados anteriores contra los que detectar regresiones")
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                        help="Empeoramiento admitido por etapa, como fracción (por defecto: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'random_state': RANDOM_STATE,
+        'max_workers': args.workers,
+        # El pico de memoria es del proceso: los tamaños van de menor a mayor
+        'runs': {str(n): run_benchmark(n, max_workers=args.workers) for n in sorted(args.rows)},
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print_report(results)
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESIONES:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            return 1
+        print("\nSin regresiones respecto de la baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,77 +5,261 @@ Script principal para ejecutar el ETL completo de Marketing Analytics
 import sys
 import os
 import time
+import argparse
+from functools import partial
 from datetime import datetime
 
-# Add current directory to path for imports
+# Add current directory (and src/ for config) to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.utils import setup_logging
+from utils.pipeline import Pipeline, PipelineContext
+from utils.storage import STORAGE_BACKENDS, set_default_storage
+from utils.database import DATABASE_BACKENDS, get_database
+from utils.incremental import IncrementalState
+from utils.profiling import start_profiling, stop_profiling
+from utils.stage_cache import StageCache, code_fingerprint
+from config.settings import (CHUNK_SIZE, STORAGE_FORMAT, PARQUET_COMPRESSION, INCREMENTAL_STATE_FILE,
+                             MAX_WORKERS, RUN_MANIFEST_FILE, DATABASE_FORMAT, DATABASE_FILE, STAGE_CACHE_FILE,
+                             STAGE_CACHE_VERSION, RFI_DIR, RFI_DATA_PATTERN, GOOGLE_ANALYTICS_DIR,
+                             GA_DATA_PATTERN, REPORT_FORMATS)
 import extract.extract_and_clean as extract_and_clean
 import utils.validate_data as validate_data
 import transform.create_dimensions as create_dimensions
 import transform.create_facts as create_facts
+import transform.create_aggregates as create_aggregates
+import load.load_database as load_database
 import load.calculate_kpis as calculate_kpis
 import load.generate_analysis_report as generate_analysis_report
+import load.report_engine as report_engine
 
-def main():
+def build_pipeline(context, chunksize=None, incremental=None, max_workers=1, rfi_file=None, ga_file=None,
+                   database=None, cache=None, report_formats=('txt',)):
+    """Registra las etapas del ETL; las tablas pasan entre etapas en memoria.
+
+    Con chunksize la extracción escribe el staging por bloques y las etapas
+    siguientes lo leen desde disco. Con incremental (IncrementalState) solo
+    se procesan los meses nuevos o modificados. max_workers es el número de
+    hilos para construir las dimensiones en paralelo y de procesos para leer
+    varios exports. rfi_file y ga_file (archivo, patrón glob o lista)
+    reemplazan los exports de data/raw. Con database (utils/database.py) el
+    modelo se carga también en esa base de datos y los KPIs se calculan
+    con SQL sobre ella. Con cache (StageCache) las etapas sin cambios desde
+    la última ejecución no se vuelven a ejecutar. report_formats son los
+    formatos del reporte de análisis (txt, md, html, json).
+    """
+    pipeline = Pipeline(context, cache=cache)
+    
+    step = "[PASO 1/5] Extracción y limpieza de datos"
+    pipeline.add_stage('extract_rfi', partial(extract_and_clean.extract_rfi_data, chunksize=chunksize,
+                                              incremental=incremental, source_file=rfi_file,
+                                              max_workers=max_workers),
+                       outputs=['rfi_staging'], step=step,
+                       sources=extract_and_clean.get_rfi_source_files(rfi_file),
+                       artifacts=[extract_and_clean.get_staging_path('rfi_staging')],
+                       load=partial(extract_and_clean.load_staging, 'rfi_staging'))
+    pipeline.add_stage('extract_ga', partial(extract_and_clean.extract_ga_data, chunksize=chunksize,
+                                             incremental=incremental, source_file=ga_file,
+                                             max_workers=max_workers),
+                       outputs=['ga_staging'], step=step,
+                       sources=extract_and_clean.get_ga_source_files(ga_file),
+                       artifacts=[extract_and_clean.get_staging_path('ga_staging')],
+                       load=partial(extract_and_clean.load_staging, 'ga_staging'))
+    
+    step = "[PASO 2/5] Validación de datos"
+    pipeline.add_stage('validate', validate_data.validate_staging_data,
+                       inputs=['rfi_staging', 'ga_staging'], sink=False, step=step,
+                       artifacts=[validate_data.get_report_path()])
+    
+    step = "[PASO 3/5] Creación de dimensiones"
+    pipeline.add_stage('dimensions', partial(create_dimensions.create_all_dimensions, incremental=incremental,
+                                             max_workers=max_workers, cache=cache),
+                       inputs=['rfi_staging', 'ga_staging'], outputs=['dimensions'], step=step,
+                       artifacts=[create_dimensions.get_dimension_path(name)
+                                  for name in create_dimensions.DIMENSION_TABLES],
+                       load=create_dimensions.load_all_dimensions)
+    
+    step = "[PASO 4/5] Creación de tablas de hechos"
+    pipeline.add_stage('fact_ad_performance', partial(create_facts.create_fact_ad_performance,
+                                                      incremental=incremental),
+                       inputs=['rfi_staging', 'dimensions'], outputs=['fact_ad_performance'], step=step,
+                       artifacts=[create_facts.get_fact_path('fact_ad_performance')],
+                       load=partial(create_facts.load_fact, 'fact_ad_performance'))
+    pipeline.add_stage('fact_web_analytics', partial(create_facts.create_fact_web_analytics,
+                                                     incremental=incremental),
+                       inputs=['ga_staging', 'dimensions'], outputs=['fact_web_analytics'], step=step,
+                       artifacts=[create_facts.get_fact_path('fact_web_analytics')],
+                       load=partial(create_facts.load_fact, 'fact_web_analytics'))
+    pipeline.add_stage('aggregates', create_aggregates.create_all_aggregates,
+                       inputs=['fact_ad_performance', 'fact_web_analytics'], outputs=['aggregates'], step=step,
+                       artifacts=create_aggregates.get_aggregate_paths(),
+                       load=create_aggregates.load_all_aggregates)
+    
+    if database is not None:
+        pipeline.add_stage('database', partial(load_database.load_star_schema, database),
+                           inputs=['dimensions', 'fact_ad_performance', 'fact_web_analytics'],
+                           outputs=['database'], sink=False, step=step,
+                           artifacts=[database.path], load=lambda: database)
+    
+    step = "[PASO 5/5] Cálculo de KPIs"
+    # Una sola agregación por hecho para todos los cortes de KPIs
+    if database is not None:
+        pipeline.add_stage('kpi_aggregates', calculate_kpis.calculate_kpi_aggregates_sql,
+                           inputs=['database'], outputs=['kpi_aggregates'], sink=False, step=step)
+    else:
+        pipeline.add_stage('kpi_aggregates', calculate_kpis.calculate_kpi_aggregates,
+                           inputs=['fact_ad_performance', 'fact_web_analytics'],
+                           outputs=['kpi_aggregates'], sink=False, step=step)
+    # Las cuatro tablas de KPIs corren en paralelo en cuanto están las agregaciones
+    calculate_kpis.add_kpi_stages(pipeline, step=step)
+    
+    step = "[PASO FINAL] Generación de reporte de análisis"
+    # El reporte recibe los KPIs en memoria; no relee sus CSV ni el staging
+    pipeline.add_stage('analysis_report', partial(generate_analysis_report.generate_analysis_report,
+                                                  formats=report_formats),
+                       inputs=list(calculate_kpis.KPI_TABLES),
+                       sink=False, step=step, sources=[report_engine.__file__],
+                       artifacts=[generate_analysis_report.get_report_path(fmt) for fmt in report_formats]
+                                 + [calculate_kpis.get_output_path('executive_summary.csv')])
+    return pipeline
+
+def main(save_csv=True, chunksize=None, storage_format=STORAGE_FORMAT, incremental=False,
+         max_workers=MAX_WORKERS, database_format=DATABASE_FORMAT, use_cache=True,
+         rfi_source=None, ga_source=None, report_formats=REPORT_FORMATS):
+    """Ejecuta el ETL completo.
+
+    Con save_csv=False las tablas intermedias no se escriben a disco; con
+    chunksize los exports crudos se extraen por bloques de ese tamaño.
+    storage_format elige el formato de staging, dimensiones y hechos. Con
+    incremental solo se procesan los meses nuevos o modificados desde la
+    última ejecución incremental. Las etapas independientes (por ejemplo
+    las dos tablas de hechos) corren en paralelo con max_workers hilos.
+    Con database_format ('sqlite' o 'duckdb') el modelo se carga además en
+    DATABASE_FILE y los KPIs se calculan con SQL.
+    
+    rfi_source y ga_source son un archivo o un patrón glob; por defecto,
+    RFI_DATA_PATTERN y GA_DATA_PATTERN en data/raw. Todos los exports que
+    coinciden se extraen y se concatenan. report_formats son los formatos
+    en que se escribe analysis_report (txt, md, html, json).
+    
+    Con use_cache las etapas cuyas entradas, fuentes y código no cambiaron
+    desde la última ejecución correcta (STAGE_CACHE_FILE) reutilizan lo que
+    ya está en disco. No aplica con save_csv=False ni con incremental.
+    
+    El perfil de cada etapa (tiempos, memoria, filas y bytes) se escribe
+    en RUN_MANIFEST_FILE, también si la ejecución falla.
+    """
     start_time = time.time()
     logger = setup_logging()
     logger.info("=" * 50)
     logger.info("INICIANDO ETL DE MARKETING ANALYTICS")
     logger.info(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 50)
+    profiler = start_profiling()
+    run_info = {
+        'options': {'save_csv': save_csv, 'chunksize': chunksize, 'storage_format': storage_format,
+                    'incremental': incremental, 'max_workers': max_workers,
+                    'database_format': database_format, 'use_cache': use_cache,
+                    'rfi_source': rfi_source, 'ga_source': ga_source,
+                    'report_formats': list(report_formats)},
+    }
     try:
-        logger.info("\n[PASO 1/5] Extracción y limpieza de datos")
-        extract_and_clean.extract_rfi_data()
-        extract_and_clean.extract_ga_data()
-        
-        logger.info("\n[PASO 2/5] Validación de datos")
-        validate_data.validate_staging_data()
-        
-        logger.info("\n[PASO 3/5] Creación de dimensiones")
-        create_dimensions.create_all_dimensions()
-        
-        logger.info("\n[PASO 4/5] Creación de tablas de hechos")
-        create_facts.create_fact_ad_performance()
-        create_facts.create_fact_web_analytics()
-        
-        logger.info("\n[PASO 5/5] Cálculo de KPIs")
-        calculate_kpis.calculate_summary_kpis()
-        calculate_kpis.calculate_kpis_by_site()
-        calculate_kpis.calculate_kpis_by_creative()
-        calculate_kpis.calculate_kpis_by_device()
-        
-        logger.info("\n[PASO FINAL] Generación de reporte de análisis")
-        generate_analysis_report.generate_analysis_report()
+        if storage_format == 'parquet':
+            set_default_storage('parquet', compression=PARQUET_COMPRESSION)
+        else:
+            set_default_storage(storage_format)
+        state = None
+        if incremental:
+            if not save_csv:
+                raise ValueError("La carga incremental requiere escribir las tablas a disco")
+            state = IncrementalState.load(str(INCREMENTAL_STATE_FILE))
+        database = get_database(database_format, str(DATABASE_FILE)) if database_format else None
+        cache = None
+        if use_cache and save_csv and not incremental:
+            # Con cualquier cambio en el código del ETL (también en helpers) se recalcula todo
+            cache = StageCache.load(str(STAGE_CACHE_FILE), tag={
+                'version': STAGE_CACHE_VERSION, 'storage_format': storage_format,
+                'code': code_fingerprint(os.path.dirname(os.path.abspath(__file__)))})
+        context = PipelineContext(save_csv=save_csv)
+        pipeline = build_pipeline(context, chunksize=chunksize, incremental=state, max_workers=max_workers,
+                                  rfi_file=rfi_source or str(RFI_DIR / RFI_DATA_PATTERN),
+                                  ga_file=ga_source or str(GOOGLE_ANALYTICS_DIR / GA_DATA_PATTERN),
+                                  database=database, cache=cache, report_formats=report_formats)
+        pipeline.run(max_workers=max_workers)
+        if state is not None:
+            state.commit()
+        if cache is not None:
+            cache.commit()
         
         elapsed_time = time.time() - start_time
         logger.info("\n" + "=" * 50)
         logger.info("ETL COMPLETADO EXITOSAMENTE")
         logger.info(f"Tiempo total: {elapsed_time:.2f} segundos")
         logger.info("=" * 50)
+        profiler.write_manifest(str(RUN_MANIFEST_FILE), status='ok', **run_info)
         print("\nARCHIVOS GENERADOS:")
         print("├── 02_staging/           # Datos limpios")
         print("├── 03_dimensional_model/ # Modelo Kimball")
         print("│   ├── dimensions/       # 9 dimensiones")
         print("│   ├── bridge/          # Tabla puente")
-        print("│   └── facts/           # 2 tablas de hechos")
+        print("│   ├── facts/           # 2 tablas de hechos")
+        print("│   ├── aggregates/      # Agregados por mes para el dashboard")
+        if database is not None:
+            print(f"│   └── {os.path.basename(database.path)} # Modelo completo en {database.name}")
         print("├── 05_kpi_outputs/      # KPIs calculados")
         print("│   ├── kpi_summary.csv  # KPIs principales")
         print("│   ├── kpi_by_site.csv  # KPIs por sitio")
         print("│   ├── kpi_by_creative.csv # KPIs por creativo")
         print("│   ├── kpi_by_device.csv # KPIs por dispositivo")
-        print("│   ├── analysis_report.txt # Reporte completo")
+        for fmt in report_formats:
+            print(f"│   ├── analysis_report.{fmt} # Reporte completo")
         print("│   └── executive_summary.csv # Resumen ejecutivo")
         print("└── 06_logs/            # Logs de ejecución")
         print("\nLISTO PARA POWER BI:")
         print("• Conecta las tablas de facts/ y dimensions/")
         print("• Usa los KPIs de 05_kpi_outputs/ para métricas")
-        print("• Consulta analysis_report.txt para insights")
+        print(f"• Consulta analysis_report.{report_formats[0]} para insights")
         return True
     except Exception as e:
         logger.error(f"ERROR EN ETL: {str(e)}")
+        profiler.write_manifest(str(RUN_MANIFEST_FILE), status='error', error=str(e), **run_info)
         raise
+    finally:
+        stop_profiling()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ETL completo de Marketing Analytics")
+    parser.add_argument('--no-csv', action='store_true',
+                        help="No escribir staging, dimensiones, hechos ni KPIs a CSV")
+    parser.add_argument('--chunked', action='store_true',
+                        help=f"Extraer los exports crudos por bloques de CHUNK_SIZE ({CHUNK_SIZE}) filas")
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS), default=STORAGE_FORMAT,
+                        help="Formato de staging, dimensiones, puente y hechos (por defecto: %(default)s)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesar solo los meses nuevos o modificados desde la última carga incremental")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help="Hilos para las etapas independientes; 1 las ejecuta en secuencia "
+                             "(por defecto: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ejecutar todas las etapas aunque sus entradas no hayan cambiado")
+    parser.add_argument('--database', choices=sorted(DATABASE_BACKENDS), default=DATABASE_FORMAT,
+                        help="Cargar también el modelo en una base de datos embebida y calcular los KPIs "
+                             "con SQL sobre ella")
+    parser.add_argument('--rfi-source',
+                        help=f"Export RFI o patrón glob de exports (por defecto: {RFI_DIR / RFI_DATA_PATTERN})")
+    parser.add_argument('--ga-source',
+                        help=f"Export GA o patrón glob de exports (por defecto: {GOOGLE_ANALYTICS_DIR / GA_DATA_PATTERN})")
+    parser.add_argument('--report-formats', nargs='+', choices=report_engine.REPORT_FORMATS,
+                        default=REPORT_FORMATS,
+                        help="Formatos del reporte de análisis (por defecto: %(default)s)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    args = parse_args()
+    success = main(save_csv=not args.no_csv, chunksize=CHUNK_SIZE if args.chunked else None,
+                   storage_format=args.storage, incremental=args.incremental, max_workers=args.workers,
+                   database_format=args.database, use_cache=not args.no_cache,
+                   rfi_source=args.rfi_source, ga_source=args.ga_source,
+                   report_formats=args.report_formats)
+    sys.exit(0 if success else 1) 
\ No newline at end of file
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Consultas ad-hoc sobre el modelo dimensional desde la línea de comandos.
+
+Ejemplos:
+    python run_query.py fact_ad_performance -m impressions:sum -m clicks:sum \\
+        -g site_category -f year=2021 -r ctr=clicks/impressions*100 --order-by=-clicks --limit 10
+    python run_query.py fact_web_analytics -m sessions -m bounce_rate:mean \\
+        -g device_category -f device_category=mobile,tablet --output sesiones.csv
+    python run_query.py fact_web_analytics --list-columns
+    python run_query.py fact_ad_performance --partitions
+"""
+import sys
+import os
+import argparse
+
+# Add current directory (and src/ for config) to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.utils import setup_logging
+from utils.storage import STORAGE_BACKENDS, set_default_storage, is_partitioned, partition_stats
+from load.query_api import QueryEngine
+from config.settings import STORAGE_FORMAT, PARQUET_COMPRESSION
+
+logger = setup_logging()
+
+def parse_value(text):
+    """'3' -> 3, '0.5' -> 0.5, cualquier otro texto queda igual"""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+def parse_measure(text):
+    """'clicks' o 'clicks:sum' -> ('clicks', 'sum')"""
+    name, _, how = text.partition(':')
+    return name, how or 'sum'
+
+def parse_filter(text):
+    """'device_category=mobile,tablet' -> ('device_category', ['mobile', 'tablet'])"""
+    if '=' not in text:
+        raise argparse.ArgumentTypeError(f"Filtro inválido '{text}': se espera columna=valor[,valor...]")
+    column, values = text.split('=', 1)
+    return column, [parse_value(value) for value in values.split(',')]
+
+def parse_ratio(text):
+    """'ctr=clicks/impressions*100' -> ('ctr', ('clicks', 'impressions', 100))"""
+    try:
+        name, expression = text.split('=', 1)
+        expression, _, scale = expression.partition('*')
+        numerator, denominator = expression.split('/')
+        return name, (numerator, denominator, parse_value(scale) if scale else 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ratio inválido '{text}': se espera nombre=numerador/denominador[*escala]")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas sobre el modelo dimensional")
+    parser.add_argument('fact', help="Tabla de hechos (fact_ad_performance, fact_web_analytics)")
+    parser.add_argument('-m', '--measure', action='append', type=parse_measure, default=[],
+                        help="Medida a agregar, como medida[:sum|mean] (repetible)")
+    parser.add_argument('-g', '--group-by', action='append', default=[],
+                        help="Columna del hecho o atributo de dimensión por el que agrupar (repetible)")
+    parser.add_argument('-f', '--filter', action='append', type=parse_filter, default=[],
+                        help="Filtro columna=valor[,valor...] (repetible)")
+    parser.add_argument('-r', '--ratio', action='append', type=parse_ratio, default=[],
+                        help="Ratio nombre=numerador/denominador[*escala] entre medidas (repetible)")
+    parser.add_argument('--order-by', action='append', default=[],
+                        help="Columna de orden; con '-' delante, descendente (repetible)")
+    parser.add_argument('--limit', type=int, help="Máximo de filas del resultado")
+    parser.add_argument('--output', help="Guardar el resultado en este CSV en vez de imprimirlo")
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS), default=STORAGE_FORMAT,
+                        help="Formato de dimensiones y hechos (por defecto: %(default)s)")
+    parser.add_argument('--list-columns', action='store_true',
+                        help="Listar las columnas consultables del hecho y salir")
+    parser.add_argument('--partitions', action='store_true',
+                        help="Listar las particiones del hecho (filas, mínimo y máximo por columna) y salir")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.storage == 'parquet':
+        set_default_storage('parquet', compression=PARQUET_COMPRESSION)
+    else:
+        set_default_storage(args.storage)
+    engine = QueryEngine()
+
+    if args.list_columns:
+        for column, dimension in engine.columns(args.fact).items():
+            print(f"{column:<28}{dimension or args.fact}")
+        return 0
+    if args.partitions:
+        facts_dir = engine.table_dir(args.fact)
+        if not is_partitioned(facts_dir, args.fact):
+            print(f"Error: {args.fact} no está particionada en {facts_dir}")
+            return 1
+        print(partition_stats(facts_dir, args.fact).to_string(index=False))
+        return 0
+    if not args.measure:
+        print("Indicar al menos una medida con -m/--measure (ver --list-columns)")
+        return 2
+
+    try:
+        result = engine.query(args.fact, dict(args.measure), args.group_by, dict(args.filter),
+                              dict(args.ratio), args.order_by, args.limit)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+        return 1
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"{len(result)} filas guardadas en {args.output}")
+    else:
+        print(result.to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
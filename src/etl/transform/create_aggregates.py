@@ -0,0 +1,97 @@
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.utils import *
+from utils.storage import load_table, load_partitioned_table, save_table, table_path
+from load.kpi_engine import ROW_COUNT, compute_kpi_aggregates, fact_columns
+
+logger = setup_logging()
+
+def get_project_root():
+    """Get the project root directory"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+
+# Medidas de cada hecho. Las que son promedios por fila se guardan como suma
+# (columna <medida>_sum) para que, junto con row_count, se puedan re-agregar.
+FACT_MEASURES = {
+    'fact_ad_performance': ['impressions', 'clicks'],
+    'fact_web_analytics': ['users', 'new_users', 'sessions', 'pageviews',
+                           'avg_session_duration_sec', 'bounce_rate'],
+}
+NON_ADDITIVE_MEASURES = ['avg_session_duration_sec', 'bounce_rate']
+
+# Tablas agregadas a los granos que usa el dashboard: (hecho, claves del grano)
+AGGREGATE_TABLES = {
+    'agg_month_site': ('fact_ad_performance', ['date_key', 'site_key']),
+    'agg_month_creative_size': ('fact_ad_performance', ['date_key', 'creative_key', 'size_key']),
+    'agg_month_device_source': ('fact_web_analytics', ['date_key', 'device_key', 'source_key']),
+}
+
+def aggregate_cuts():
+    """Cortes del motor de KPIs para las tablas agregadas y los totales"""
+    cuts = {
+        name: {'fact': fact, 'group_by': keys, 'row_count': True,
+               'measures': {measure: 'sum' for measure in FACT_MEASURES[fact]}}
+        for name, (fact, keys) in AGGREGATE_TABLES.items()
+    }
+    for fact, measures in FACT_MEASURES.items():
+        cuts[f'totals_{fact}'] = {'fact': fact, 'group_by': [], 'row_count': True,
+                                  'measures': {measure: 'sum' for measure in measures}}
+    return cuts
+
+def additive_columns(df):
+    return df.rename(columns={measure: f'{measure}_sum' for measure in NON_ADDITIVE_MEASURES})
+
+def get_aggregates_dir():
+    return os.path.join(get_project_root(), 'data', 'dimensional', 'aggregates')
+
+def aggregate_tables():
+    return list(AGGREGATE_TABLES) + ['agg_totals']
+
+def get_aggregate_paths():
+    return [table_path(get_aggregates_dir(), name) for name in aggregate_tables()]
+
+def save_aggregate(df, table_name):
+    """Guarda una tabla agregada en el modelo dimensional"""
+    save_table(df, get_aggregates_dir(), table_name)
+
+def load_all_aggregates():
+    """Lee las tablas agregadas ya escritas, como las devuelve create_all_aggregates"""
+    return {name: load_table(get_aggregates_dir(), name) for name in aggregate_tables()}
+
+def create_all_aggregates(fact_ad=None, fact_web=None, save=True):
+    """Crea las tablas agregadas mes × sitio, mes × creativo × tamaño,
+    mes × dispositivo × fuente y los totales generales.
+
+    Todas salen de una sola agregación por hecho. Solo guardan medidas
+    aditivas (sumas y row_count), así que se pueden seguir sumando a granos
+    más gruesos. Los hechos se leen de disco si no se pasan en memoria.
+    """
+    logger.info("Creando tablas agregadas...")
+    cuts = aggregate_cuts()
+    facts_dir = os.path.join(get_project_root(), 'data', 'dimensional', 'facts')
+    facts = {'fact_ad_performance': fact_ad, 'fact_web_analytics': fact_web}
+    for name in facts:
+        if facts[name] is None:
+            facts[name] = load_partitioned_table(facts_dir, name, columns=fact_columns(cuts, name))
+    results = compute_kpi_aggregates(facts, cuts)
+
+    aggregates = {}
+    for name in AGGREGATE_TABLES:
+        aggregates[name] = additive_columns(results[name]).sort_values(
+            AGGREGATE_TABLES[name][1]).reset_index(drop=True)
+    ad_totals = results['totals_fact_ad_performance'].rename(columns={ROW_COUNT: 'ad_row_count'})
+    web_totals = additive_columns(results['totals_fact_web_analytics']).rename(
+        columns={ROW_COUNT: 'web_row_count'})
+    aggregates['agg_totals'] = pd.concat([ad_totals, web_totals], axis=1)
+
+    for name, df in aggregates.items():
+        logger.info(f"{name}: {len(df)} filas")
+        if save:
+            save_aggregate(df, name)
+    return aggregates
+
+if __name__ == "__main__":
+    create_all_aggregates()
@@ -1,8 +1,15 @@
 import pandas as pd
 import sys
 import os
+from functools import partial
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.utils import *
+from utils.storage import find_table_storage, load_table, save_table, table_path
+from utils.key_registry import KeyRegistry
+from utils.schema import apply_schema
+from utils.matching import match_names
+from utils.attributes import derive_attributes, get_rules_path
+from utils.pipeline import Pipeline, PipelineContext
 
 logger = setup_logging()
 
@@ -11,16 +18,70 @@ def get_project_root():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def create_date_dimension():
+# Clave subrogada y clave natural de cada dimensión
+DIMENSION_KEYS = {
+    'dim_date': ('date_key', 'date_key'),
+    'dim_campaign': ('campaign_key', 'campaign_name'),
+    'dim_site': ('site_key', 'site_name'),
+    'dim_creative': ('creative_key', 'creative_name'),
+    'dim_placement': ('placement_key', 'placement_name'),
+    'dim_device': ('device_key', 'device_category'),
+    'dim_source': ('source_key', 'source_name'),
+    'dim_ad_content': ('ad_content_key', 'ad_content_name'),
+    'dim_creative_size': ('size_key', 'dimensions'),
+}
+
+# Tablas que produce create_all_dimensions
+DIMENSION_TABLES = list(DIMENSION_KEYS) + ['bridge_creative_adcontent']
+
+def get_key_registry_path():
+    return os.path.join(get_project_root(), 'data', 'dimensional', 'key_registry.json')
+
+def load_key_registry():
+    """Lee el registro de claves subrogadas.
+
+    Las dimensiones ya cargadas que aún no figuran en el registro aportan
+    sus claves actuales, para no renumerarlas al adoptar el registro.
+    """
+    registry = KeyRegistry.load(get_key_registry_path())
+    for name, (key_col, name_col) in DIMENSION_KEYS.items():
+        if key_col != name_col and name not in registry:
+            existing = load_existing_dimension(name)
+            if existing is not None:
+                registry.seed(name, existing[name_col], existing[key_col])
+    return registry
+
+def load_staging(source):
+    """Lee el staging de una fuente ('rfi' o 'ga') desde disco"""
+    staging_dir = os.path.join(get_project_root(), 'data', 'processed', 'staging')
+    return load_table(staging_dir, f'{source}_staging')
+
+def get_dimension_dir(table_name):
+    subdir = 'bridge' if table_name == 'bridge_creative_adcontent' else 'dimensions'
+    return os.path.join(get_project_root(), 'data', 'dimensional', subdir)
+
+def get_dimension_path(table_name):
+    return table_path(get_dimension_dir(table_name), table_name)
+
+def save_dimension(df, table_name, subdir='dimensions'):
+    """Guarda una dimensión (o tabla puente) en el modelo dimensional"""
+    save_table(df, os.path.join(get_project_root(), 'data', 'dimensional', subdir), table_name)
+
+def load_dimension(table_name):
+    """Lee una dimensión (o la tabla puente) ya escrita"""
+    return load_table(get_dimension_dir(table_name), table_name)
+
+def load_all_dimensions():
+    """Lee las nueve dimensiones y la tabla puente, como las devuelve create_all_dimensions"""
+    return {name: load_dimension(name) for name in DIMENSION_TABLES}
+
+def create_date_dimension(rfi_df=None, ga_df=None, save=True):
     """Crea dimensión fecha"""
     logger.info("Creando dim_date...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    
-    rfi_df = pd.read_csv(rfi_file)
-    ga_df = pd.read_csv(ga_file)
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
+    if ga_df is None:
+        ga_df = load_staging('ga')
     
     all_dates = pd.concat([
         pd.to_datetime(rfi_df['date']),
@@ -36,271 +97,286 @@ def create_date_dimension():
     dim_date['year'] = dim_date['date'].dt.year
     dim_date['date'] = dim_date['date'].dt.strftime('%Y-%m-%d')
     dim_date = dim_date.sort_values('date_key')
+    dim_date = apply_schema(dim_date, 'dim_date')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_date, os.path.join(dimensions_dir, 'dim_date.csv'))
+    if save:
+        save_dimension(dim_date, 'dim_date')
     return dim_date
 
-def create_campaign_dimension():
+def create_campaign_dimension(rfi_df=None, ga_df=None, save=True, registry=None):
     logger.info("Creando dim_campaign...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    
-    rfi_df = pd.read_csv(rfi_file)
-    ga_df = pd.read_csv(ga_file)
+    if registry is None:
+        registry = load_key_registry()
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
+    if ga_df is None:
+        ga_df = load_staging('ga')
     
     campaigns = pd.concat([
         rfi_df['campaign'],
         ga_df['campaign']
     ]).unique()
     dim_campaign = pd.DataFrame({
-        'campaign_key': range(1, len(campaigns) + 1),
+        'campaign_key': registry.assign('dim_campaign', campaigns),
         'campaign_name': campaigns
     })
+    dim_campaign = apply_schema(dim_campaign, 'dim_campaign')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_campaign, os.path.join(dimensions_dir, 'dim_campaign.csv'))
+    if save:
+        save_dimension(dim_campaign, 'dim_campaign')
+        registry.save()
     return dim_campaign
 
-def create_site_dimension():
+def create_site_dimension(rfi_df=None, save=True, registry=None):
     logger.info("Creando dim_site...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    rfi_df = pd.read_csv(rfi_file)
+    if registry is None:
+        registry = load_key_registry()
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
     
     sites = sorted(rfi_df['site'].unique())
-    def categorize_site(site):
-        if 'news' in site.lower() or 'akhbar' in site.lower():
-            return 'News'
-        elif 'sport' in site.lower():
-            return 'Sports'
-        elif 'game' in site.lower():
-            return 'Gaming'
-        else:
-            return 'General'
     dim_site = pd.DataFrame({
-        'site_key': range(1, len(sites) + 1),
-        'site_name': sites,
-        'site_category': [categorize_site(s) for s in sites]
+        'site_key': registry.assign('dim_site', sites),
+        'site_name': sites
     })
+    dim_site = derive_attributes(dim_site, 'dim_site')
+    dim_site = apply_schema(dim_site, 'dim_site')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_site, os.path.join(dimensions_dir, 'dim_site.csv'))
+    if save:
+        save_dimension(dim_site, 'dim_site')
+        registry.save()
     return dim_site
 
-def create_creative_dimension():
+def create_creative_dimension(rfi_df=None, save=True, registry=None):
     logger.info("Creando dim_creative...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    rfi_df = pd.read_csv(rfi_file)
+    if registry is None:
+        registry = load_key_registry()
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
     
     creatives = sorted(rfi_df['creative'].unique())
-    def extract_version(creative):
-        if '_v' in creative:
-            parts = creative.split('_v')
-            if len(parts) > 1:
-                return f"v{parts[-1]}"
-        return "v1.0"
     dim_creative = pd.DataFrame({
-        'creative_key': range(1, len(creatives) + 1),
-        'creative_name': creatives,
-        'creative_version': [extract_version(c) for c in creatives]
+        'creative_key': registry.assign('dim_creative', creatives),
+        'creative_name': creatives
     })
+    dim_creative = derive_attributes(dim_creative, 'dim_creative')
+    dim_creative = apply_schema(dim_creative, 'dim_creative')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_creative, os.path.join(dimensions_dir, 'dim_creative.csv'))
+    if save:
+        save_dimension(dim_creative, 'dim_creative')
+        registry.save()
     return dim_creative
 
-def create_placement_dimension():
+def create_placement_dimension(rfi_df=None, save=True, registry=None):
     logger.info("Creando dim_placement...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    rfi_df = pd.read_csv(rfi_file)
+    if registry is None:
+        registry = load_key_registry()
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
     
     placements = sorted(rfi_df['placement'].unique())
-    def get_placement_type(placement):
-        if '_HP_' in placement or 'homepage' in placement.lower():
-            return 'Homepage'
-        elif '_ROS_' in placement:
-            return 'Run of Site'
-        else:
-            return 'Other'
     dim_placement = pd.DataFrame({
-        'placement_key': range(1, len(placements) + 1),
-        'placement_name': placements,
-        'placement_type': [get_placement_type(p) for p in placements]
+        'placement_key': registry.assign('dim_placement', placements),
+        'placement_name': placements
     })
+    dim_placement = derive_attributes(dim_placement, 'dim_placement')
+    dim_placement = apply_schema(dim_placement, 'dim_placement')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_placement, os.path.join(dimensions_dir, 'dim_placement.csv'))
+    if save:
+        save_dimension(dim_placement, 'dim_placement')
+        registry.save()
     return dim_placement
 
-def create_device_dimension():
+def create_device_dimension(ga_df=None, save=True, registry=None):
     logger.info("Creando dim_device...")
-    project_root = get_project_root()
-    
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    ga_df = pd.read_csv(ga_file)
+    if registry is None:
+        registry = load_key_registry()
+    if ga_df is None:
+        ga_df = load_staging('ga')
     
     devices = sorted(ga_df['device'].unique())
     dim_device = pd.DataFrame({
-        'device_key': range(1, len(devices) + 1),
+        'device_key': registry.assign('dim_device', devices),
         'device_category': devices
     })
+    dim_device = apply_schema(dim_device, 'dim_device')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_device, os.path.join(dimensions_dir, 'dim_device.csv'))
+    if save:
+        save_dimension(dim_device, 'dim_device')
+        registry.save()
     return dim_device
 
-def create_source_dimension():
+def create_source_dimension(ga_df=None, save=True, registry=None):
     logger.info("Creando dim_source...")
-    project_root = get_project_root()
-    
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    ga_df = pd.read_csv(ga_file)
+    if registry is None:
+        registry = load_key_registry()
+    if ga_df is None:
+        ga_df = load_staging('ga')
     
     sources = sorted(ga_df['source'].unique())
-    def categorize_source(source):
-        if source in ['google', 'bing', 'yahoo']:
-            return 'Search'
-        elif source in ['facebook', 'twitter', 'linkedin']:
-            return 'Social'
-        elif source == '(direct)':
-            return 'Direct'
-        else:
-            return 'Other'
     dim_source = pd.DataFrame({
-        'source_key': range(1, len(sources) + 1),
-        'source_name': sources,
-        'source_type': [categorize_source(s) for s in sources]
+        'source_key': registry.assign('dim_source', sources),
+        'source_name': sources
     })
+    dim_source = derive_attributes(dim_source, 'dim_source')
+    dim_source = apply_schema(dim_source, 'dim_source')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_source, os.path.join(dimensions_dir, 'dim_source.csv'))
+    if save:
+        save_dimension(dim_source, 'dim_source')
+        registry.save()
     return dim_source
 
-def create_ad_content_dimension():
+def create_ad_content_dimension(ga_df=None, save=True, registry=None):
     logger.info("Creando dim_ad_content...")
-    project_root = get_project_root()
-    
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    ga_df = pd.read_csv(ga_file)
+    if registry is None:
+        registry = load_key_registry()
+    if ga_df is None:
+        ga_df = load_staging('ga')
     
     ad_contents = sorted(ga_df['ad_content'].unique())
-    creative_mapping = {
-        '300x250_AR_FN': '300x250_AR_RFL_FN',
-        '728x90_AR_FN': '728x90_AR_RFL_FN',
-        '160x600_AR_FN': '160x600_AR_RFL_FN'
-    }
     dim_ad_content = pd.DataFrame({
-        'ad_content_key': range(1, len(ad_contents) + 1),
-        'ad_content_name': ad_contents,
-        'creative_mapping': [creative_mapping.get(ac, 'NULL') for ac in ad_contents]
+        'ad_content_key': registry.assign('dim_ad_content', ad_contents),
+        'ad_content_name': ad_contents
     })
+    dim_ad_content = derive_attributes(dim_ad_content, 'dim_ad_content')
+    dim_ad_content = apply_schema(dim_ad_content, 'dim_ad_content')
     
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
-    
-    save_csv(dim_ad_content, os.path.join(dimensions_dir, 'dim_ad_content.csv'))
+    if save:
+        save_dimension(dim_ad_content, 'dim_ad_content')
+        registry.save()
     return dim_ad_content
 
-def create_creative_size_dimension():
+def create_creative_size_dimension(rfi_df=None, save=True, registry=None):
     logger.info("Creando dim_creative_size...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    rfi_df = pd.read_csv(rfi_file)
+    if registry is None:
+        registry = load_key_registry()
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
     
     sizes = sorted(rfi_df['size'].unique())
-    dim_size = []
-    for i, size in enumerate(sizes, 1):
-        if 'x' in str(size):
-            width, height = size.split('x')
-            dim_size.append({
-                'size_key': i,
-                'dimensions': size,
-                'width': int(width),
-                'height': int(height)
-            })
-        else:
-            dim_size.append({
-                'size_key': i,
-                'dimensions': size,
-                'width': 0,
-                'height': 0
-            })
-    dim_creative_size = pd.DataFrame(dim_size)
-    
-    dimensions_dir = os.path.join(project_root, 'data', 'dimensional', 'dimensions')
-    os.makedirs(dimensions_dir, exist_ok=True)
+    dim_creative_size = pd.DataFrame({
+        'size_key': registry.assign('dim_creative_size', sizes),
+        'dimensions': sizes
+    })
+    dim_creative_size = derive_attributes(dim_creative_size, 'dim_creative_size')
+    dim_creative_size = apply_schema(dim_creative_size, 'dim_creative_size')
     
-    save_csv(dim_creative_size, os.path.join(dimensions_dir, 'dim_creative_size.csv'))
+    if save:
+        save_dimension(dim_creative_size, 'dim_creative_size')
+        registry.save()
     return dim_creative_size
 
-def create_bridge_table():
+def create_bridge_table(dim_creative=None, dim_ad_content=None, save=True):
     logger.info("Creando bridge_creative_adcontent...")
-    project_root = get_project_root()
-    
-    creative_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_creative.csv')
-    ad_content_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_ad_content.csv')
-    
-    dim_creative = pd.read_csv(creative_file)
-    dim_ad_content = pd.read_csv(ad_content_file)
-    
-    mappings = [
-        ('160x600_AR_RFL_FN', '160x600_AR_FN', 1.0),
-        ('728x90_AR_RFL_FN', '728x90_AR_FN', 1.0),
-        ('300x250_AR_RFL_FN', '300x250_AR_FN', 1.0)
-    ]
-    bridge_data = []
-    for creative_name, ad_content_name, confidence in mappings:
-        creative_key = dim_creative[dim_creative['creative_name'] == creative_name]['creative_key'].values
-        ad_content_key = dim_ad_content[dim_ad_content['ad_content_name'] == ad_content_name]['ad_content_key'].values
-        if len(creative_key) > 0 and len(ad_content_key) > 0:
-            bridge_data.append({
-                'creative_key': creative_key[0],
-                'ad_content_key': ad_content_key[0],
-                'confidence_score': confidence
-            })
-    bridge_df = pd.DataFrame(bridge_data)
-    
-    bridge_dir = os.path.join(project_root, 'data', 'dimensional', 'bridge')
-    os.makedirs(bridge_dir, exist_ok=True)
-    
-    save_csv(bridge_df, os.path.join(bridge_dir, 'bridge_creative_adcontent.csv'))
+    dimensions_dir = os.path.join(get_project_root(), 'data', 'dimensional', 'dimensions')
+    
+    if dim_creative is None:
+        dim_creative = load_table(dimensions_dir, 'dim_creative')
+    if dim_ad_content is None:
+        dim_ad_content = load_table(dimensions_dir, 'dim_ad_content')
+    
+    # Pares propuestos por el índice invertido de tokens (ver utils/matching.py)
+    matches = match_names(dim_creative['creative_name'], dim_ad_content['ad_content_name'])
+    creative_keys = dict(zip(dim_creative['creative_name'], dim_creative['creative_key']))
+    ad_content_keys = dict(zip(dim_ad_content['ad_content_name'], dim_ad_content['ad_content_key']))
+    bridge_df = pd.DataFrame({
+        'creative_key': matches['left'].map(creative_keys),
+        'ad_content_key': matches['right'].map(ad_content_keys),
+        'confidence_score': matches['confidence_score'],
+    }, columns=['creative_key', 'ad_content_key', 'confidence_score'])
+    logger.info(f"bridge_creative_adcontent: {len(bridge_df)} pares para "
+                f"{matches['left'].nunique()} creativos")
+    bridge_df = apply_schema(bridge_df, 'bridge_creative_adcontent')
+    
+    if save:
+        save_dimension(bridge_df, 'bridge_creative_adcontent', subdir='bridge')
     return bridge_df
 
-def create_all_dimensions():
-    create_date_dimension()
-    create_campaign_dimension()
-    create_site_dimension()
-    create_creative_dimension()
-    create_placement_dimension()
-    create_device_dimension()
-    create_source_dimension()
-    create_ad_content_dimension()
-    create_creative_size_dimension()
-    create_bridge_table()
+def merge_dimension_members(existing, fresh, key_col):
+    """Agrega a la dimensión existente los miembros de fresh que aún no tiene.
+
+    Las claves vienen del registro, así que un miembro tiene la misma clave
+    en ambas tablas.
+    """
+    if existing is None:
+        return fresh
+    if len(fresh) == 0:
+        return existing
+    new_members = fresh[~fresh[key_col].isin(existing[key_col])]
+    logger.info(f"{key_col}: {len(new_members)} miembros nuevos")
+    merged = pd.concat([existing, new_members[list(existing.columns)]], ignore_index=True)
+    return merged.sort_values(key_col).reset_index(drop=True)
+
+def load_existing_dimension(name):
+    """Lee la dimensión ya cargada en disco, o None si no existe"""
+    dimensions_dir = os.path.join(get_project_root(), 'data', 'dimensional', 'dimensions')
+    storage = find_table_storage(dimensions_dir, name)
+    if storage is None:
+        return None
+    return load_table(dimensions_dir, name, storage=storage)
+
+def with_incremental_merge(name, builder):
+    """Envuelve un constructor para agregar sus miembros a la dimensión ya cargada"""
+    def build(*staging, save=True):
+        fresh = builder(*staging, save=False)
+        merged = apply_schema(merge_dimension_members(load_existing_dimension(name), fresh,
+                                                      DIMENSION_KEYS[name][0]), name)
+        if save:
+            save_dimension(merged, name)
+        return merged
+    return build
+
+def create_all_dimensions(rfi_df=None, ga_df=None, save=True, incremental=None, max_workers=4, cache=None):
+    """Crea todas las dimensiones leyendo cada staging una sola vez.
+
+    Devuelve un diccionario {nombre_tabla: DataFrame} con las nueve
+    dimensiones y la tabla puente. Las dimensiones solo dependen del
+    staging y se construyen en paralelo (max_workers hilos); la tabla puente
+    espera a dim_creative y dim_ad_content. Las claves subrogadas salen del
+    registro de claves, compartido por todas las dimensiones. Con
+    incremental, rfi_df/ga_df contienen solo los meses nuevos y sus miembros
+    se agregan a las dimensiones ya cargadas. Con cache (StageCache) las
+    dimensiones cuyo staging no cambió se leen de disco en vez de rehacerse.
+    """
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
+    if ga_df is None:
+        ga_df = load_staging('ga')
+    
+    registry = load_key_registry()
+    builders = [
+        ('dim_date', create_date_dimension, ['rfi_staging', 'ga_staging']),
+        ('dim_campaign', partial(create_campaign_dimension, registry=registry), ['rfi_staging', 'ga_staging']),
+        ('dim_site', partial(create_site_dimension, registry=registry), ['rfi_staging']),
+        ('dim_creative', partial(create_creative_dimension, registry=registry), ['rfi_staging']),
+        ('dim_placement', partial(create_placement_dimension, registry=registry), ['rfi_staging']),
+        ('dim_device', partial(create_device_dimension, registry=registry), ['ga_staging']),
+        ('dim_source', partial(create_source_dimension, registry=registry), ['ga_staging']),
+        ('dim_ad_content', partial(create_ad_content_dimension, registry=registry), ['ga_staging']),
+        ('dim_creative_size', partial(create_creative_size_dimension, registry=registry), ['rfi_staging']),
+    ]
+    context = PipelineContext(save_csv=save)
+    context.put('rfi_staging', rfi_df)
+    context.put('ga_staging', ga_df)
+    pipeline = Pipeline(context, cache=cache)
+    for name, builder, inputs in builders:
+        if incremental is not None:
+            builder = with_incremental_merge(name, builder)
+        # El archivo de reglas de atributos entra en la huella de la etapa
+        pipeline.add_stage(name, builder, inputs=inputs, outputs=[name], sources=[get_rules_path()],
+                           artifacts=[get_dimension_path(name)], load=partial(load_dimension, name))
+    pipeline.add_stage('bridge_creative_adcontent', create_bridge_table,
+                       inputs=['dim_creative', 'dim_ad_content'], outputs=['bridge_creative_adcontent'],
+                       artifacts=[get_dimension_path('bridge_creative_adcontent')],
+                       load=partial(load_dimension, 'bridge_creative_adcontent'))
+    pipeline.run(max_workers=max_workers)
+    if save:
+        registry.save()
+    
+    dimensions = {name: context.get(name) for name, _, _ in builders}
+    dimensions['bridge_creative_adcontent'] = context.get('bridge_creative_adcontent')
     logger.info("Todas las dimensiones creadas exitosamente")
+    return dimensions
 
 if __name__ == "__main__":
-    create_all_dimensions() 
\ No newline at end of file
+    create_all_dimensions()
\ No newline at end of file
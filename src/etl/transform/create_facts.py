@@ -1,8 +1,13 @@
+import numpy as np
 import pandas as pd
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.utils import *
+from utils.storage import (load_table, table_exists, is_partitioned, save_partitioned_table,
+                           load_partitioned_table, partition_manifest_path)
+from utils.incremental import merge_partitions
+from utils.schema import apply_schema
 
 logger = setup_logging()
 
@@ -11,96 +16,165 @@ def get_project_root():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def create_fact_ad_performance():
-    """Crea tabla de hechos de rendimiento de anuncios"""
+# Claves foráneas de cada hecho: (columna del staging, dimensión, clave natural, clave subrogada)
+AD_PERFORMANCE_KEYS = [
+    ('date', 'dim_date', 'date', 'date_key'),
+    ('campaign', 'dim_campaign', 'campaign_name', 'campaign_key'),
+    ('site', 'dim_site', 'site_name', 'site_key'),
+    ('creative', 'dim_creative', 'creative_name', 'creative_key'),
+    ('placement', 'dim_placement', 'placement_name', 'placement_key'),
+    ('size', 'dim_creative_size', 'dimensions', 'size_key'),
+]
+WEB_ANALYTICS_KEYS = [
+    ('date', 'dim_date', 'date', 'date_key'),
+    ('campaign', 'dim_campaign', 'campaign_name', 'campaign_key'),
+    ('source', 'dim_source', 'source_name', 'source_key'),
+    ('device', 'dim_device', 'device_category', 'device_key'),
+    ('ad_content', 'dim_ad_content', 'ad_content_name', 'ad_content_key'),
+]
+
+def load_staging(source):
+    """Lee el staging de una fuente ('rfi' o 'ga') desde disco"""
+    staging_dir = os.path.join(get_project_root(), 'data', 'processed', 'staging')
+    return load_table(staging_dir, f'{source}_staging')
+
+def load_dimensions(names):
+    """Lee desde disco las dimensiones indicadas"""
+    dimensions_dir = os.path.join(get_project_root(), 'data', 'dimensional', 'dimensions')
+    return {name: load_table(dimensions_dir, name) for name in names}
+
+def resolve_keys(staging, dimensions, key_specs, table_name):
+    """Resuelve las claves subrogadas de una tabla de hechos sin merges.
+
+    Cada columna del staging se factoriza y solo sus valores distintos se
+    buscan en el índice hash de la dimensión; el resultado se expande a las
+    filas con arrays enteros. Devuelve (DataFrame de claves, {clave: valores
+    naturales sin miembro en la dimensión}). Las filas sin miembro quedan
+    con clave nula, como en un left join.
+    """
+    keys = {}
+    unmatched = {}
+    for column, dim_name, natural_col, key_col in key_specs:
+        dim = dimensions[dim_name]
+        index = pd.Index(dim[natural_col])
+        if not index.is_unique:
+            raise ValueError(f"{dim_name}: la clave natural '{natural_col}' tiene valores duplicados")
+        codes, uniques = pd.factorize(staging[column], use_na_sentinel=False)
+        lookup = index.get_indexer(uniques)
+        positions = lookup[codes]
+        found = positions >= 0
+        dim_keys = dim[key_col].to_numpy()
+        if found.all():
+            keys[key_col] = dim_keys[positions]
+            continue
+        values = np.zeros(len(positions), dtype='int64')
+        values[found] = dim_keys[positions[found]]
+        keys[key_col] = pd.arrays.IntegerArray(values, ~found)
+        missing = list(uniques[lookup < 0])
+        unmatched[key_col] = missing
+        logger.warning(f"{table_name}: {int((~found).sum())} filas sin {key_col} "
+                       f"({len(missing)} valores de '{column}' sin miembro: {missing[:5]})")
+    return pd.DataFrame(keys, index=staging.index), unmatched
+
+def build_fact(staging, dimensions, key_specs, measures, table_name):
+    """Arma la tabla de hechos: claves resueltas más medidas numéricas (nulos a 0), con sus tipos declarados"""
+    fact, _ = resolve_keys(staging, dimensions, key_specs, table_name)
+    for col in measures:
+        fact[col] = pd.to_numeric(staging[col], errors='coerce').fillna(0)
+    return apply_schema(fact.reset_index(drop=True), table_name)
+
+def merge_fact_delta(fact_delta, table_name, date_keys, save=True):
+    """Reemplaza en la tabla de hechos en disco los meses date_keys por fact_delta.
+
+    Esos meses se reemplazan enteros, así que sus filas anteriores no se
+    leen: solo se leen los demás meses (las agregaciones y los KPIs usan
+    la tabla completa que se devuelve) y solo se reescriben las
+    particiones de date_keys. Un hecho guardado sin particionar (por una
+    versión anterior del ETL) se reescribe entero, ya particionado.
+    """
+    facts_dir = get_facts_dir()
+    partitioned = is_partitioned(facts_dir, table_name)
+    kept = None
+    if partitioned or table_exists(facts_dir, table_name):
+        kept = load_partitioned_table(facts_dir, table_name, exclude=date_keys)
+    merged = apply_schema(merge_partitions(kept, fact_delta, 'date_key', date_keys), table_name)
+    if save:
+        if partitioned:
+            save_fact(fact_delta, table_name, date_keys=date_keys)
+        else:
+            save_fact(merged, table_name)
+    logger.info(f"{table_name}: {len(fact_delta)} filas nuevas en {len(date_keys)} meses, {len(merged)} filas en total")
+    return merged
+
+def get_facts_dir():
+    return os.path.join(get_project_root(), 'data', 'dimensional', 'facts')
+
+def get_fact_path(table_name):
+    """Manifiesto de particiones del hecho (cambia con cada escritura)"""
+    return partition_manifest_path(get_facts_dir(), table_name)
+
+def save_fact(df, table_name, date_keys=None):
+    """Guarda una tabla de hechos particionada por mes (date_key).
+
+    Con date_keys solo se reescriben las particiones de esos meses.
+    """
+    save_partitioned_table(df, get_facts_dir(), table_name, partition_column='date_key', partitions=date_keys)
+
+def load_fact(table_name, columns=None, start=None, end=None):
+    """Lee una tabla de hechos ya escrita; start/end (date_key) limitan los meses leídos"""
+    return load_partitioned_table(get_facts_dir(), table_name, columns=columns, start=start, end=end)
+
+def create_fact_ad_performance(rfi_df=None, dimensions=None, save=True, incremental=None):
+    """Crea tabla de hechos de rendimiento de anuncios.
+
+    rfi_df y dimensions (dict {nombre: DataFrame}) se leen de disco si no
+    se pasan en memoria. Con incremental, rfi_df trae solo los meses
+    cambiados y sus filas reemplazan esos meses en la tabla existente; en
+    disco solo se reescriben las particiones de esos meses.
+    """
     logger.info("Creando fact_ad_performance...")
-    project_root = get_project_root()
-    
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    date_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_date.csv')
-    campaign_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_campaign.csv')
-    site_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_site.csv')
-    creative_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_creative.csv')
-    placement_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_placement.csv')
-    size_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_creative_size.csv')
-    
-    rfi_df = pd.read_csv(rfi_file)
-    dim_date = pd.read_csv(date_file)
-    dim_campaign = pd.read_csv(campaign_file)
-    dim_site = pd.read_csv(site_file)
-    dim_creative = pd.read_csv(creative_file)
-    dim_placement = pd.read_csv(placement_file)
-    dim_size = pd.read_csv(size_file)
+    if rfi_df is None:
+        rfi_df = load_staging('rfi')
+    if dimensions is None:
+        dimensions = load_dimensions([spec[1] for spec in AD_PERFORMANCE_KEYS])
     
-    fact = rfi_df.copy()
-    fact = fact.merge(dim_date[['date', 'date_key']], on='date', how='left')
-    fact = fact.merge(dim_campaign[['campaign_name', 'campaign_key']], 
-                      left_on='campaign', right_on='campaign_name', how='left')
-    fact = fact.merge(dim_site[['site_name', 'site_key']], 
-                      left_on='site', right_on='site_name', how='left')
-    fact = fact.merge(dim_creative[['creative_name', 'creative_key']], 
-                      left_on='creative', right_on='creative_name', how='left')
-    fact = fact.merge(dim_placement[['placement_name', 'placement_key']], 
-                      left_on='placement', right_on='placement_name', how='left')
-    fact = fact.merge(dim_size[['dimensions', 'size_key']], 
-                      left_on='size', right_on='dimensions', how='left')
-    fact_final = fact[['date_key', 'campaign_key', 'site_key', 'creative_key', 
-                       'placement_key', 'size_key', 'impressions', 'clicks']]
-    numeric_cols = ['impressions', 'clicks']
-    for col in numeric_cols:
-        fact_final[col] = pd.to_numeric(fact_final[col], errors='coerce').fillna(0)
+    fact_final = build_fact(rfi_df, dimensions, AD_PERFORMANCE_KEYS,
+                            ['impressions', 'clicks'], 'fact_ad_performance')
     
-    facts_dir = os.path.join(project_root, 'data', 'dimensional', 'facts')
-    os.makedirs(facts_dir, exist_ok=True)
-    
-    save_csv(fact_final, os.path.join(facts_dir, 'fact_ad_performance.csv'))
+    if incremental is not None:
+        fact_final = merge_fact_delta(fact_final, 'fact_ad_performance', incremental.changed_date_keys('rfi'),
+                                      save=save)
+    elif save:
+        save_fact(fact_final, 'fact_ad_performance')
     logger.info(f"fact_ad_performance creada: {len(fact_final)} filas")
     return fact_final
 
-def create_fact_web_analytics():
-    """Crea tabla de hechos de analítica web"""
+def create_fact_web_analytics(ga_df=None, dimensions=None, save=True, incremental=None):
+    """Crea tabla de hechos de analítica web.
+
+    ga_df y dimensions (dict {nombre: DataFrame}) se leen de disco si no
+    se pasan en memoria. Con incremental, ga_df trae solo los meses
+    cambiados y sus filas reemplazan esos meses en la tabla existente; en
+    disco solo se reescriben las particiones de esos meses.
+    """
     logger.info("Creando fact_web_analytics...")
-    project_root = get_project_root()
-    
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    date_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_date.csv')
-    campaign_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_campaign.csv')
-    source_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_source.csv')
-    device_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_device.csv')
-    ad_content_file = os.path.join(project_root, 'data', 'dimensional', 'dimensions', 'dim_ad_content.csv')
-    
-    ga_df = pd.read_csv(ga_file)
-    dim_date = pd.read_csv(date_file)
-    dim_campaign = pd.read_csv(campaign_file)
-    dim_source = pd.read_csv(source_file)
-    dim_device = pd.read_csv(device_file)
-    dim_ad_content = pd.read_csv(ad_content_file)
-    
-    fact = ga_df.copy()
-    fact = fact.merge(dim_date[['date', 'date_key']], on='date', how='left')
-    fact = fact.merge(dim_campaign[['campaign_name', 'campaign_key']], 
-                      left_on='campaign', right_on='campaign_name', how='left')
-    fact = fact.merge(dim_source[['source_name', 'source_key']], 
-                      left_on='source', right_on='source_name', how='left')
-    fact = fact.merge(dim_device[['device_category', 'device_key']], 
-                      left_on='device', right_on='device_category', how='left')
-    fact = fact.merge(dim_ad_content[['ad_content_name', 'ad_content_key']], 
-                      left_on='ad_content', right_on='ad_content_name', how='left')
-    fact_final = fact[['date_key', 'campaign_key', 'source_key', 'device_key', 
-                       'ad_content_key', 'users', 'new_users', 'sessions', 
-                       'pageviews', 'avg_session_duration_sec', 'bounce_rate']]
-    numeric_cols = ['users', 'new_users', 'sessions', 'pageviews', 
-                    'avg_session_duration_sec', 'bounce_rate']
-    for col in numeric_cols:
-        fact_final[col] = pd.to_numeric(fact_final[col], errors='coerce').fillna(0)
+    if ga_df is None:
+        ga_df = load_staging('ga')
+    if dimensions is None:
+        dimensions = load_dimensions([spec[1] for spec in WEB_ANALYTICS_KEYS])
     
-    facts_dir = os.path.join(project_root, 'data', 'dimensional', 'facts')
-    os.makedirs(facts_dir, exist_ok=True)
+    fact_final = build_fact(ga_df, dimensions, WEB_ANALYTICS_KEYS,
+                            ['users', 'new_users', 'sessions', 'pageviews',
+                             'avg_session_duration_sec', 'bounce_rate'], 'fact_web_analytics')
     
-    save_csv(fact_final, os.path.join(facts_dir, 'fact_web_analytics.csv'))
+    if incremental is not None:
+        fact_final = merge_fact_delta(fact_final, 'fact_web_analytics', incremental.changed_date_keys('ga'),
+                                      save=save)
+    elif save:
+        save_fact(fact_final, 'fact_web_analytics')
     logger.info(f"fact_web_analytics creada: {len(fact_final)} filas")
     return fact_final
 
 if __name__ == "__main__":
     create_fact_ad_performance()
-    create_fact_web_analytics() 
\ No newline at end of file
+    create_fact_web_analytics() 
\ No newline at end of file
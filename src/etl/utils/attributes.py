@@ -0,0 +1,119 @@
+"""
+Atributos derivados de las dimensiones a partir de reglas en un archivo.
+
+Las reglas viven en src/config/attribute_rules.json: por cada dimensión y
+atributo, la columna de origen, una lista de reglas y el valor por
+defecto. Cada regla se aplica a la columna entera con operaciones del
+accessor ``str`` (una expresión regular compilada por regla) en vez de
+recorrer los miembros uno por uno. Como en una cadena de if/elif, cada
+miembro toma la etiqueta de la primera regla que cumple.
+
+Tipos de regla:
+
+- ``contains``: alguno de ``values`` aparece en el nombre (``case``
+  indica si distingue mayúsculas, por defecto sí).
+- ``regex``: el nombre cumple ``pattern``; ``label`` puede citar los
+  grupos capturados como ``{1}``, ``{2}``...
+- ``lookup``: el nombre exacto está en la tabla ``values`` {nombre: etiqueta}.
+
+Con ``"dtype": "int"`` el atributo se convierte a entero.
+"""
+import json
+import os
+import re
+
+import pandas as pd
+
+RULE_TYPES = ('contains', 'regex', 'lookup')
+GROUP_REFERENCE = re.compile(r'\{(\d+)\}')
+
+
+def get_rules_path():
+    """Archivo de reglas por defecto (src/config/attribute_rules.json)"""
+    src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(src_dir, 'config', 'attribute_rules.json')
+
+
+def load_rules(path=None):
+    """{dimensión: {atributo: especificación}} leído del archivo de reglas"""
+    path = path or get_rules_path()
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    for dimension, attributes in rules.items():
+        for attribute, spec in attributes.items():
+            for rule in spec.get('rules', []):
+                if rule.get('type') not in RULE_TYPES:
+                    raise ValueError(
+                        f"Regla desconocida en {dimension}.{attribute}: '{rule.get('type')}'. "
+                        f"Opciones: {list(RULE_TYPES)}"
+                    )
+    return rules
+
+
+def compile_rule(rule):
+    """Expresión regular compilada de una regla contains o regex"""
+    if rule['type'] == 'contains':
+        flags = 0 if rule.get('case', True) else re.IGNORECASE
+        return re.compile('|'.join(re.escape(value) for value in rule['values']), flags)
+    return re.compile(rule['pattern'], re.DOTALL)
+
+
+def format_label(label, groups):
+    """Etiqueta por fila con {n} reemplazado por el grupo n capturado"""
+    parts = GROUP_REFERENCE.split(label)
+    result = pd.Series(parts[0], index=groups.index, dtype=object)
+    for i in range(1, len(parts), 2):
+        result = result + groups[int(parts[i]) - 1].fillna('') + parts[i + 1]
+    return result
+
+
+def apply_rule(rule, names):
+    """(máscara, etiquetas) de los nombres que cumplen la regla"""
+    if rule['type'] == 'lookup':
+        labels = names.map(rule['values'])
+        return labels.notna(), labels
+    pattern = compile_rule(rule)
+    if pattern.groups:
+        # contains avisa cuando el patrón tiene grupos; count da la misma máscara
+        matched = names.str.count(pattern) > 0
+    else:
+        matched = names.str.contains(pattern, na=False)
+    label = rule['label']
+    if rule['type'] == 'regex' and pattern.groups and GROUP_REFERENCE.search(label):
+        groups = names.str.extract(pattern, expand=True)
+        groups.columns = range(groups.shape[1])
+        return matched, format_label(label, groups)
+    return matched, label
+
+
+def derive_attribute(names, spec):
+    """Valores del atributo para la serie names según su especificación"""
+    names = pd.Series(names, dtype=object).reset_index(drop=True)
+    names = names.where(names.notna(), '').astype(str)
+    result = pd.Series(None, index=names.index, dtype=object)
+    pending = pd.Series(True, index=names.index)
+    for rule in spec.get('rules', []):
+        if not pending.any():
+            break
+        matched, labels = apply_rule(rule, names)
+        matched = matched & pending
+        if isinstance(labels, pd.Series):
+            result[matched] = labels[matched]
+        else:
+            result[matched] = labels
+        pending &= ~matched
+    result[pending] = spec.get('default')
+    if spec.get('dtype') == 'int':
+        return pd.to_numeric(result).astype('int64')
+    return result
+
+
+def derive_attributes(df, dimension, rules=None):
+    """Agrega a df los atributos configurados para la dimensión"""
+    rules = load_rules() if rules is None else rules
+    attributes = rules.get(dimension, {})
+    if not attributes:
+        return df
+    derived = {attribute: derive_attribute(df[spec['source']], spec).values
+               for attribute, spec in attributes.items()}
+    return df.assign(**derived)
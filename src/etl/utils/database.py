@@ -0,0 +1,153 @@
+"""
+Base de datos embebida como destino de carga del modelo dimensional.
+
+Dimensiones, tabla puente y hechos se escriben en un solo archivo con tipos
+por columna, clave primaria en cada dimensión e índices en las claves
+foráneas de los hechos. SQLite viene con Python; DuckDB (columnar, mejor
+para agregar hechos grandes) requiere ``duckdb``
+(``pip install -e ".[duckdb]"``). Las consultas devuelven DataFrames.
+"""
+import logging
+import os
+import sqlite3
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Filas por lote de INSERT en SQLite
+INSERT_BATCH_ROWS = 50000
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def sql_type(dtype):
+    """Tipo SQL de una columna de pandas (válido en SQLite y DuckDB)"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'BOOLEAN'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'BIGINT'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'DOUBLE'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    return 'VARCHAR'
+
+
+def create_table_sql(df, name, primary_key=None):
+    columns = [f"{quote(column)} {sql_type(dtype)}" for column, dtype in df.dtypes.items()]
+    if primary_key:
+        columns.append(f"PRIMARY KEY ({quote(primary_key)})")
+    return f"CREATE TABLE {quote(name)} ({', '.join(columns)})"
+
+
+class SqliteDatabase:
+    """Modelo dimensional en un archivo SQLite"""
+
+    name = 'sqlite'
+    extension = '.sqlite'
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        return sqlite3.connect(self.path)
+
+    def insert(self, connection, df, name):
+        placeholders = ', '.join('?' * len(df.columns))
+        sql = f"INSERT INTO {quote(name)} VALUES ({placeholders})"
+        for datetime_column in df.select_dtypes(include=['datetime', 'datetimetz']).columns:
+            df = df.assign(**{datetime_column: df[datetime_column].astype(str)})
+        for start in range(0, len(df), INSERT_BATCH_ROWS):
+            batch = df.iloc[start:start + INSERT_BATCH_ROWS]
+            # object para que numpy entregue int/float de Python; pd.NA y NaN pasan a NULL
+            rows = batch.astype(object).where(batch.notna(), None).to_numpy().tolist()
+            connection.executemany(sql, rows)
+
+    def query(self, sql):
+        with self.connect() as connection:
+            return pd.read_sql_query(sql, connection)
+
+
+class DuckDbDatabase:
+    """Modelo dimensional en un archivo DuckDB"""
+
+    name = 'duckdb'
+    extension = '.duckdb'
+
+    def __init__(self, path):
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "El destino duckdb requiere duckdb: pip install -e \".[duckdb]\""
+            )
+        self.path = path
+
+    def connect(self):
+        import duckdb
+
+        return duckdb.connect(self.path)
+
+    def insert(self, connection, df, name):
+        # DuckDB lee el DataFrame directamente, sin pasar fila por fila
+        connection.register('_load_frame', df)
+        try:
+            connection.execute(f"INSERT INTO {quote(name)} SELECT * FROM _load_frame")
+        finally:
+            connection.unregister('_load_frame')
+
+    def query(self, sql):
+        connection = self.connect()
+        try:
+            return connection.execute(sql).df()
+        finally:
+            connection.close()
+
+
+DATABASE_BACKENDS = {
+    'sqlite': SqliteDatabase,
+    'duckdb': DuckDbDatabase,
+}
+
+
+def get_database(name, path):
+    """Backend name sobre path (sin extensión: se agrega la del backend)"""
+    if name not in DATABASE_BACKENDS:
+        raise ValueError(
+            f"Base de datos desconocida: '{name}'. Opciones: {sorted(DATABASE_BACKENDS)}"
+        )
+    backend = DATABASE_BACKENDS[name]
+    if not os.path.splitext(path)[1]:
+        path = path + backend.extension
+    return backend(path)
+
+
+def write_tables(database, tables):
+    """Reemplaza las tablas en la base de datos en una sola transacción.
+
+    tables es una lista de (nombre, DataFrame, clave primaria o None,
+    columnas a indexar). Los índices se crean después de insertar los
+    datos, que es más rápido que mantenerlos fila por fila.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(database.path)), exist_ok=True)
+    connection = database.connect()
+    try:
+        connection.execute("BEGIN")
+        for name, df, primary_key, indexes in tables:
+            connection.execute(f"DROP TABLE IF EXISTS {quote(name)}")
+            connection.execute(create_table_sql(df, name, primary_key))
+            database.insert(connection, df, name)
+            for column in indexes:
+                connection.execute(f"CREATE INDEX {quote(f'idx_{name}_{column}')} "
+                                   f"ON {quote(name)} ({quote(column)})")
+            logger.info(f"{database.name}: {name} ({len(df)} filas)")
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+    return database.path
@@ -0,0 +1,94 @@
+"""
+Carga incremental por mes para los pipelines RFI y GA.
+
+Ambas fuentes son mensuales. En cada ejecución incremental se calcula una
+huella por mes de las filas crudas y se compara con la de la última carga:
+solo los meses nuevos o modificados se limpian y se propagan a staging,
+dimensiones y hechos, y los meses que ya no están en el export se borran
+de staging y hechos. El estado se guarda en JSON y solo se actualiza
+cuando el ETL termina correctamente (``commit``).
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def partition_fingerprints(df, partitions):
+    """Huella por partición: suma (módulo 2^64) de los hashes de sus filas.
+
+    No depende del orden de las filas dentro del archivo.
+    """
+    if len(df) == 0:
+        return {}
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    sums = row_hashes.groupby(pd.Series(partitions).values).sum()
+    return {str(partition): format(int(value), '016x') for partition, value in sums.items()}
+
+
+def merge_partitions(existing, delta, column, partitions):
+    """Reemplaza en existing las filas de las particiones indicadas por las de delta"""
+    if existing is None:
+        return delta.reset_index(drop=True)
+    kept = existing[~existing[column].isin(list(partitions))]
+    return pd.concat([kept, delta], ignore_index=True)
+
+
+class IncrementalState:
+    """Huellas por mes de la última carga y meses cambiados en la ejecución actual"""
+
+    def __init__(self, path, partitions=None):
+        self.path = path
+        self.partitions = partitions or {}
+        self.changed = {}
+        self._pending = {}
+
+    @classmethod
+    def load(cls, path):
+        partitions = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                partitions = json.load(f).get('partitions', {})
+        return cls(path, partitions)
+
+    def detect_changes(self, source, df, partitions):
+        """Devuelve las particiones (fechas YYYY-MM-01) nuevas, modificadas o quitadas de una fuente.
+
+        Un mes cargado antes que ya no está en el export también cuenta como
+        cambiado: su delta queda vacío y merge_partitions borra sus filas.
+        """
+        fingerprints = partition_fingerprints(df, partitions)
+        previous = self.partitions.get(source, {})
+        modified = sorted(p for p, fingerprint in fingerprints.items() if previous.get(p) != fingerprint)
+        removed = sorted(set(previous) - set(fingerprints))
+        changed = sorted(modified + removed)
+        self.changed[source] = changed
+        self._pending[source] = fingerprints
+        logger.info(f"{source}: {len(modified)} de {len(fingerprints)} meses nuevos o modificados {modified}"
+                    + (f", {len(removed)} quitados del export {removed}" if removed else ""))
+        return changed
+
+    def changed_dates(self, source):
+        return self.changed.get(source, [])
+
+    def changed_date_keys(self, source):
+        """Meses cambiados como date_key (YYYYMMDD)"""
+        return [int(date.replace('-', '')) for date in self.changed_dates(source)]
+
+    def commit(self):
+        """Registra como cargadas las huellas de esta ejecución"""
+        # Reemplaza las huellas de la fuente: los meses quitados dejan de figurar
+        for source, fingerprints in self._pending.items():
+            self.partitions[source] = fingerprints
+        self._pending = {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'partitions': self.partitions,
+            }, f, indent=2, sort_keys=True)
+        logger.info(f"Estado incremental guardado en {self.path}")
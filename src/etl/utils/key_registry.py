@@ -0,0 +1,76 @@
+"""
+Registro persistente de claves subrogadas de las dimensiones.
+
+Cada dimensión guarda el mapeo clave natural -> clave subrogada. El registro
+solo crece: un miembro conserva su clave en todas las ejecuciones y los
+miembros nuevos reciben claves a partir de la máxima asignada, así que
+refrescar una dimensión no renumera las existentes ni obliga a reescribir
+los hechos ya cargados (ni invalida los modelos de Power BI).
+"""
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRegistry:
+    """Mapeo {dimensión: {clave natural: clave subrogada}}, de solo agregado"""
+
+    def __init__(self, path, keys=None):
+        self.path = path
+        self.keys = keys or {}
+        self._dirty = False
+        # Las dimensiones pueden construirse en paralelo y compartir el registro
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        keys = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                keys = json.load(f)
+        return cls(path, keys)
+
+    def __contains__(self, dimension):
+        return dimension in self.keys
+
+    def seed(self, dimension, natural_keys, surrogate_keys):
+        """Registra las claves de una dimensión ya cargada (sin registro previo)"""
+        with self._lock:
+            mapping = self.keys.setdefault(dimension, {})
+            for natural, surrogate in zip(pd.Series(natural_keys).astype(str), surrogate_keys):
+                mapping.setdefault(natural, int(surrogate))
+            self._dirty = True
+        logger.info(f"{dimension}: {len(mapping)} claves tomadas de la dimensión existente")
+
+    def assign(self, dimension, members):
+        """Devuelve la clave subrogada de cada miembro, registrando los nuevos.
+
+        Los miembros nuevos se numeran en el orden en que aparecen, a partir
+        de la clave máxima registrada para la dimensión.
+        """
+        members = pd.Series(members, dtype=object).astype(str)
+        with self._lock:
+            mapping = self.keys.setdefault(dimension, {})
+            new_members = [m for m in members.unique() if m not in mapping]
+            if new_members:
+                start = max(mapping.values(), default=0) + 1
+                mapping.update(zip(new_members, range(start, start + len(new_members))))
+                self._dirty = True
+                logger.info(f"{dimension}: {len(new_members)} claves nuevas desde {start}")
+            return members.map(mapping).astype(int).values
+
+    def save(self):
+        """Escribe el registro si hubo claves nuevas"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.keys, f, indent=2, sort_keys=True)
+            self._dirty = False
+        logger.info(f"Registro de claves guardado en {self.path}")
@@ -0,0 +1,87 @@
+"""
+Emparejamiento de nombres de creativos (RFI) con ad_content (GA).
+
+Los nombres se parten en tokens: primero por separadores (``_``, ``.``,
+espacios...) y después por cambios de minúscula a mayúscula y de letras a
+dígitos, así ``SD_1623_v3_50`` y ``AudienceSDOnly.NU1623Unbranded50.160``
+comparten ``sd``, ``1623`` y ``50``. Los tokens de los ad_content forman un
+índice invertido (una fila por token y nombre); cruzarlo con los tokens de
+los creativos da solo los pares que comparten algún token, sin recorrer
+todos los pares.
+
+Cada token pesa según su rareza entre los ad_content (IDF): un tamaño como
+``728`` aparece en muchos y aporta poco, un código como ``1624`` identifica
+al creativo. La confianza de un par es la fracción del peso de los tokens
+del creativo que aparece en el ad_content, entre 0 y 1.
+"""
+import math
+import re
+
+import pandas as pd
+
+# Confianza mínima para proponer un par
+MIN_CONFIDENCE = 0.5
+
+# Valores sin creativo real en los exports
+PLACEHOLDER_NAMES = {'(not set)', 'not set', '', 'NULL'}
+
+SEPARATOR_PATTERN = re.compile(r'[^0-9A-Za-z]+')
+WORD_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+def tokenize(name):
+    """Tokens en minúscula del nombre (sin repetir; se descartan los de una letra o dígito)"""
+    tokens = []
+    for part in SEPARATOR_PATTERN.split(str(name)):
+        for word in WORD_PATTERN.findall(part):
+            word = word.lower()
+            if len(word) > 1 and word not in tokens:
+                tokens.append(word)
+    return tokens
+
+
+def token_frame(names):
+    """Una fila (name, token) por token de cada nombre distinto"""
+    names = pd.Series(pd.unique(pd.Series(names, dtype=object).dropna()), dtype=object)
+    names = names[~names.isin(PLACEHOLDER_NAMES)]
+    tokens = pd.DataFrame({'name': names, 'token': names.map(tokenize)}).explode('token')
+    return tokens.dropna(subset=['token']).reset_index(drop=True)
+
+
+def build_index(names):
+    """Índice invertido token -> nombres, con el peso IDF de cada token"""
+    index = token_frame(names)
+    n_names = index['name'].nunique()
+    document_frequency = index.groupby('token')['name'].transform('size')
+    # IDF suavizado: un token presente en todos los nombres sigue pesando algo
+    index['weight'] = (((1 + n_names) / (1 + document_frequency)).map(math.log) + 1).astype('float64')
+    return index
+
+
+def match_names(left, right, min_confidence=MIN_CONFIDENCE):
+    """Pares (left, right, confidence_score) con confianza >= min_confidence.
+
+    left son los nombres a emparejar (creativos) y right los candidatos
+    (ad_content). Un token de left que no aparece en right pesa lo mismo
+    que el token más raro del índice. Devuelve los pares ordenados por
+    left y por confianza descendente.
+    """
+    columns = ['left', 'right', 'confidence_score']
+    index = build_index(right)
+    queries = token_frame(left)
+    if len(index) == 0 or len(queries) == 0:
+        return pd.DataFrame(columns=columns)
+
+    weights = index.drop_duplicates('token').set_index('token')['weight']
+    queries['weight'] = queries['token'].map(weights).fillna(weights.max())
+    query_weight = queries.groupby('name')['weight'].sum()
+
+    candidates = queries[['name', 'token', 'weight']].merge(
+        index[['name', 'token']].rename(columns={'name': 'right'}), on='token')
+    if len(candidates) == 0:
+        return pd.DataFrame(columns=columns)
+    scores = candidates.groupby(['name', 'right'], sort=False)['weight'].sum().reset_index()
+    scores['confidence_score'] = (scores['weight'] / scores['name'].map(query_weight)).round(4)
+    scores = scores[scores['confidence_score'] >= min_confidence].rename(columns={'name': 'left'})
+    scores = scores.sort_values(['left', 'confidence_score', 'right'], ascending=[True, False, True])
+    return scores[columns].reset_index(drop=True)
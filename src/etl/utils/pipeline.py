@@ -0,0 +1,257 @@
+"""
+Pipeline en memoria para el ETL de Marketing Analytics.
+
+Cada etapa declara las tablas que consume y las que produce. El contexto
+mantiene los DataFrames entre etapas, de modo que los pasos ya no se
+comunican escribiendo y releyendo CSV; la escritura a disco queda como un
+sink opcional controlado por ``save_csv``. Las etapas que no dependen
+entre sí pueden ejecutarse en paralelo en un pool de hilos.
+
+Con un caché de etapas (utils/stage_cache.py) las etapas cuyas entradas,
+fuentes y código no cambiaron desde la última ejecución no se ejecutan:
+sus salidas quedan en el contexto como ``Deferred`` y se leen de disco (o
+se recalculan) solo si otra etapa las pide.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .profiling import profile_stage
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineContext:
+    """Mantiene en memoria las tablas producidas por cada etapa"""
+
+    def __init__(self, save_csv=True):
+        self.save_csv = save_csv
+        self.tables = {}
+
+    def put(self, name, value):
+        self.tables[name] = value
+
+    def get(self, name):
+        if name not in self.tables:
+            raise KeyError(f"Tabla '{name}' no disponible en el contexto del pipeline")
+        value = self.tables[name]
+        if isinstance(value, Deferred):
+            value = value.resolve()
+            self.tables[name] = value
+        return value
+
+    def __contains__(self, name):
+        return name in self.tables
+
+
+class Deferred:
+    """Valor de una etapa saltada por el caché; se obtiene con load() al pedirlo"""
+
+    def __init__(self, load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value = None
+
+    def resolve(self):
+        with self._lock:
+            if not self._loaded:
+                self._value = self._load()
+                self._loaded = True
+            return self._value
+
+
+class Stage:
+    """Etapa del pipeline: función + tablas de entrada y salida.
+
+    Las etapas con ``sink=True`` reciben ``save`` para decidir si escriben
+    sus tablas a disco. ``step`` es la etiqueta del paso del ETL al que
+    pertenece la etapa y solo se usa para el log.
+
+    Para el caché de etapas: ``sources`` son los archivos externos que la
+    etapa lee, ``artifacts`` los que escribe (deben seguir en disco para
+    saltarla) y ``load`` devuelve su resultado desde disco. Sin ``load``, si
+    una etapa saltada hace falta se vuelve a ejecutar.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), sink=True, step=None, sources=(), artifacts=(),
+                 load=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.sink = sink
+        self.step = step
+        self.sources = tuple(sources)
+        self.artifacts = tuple(artifacts)
+        self.load = load
+
+
+class Pipeline:
+    """DAG de etapas que se ejecutan en orden de dependencias"""
+
+    def __init__(self, context=None, cache=None):
+        self.context = context if context is not None else PipelineContext()
+        self.cache = cache
+        self.stages = []
+        self.fingerprints = {}
+        self._current_step = None
+
+    def add_stage(self, name, func, inputs=(), outputs=(), sink=True, step=None, sources=(), artifacts=(),
+                  load=None):
+        if any(stage.name == name for stage in self.stages):
+            raise ValueError(f"Etapa duplicada: {name}")
+        self.stages.append(Stage(name, func, inputs, outputs, sink, step, sources, artifacts, load))
+        return self
+
+    def execution_order(self):
+        """Orden topológico de las etapas según sus tablas de entrada"""
+        producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                producers[output] = stage
+
+        ordered = []
+        done = set()
+        visiting = set()
+
+        def visit(stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Dependencia circular en la etapa {stage.name}")
+            visiting.add(stage.name)
+            for table in stage.inputs:
+                if table in producers:
+                    visit(producers[table])
+                elif table not in self.context:
+                    raise ValueError(
+                        f"La etapa {stage.name} requiere '{table}' y ninguna etapa la produce"
+                    )
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in self.stages:
+            visit(stage)
+        return ordered
+
+    def run_stage(self, stage):
+        if self._skip(stage):
+            return None
+        result = self._call(stage, self._inputs(stage))
+        self._store_outputs(stage, result)
+        return result
+
+    def _inputs(self, stage):
+        args = [self.context.get(table) for table in stage.inputs]
+        if self.cache is not None:
+            # Las tablas de etapas saltadas ya traen su huella: no hace falta volver a calcularla
+            for table, value in zip(stage.inputs, args):
+                if self.fingerprints.get(table) is not None:
+                    self.cache.remember(value, self.fingerprints[table])
+        return args
+
+    def _stage_fingerprint(self, stage):
+        inputs = {}
+        for table in stage.inputs:
+            if table not in self.fingerprints:
+                self.fingerprints[table] = self.cache.table_fingerprint(self.context.get(table))
+            inputs[table] = self.fingerprints[table]
+        return self.cache.stage_fingerprint(stage.name, stage.func, inputs, stage.sources, stage.artifacts)
+
+    def _skip(self, stage):
+        """Salta la etapa si el caché tiene su huella; sus salidas quedan diferidas"""
+        if self.cache is None:
+            return False
+        stage.fingerprint = self._stage_fingerprint(stage)
+        outputs = self.cache.lookup(stage.name, stage.fingerprint)
+        if outputs is None:
+            return False
+        logger.info(f"Etapa {stage.name} sin cambios: se reutilizan sus salidas")
+        with profile_stage(stage.name) as profile:
+            profile.status = 'cached'
+        if stage.load is not None:
+            result = Deferred(stage.load)
+        else:
+            result = Deferred(lambda: self._call(stage, self._inputs(stage)))
+        for table in stage.outputs:
+            self.fingerprints[table] = outputs.get(table)
+            self.context.put(table, Deferred(lambda table=table: self._split(stage, result.resolve())[table]))
+        return True
+
+    def _call(self, stage, args):
+        logger.info(f"Ejecutando etapa: {stage.name}")
+        start = time.perf_counter()
+        with profile_stage(stage.name, args) as profile:
+            if stage.sink:
+                result = stage.func(*args, save=self.context.save_csv)
+            else:
+                result = stage.func(*args)
+            profile.set_output(result)
+        logger.info(f"Etapa {stage.name} completada en {time.perf_counter() - start:.2f} s")
+        return result
+
+    def _split(self, stage, result):
+        """{tabla de salida: valor} a partir del resultado de la etapa"""
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        if isinstance(result, dict):
+            return {table: result[table] for table in stage.outputs}
+        return dict(zip(stage.outputs, result))
+
+    def _store_outputs(self, stage, result):
+        outputs = self._split(stage, result) if stage.outputs else {}
+        for table, value in outputs.items():
+            self.context.put(table, value)
+        if self.cache is not None:
+            fingerprints = {}
+            for table, value in outputs.items():
+                # Sin huella de contenido (p. ej. None), la de la etapa: cambia si cambian sus entradas
+                fingerprints[table] = self.cache.table_fingerprint(value) or stage.fingerprint
+                self.fingerprints[table] = fingerprints[table]
+            self.cache.record(stage.name, stage.fingerprint, fingerprints, stage.artifacts)
+
+    def run(self, max_workers=1):
+        """Ejecuta todas las etapas.
+
+        Con max_workers > 1 cada etapa se lanza en un pool de hilos en cuanto
+        terminan las etapas que producen sus entradas; las salidas se guardan
+        en el contexto desde el hilo principal.
+        """
+        ordered = self.execution_order()
+        if max_workers <= 1:
+            for stage in ordered:
+                self._log_step(stage)
+                self.run_stage(stage)
+            return self.context
+
+        producers = {table: stage.name for stage in ordered for table in stage.outputs}
+        waiting = {stage.name: {producers[table] for table in stage.inputs if table in producers}
+                   for stage in ordered}
+        done = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while waiting or running:
+                for stage in ordered:
+                    if stage.name in waiting and waiting[stage.name] <= done:
+                        del waiting[stage.name]
+                        self._log_step(stage)
+                        if self._skip(stage):
+                            done.add(stage.name)
+                            continue
+                        running[pool.submit(self._call, stage, self._inputs(stage))] = stage
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    self._store_outputs(stage, future.result())
+                    done.add(stage.name)
+        return self.context
+
+    def _log_step(self, stage):
+        if stage.step and stage.step != self._current_step:
+            self._current_step = stage.step
+            logger.info(f"\n{stage.step}")
@@ -0,0 +1,183 @@
+"""
+Perfilado por etapa de una ejecución del ETL.
+
+Mientras hay un perfilador activo (``start_profiling``), cada etapa del
+pipeline registra tiempo de pared, tiempo de CPU de su hilo, pico de memoria
+(RSS) del proceso, filas de entrada y salida, y bytes leídos y escritos por
+la capa de almacenamiento. Al final se escribe un manifiesto JSON de la
+ejecución. Sin perfilador activo las funciones de este módulo no hacen nada.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_active_profiler = None
+_current = threading.local()
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso hasta ahora, en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def count_rows(value):
+    """Filas de un DataFrame, o la suma de las de un dict/tupla de DataFrames"""
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        counts = [count_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+class StageProfile:
+    """Métricas de una etapa; set_output registra las filas producidas"""
+
+    def __init__(self, name, rows_in):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_mb = None
+        self.status = 'running'
+
+    def set_output(self, result):
+        self.rows_out = count_rows(result)
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'status': self.status,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_mb': self.peak_rss_mb,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+class _NullProfile:
+    status = None
+
+    def set_output(self, result):
+        pass
+
+
+class RunProfiler:
+    """Acumula los perfiles de las etapas de una ejecución"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile_stage(self, name, inputs=()):
+        profile = StageProfile(name, count_rows(list(inputs)))
+        with self._lock:
+            self.stages.append(profile)
+        previous = getattr(_current, 'profile', None)
+        _current.profile = profile
+        wall_start = time.perf_counter()
+        # CPU del hilo: con etapas en paralelo el CPU del proceso mezclaría etapas
+        cpu_start = time.thread_time()
+        try:
+            yield profile
+            if profile.status == 'running':
+                profile.status = 'ok'
+        except Exception:
+            profile.status = 'error'
+            raise
+        finally:
+            profile.wall_seconds = round(time.perf_counter() - wall_start, 4)
+            profile.cpu_seconds = round(time.thread_time() - cpu_start, 4)
+            profile.peak_rss_mb = peak_rss_mb()
+            _current.profile = previous
+
+    def manifest(self, **run_info):
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            **run_info,
+            'stages': [profile.to_dict() for profile in self.stages],
+        }
+
+    def write_manifest(self, path, **run_info):
+        """Escribe el manifiesto JSON de la ejecución en path"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(**run_info), f, indent=2, default=str)
+        logger.info(f"Manifiesto de ejecución guardado en {path}")
+        return path
+
+
+def start_profiling():
+    """Activa un perfilador nuevo para las etapas que se ejecuten a partir de ahora"""
+    global _active_profiler
+    _active_profiler = RunProfiler()
+    return _active_profiler
+
+
+def stop_profiling():
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    return profiler
+
+
+def profile_stage(name, inputs=()):
+    """Context manager que perfila una etapa si hay un perfilador activo"""
+    if _active_profiler is None:
+        return _null_stage()
+    return _active_profiler.profile_stage(name, inputs)
+
+
+@contextmanager
+def _null_stage():
+    yield _NullProfile()
+
+
+def _record(attribute, path):
+    profile = getattr(_current, 'profile', None)
+    if profile is None or not os.path.isfile(path):
+        return
+    setattr(profile, attribute, getattr(profile, attribute) + os.path.getsize(path))
+
+
+def record_read(path):
+    """Suma el tamaño de path a los bytes leídos por la etapa en curso"""
+    _record('bytes_read', path)
+
+
+def record_write(path):
+    """Suma el tamaño de path a los bytes escritos por la etapa en curso"""
+    _record('bytes_written', path)
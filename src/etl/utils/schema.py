@@ -0,0 +1,162 @@
+"""
+Registro de tipos de las tablas del ETL.
+
+Cada tabla de staging, dimensión y hecho declara el tipo de sus columnas:
+``category`` para textos con pocos valores distintos, el entero más chico
+que admite la columna para claves subrogadas y conteos, y ``float32`` donde
+alcanza la precisión. Los lectores y escritores de utils/storage.py y los
+constructores de extract/transform aplican el esquema con ``apply_schema``.
+
+Las columnas de texto de las dimensiones no se declaran: son tablas chicas
+y esas columnas son las etiquetas por las que se une y agrupa (con
+categóricas, un groupby de pandas < 3 devuelve también los grupos vacíos).
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# date_key (AAAAMMDD) no entra en int16; el resto de las claves comparte el tipo
+KEY = 'int32'
+# Conteos por fila (impresiones, sesiones...); la suma se hace en int64
+COUNT = 'int32'
+
+TABLE_SCHEMAS = {
+    'rfi_staging': {
+        'date': 'category',
+        'campaign': 'category',
+        'site': 'category',
+        'placement': 'category',
+        'creative': 'category',
+        'size': 'category',
+        'impressions': COUNT,
+        'clicks': COUNT,
+        # Linaje (extract/extract_and_clean.LINEAGE_COLUMNS)
+        'source_file': 'category',
+        'source_row': 'int32',
+    },
+    'ga_staging': {
+        'date': 'category',
+        'campaign': 'category',
+        'source': 'category',
+        'device': 'category',
+        'ad_content': 'category',
+        'users': COUNT,
+        'new_users': COUNT,
+        'sessions': COUNT,
+        'pageviews': COUNT,
+        # Segundos con a lo sumo dos decimales
+        'avg_session_duration_sec': 'float32',
+        # Cociente calculado: se conserva en float64
+        'bounce_rate': 'float64',
+        'source_file': 'category',
+        'source_row': 'int32',
+    },
+    'dim_date': {'date_key': KEY, 'month': 'int8', 'year': 'int16'},
+    'dim_campaign': {'campaign_key': KEY},
+    'dim_site': {'site_key': KEY},
+    'dim_creative': {'creative_key': KEY},
+    'dim_placement': {'placement_key': KEY},
+    'dim_device': {'device_key': KEY},
+    'dim_source': {'source_key': KEY},
+    'dim_ad_content': {'ad_content_key': KEY},
+    'dim_creative_size': {'size_key': KEY, 'width': 'int16', 'height': 'int16'},
+    'bridge_creative_adcontent': {
+        'creative_key': KEY,
+        'ad_content_key': KEY,
+        'confidence_score': 'float32',
+    },
+    'fact_ad_performance': {
+        'date_key': KEY,
+        'campaign_key': KEY,
+        'site_key': KEY,
+        'creative_key': KEY,
+        'placement_key': KEY,
+        'size_key': KEY,
+        'impressions': COUNT,
+        'clicks': COUNT,
+    },
+    'fact_web_analytics': {
+        'date_key': KEY,
+        'campaign_key': KEY,
+        'source_key': KEY,
+        'device_key': KEY,
+        'ad_content_key': KEY,
+        'users': COUNT,
+        'new_users': COUNT,
+        'sessions': COUNT,
+        'pageviews': COUNT,
+        'avg_session_duration_sec': 'float32',
+        'bounce_rate': 'float64',
+    },
+}
+
+
+def table_schema(name):
+    """{columna: tipo} declarado para la tabla (vacío si no tiene esquema)"""
+    return TABLE_SCHEMAS.get(name, {})
+
+
+def read_dtypes(name):
+    """Tipos que el lector CSV puede aplicar al parsear: las categóricas.
+
+    Los enteros se ajustan después, porque una columna con nulos o con
+    decimales no se puede leer directamente como entero.
+    """
+    return {column: dtype for column, dtype in table_schema(name).items() if dtype == 'category'}
+
+
+def to_integer(series, dtype):
+    """series como el entero dtype; None si tiene decimales o no entra en el tipo"""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        series = pd.to_numeric(series, errors='coerce') if len(series) else series.astype('float64')
+    values = series.dropna()
+    if len(values):
+        if pd.api.types.is_float_dtype(values) and not (np.floor(values) == values).all():
+            return None
+        info = np.iinfo(dtype)
+        if values.min() < info.min or values.max() > info.max:
+            return None
+    # Con nulos, el entero con nulos de pandas (Int32...)
+    return series.astype(dtype.capitalize() if series.isna().any() else dtype)
+
+
+def conform_column(series, dtype):
+    if series.dtype == dtype:
+        return series
+    if dtype == 'category':
+        return series.astype('category')
+    if pd.api.types.is_integer_dtype(dtype):
+        if pd.api.types.is_integer_dtype(series) and series.dtype.itemsize == np.dtype(dtype).itemsize:
+            return series
+        converted = to_integer(series, dtype)
+        if converted is None:
+            logger.debug(f"Columna {series.name}: valores no enteros o fuera de {dtype}, se deja como está")
+            return series
+        return converted
+    return series.astype(dtype)
+
+
+def apply_schema(df, name):
+    """Devuelve df con las columnas declaradas para la tabla name en su tipo.
+
+    Las columnas que ya tienen el tipo no se copian. Una columna entera
+    que trae decimales (un dato mal parseado) queda en float64 en vez de
+    truncarse.
+    """
+    schema = table_schema(name)
+    changed = {}
+    for column, dtype in schema.items():
+        if column in df.columns:
+            series = df[column]
+            conformed = conform_column(series, dtype)
+            if conformed is not series:
+                changed[column] = conformed
+    if not changed:
+        return df
+    df = df.copy(deep=False)
+    for column, values in changed.items():
+        df[column] = values
+    return df
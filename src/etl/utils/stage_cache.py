@@ -0,0 +1,193 @@
+"""
+Caché de etapas del pipeline por huella de contenido.
+
+La huella de una etapa combina la huella de cada tabla de entrada, el hash
+de los archivos fuente que lee (por ejemplo el export RFI), las rutas de
+los archivos que escribe, el hash del código del módulo que define la
+etapa y una etiqueta de la ejecución (versión del caché, formato de
+almacenamiento y ``code_fingerprint`` de todo el código del ETL, así un
+cambio en un helper también invalida las etapas). Si coincide con la de la
+última ejecución correcta y los archivos que la etapa escribió siguen en
+disco sin cambios, la etapa no se vuelve a ejecutar y sus salidas se leen
+de disco solo si alguna etapa posterior las necesita.
+
+La huella de una tabla es el hash de su contenido, así que una etapa que se
+vuelve a ejecutar pero produce lo mismo no invalida las siguientes. Igual
+que el estado incremental, el caché solo se guarda cuando el ETL termina
+correctamente (``commit``).
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def content_fingerprint(value):
+    """Hash del contenido de un DataFrame (o dict/lista de DataFrames); None si no aplica"""
+    if isinstance(value, pd.DataFrame):
+        row_hashes = pd.util.hash_pandas_object(value, index=False).values
+        sha = hashlib.sha256(json.dumps([list(map(str, value.columns)),
+                                         list(map(str, value.dtypes))]).encode('utf-8'))
+        sha.update(row_hashes.tobytes())
+        return sha.hexdigest()
+    if isinstance(value, dict):
+        parts = {str(key): content_fingerprint(item) for key, item in value.items()}
+        return None if None in parts.values() else digest(parts)
+    if isinstance(value, (list, tuple)):
+        parts = [content_fingerprint(item) for item in value]
+        return None if None in parts else digest(parts)
+    return None
+
+
+def code_fingerprint(directory):
+    """Hash de todos los módulos .py bajo directory (ruta relativa y contenido).
+
+    Las etapas usan helpers de otros módulos (parseo numérico, motor de
+    KPIs, formatos...): cualquier cambio de código invalida el caché.
+    """
+    sha = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                sha.update(os.path.relpath(path, directory).replace(os.sep, '/').encode('utf-8'))
+                sha.update(hash_file(path).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def source_module(func):
+    """Archivo del módulo que define func (atravesando partial)"""
+    while hasattr(func, 'func'):
+        func = func.func
+    try:
+        return inspect.getsourcefile(func)
+    except TypeError:
+        return None
+
+
+class StageCache:
+    """Huellas de la última ejecución correcta de cada etapa"""
+
+    def __init__(self, path, tag=None, stages=None, files=None):
+        self.path = path
+        self.tag = tag or {}
+        self.stages = stages or {}
+        self.files = files or {}
+        self.skipped = []
+        self._pending = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, tag=None):
+        stages, files = {}, {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Con otra etiqueta (versión, formato de almacenamiento) nada de lo guardado sirve
+            if data.get('tag') == json.loads(json.dumps(tag or {})):
+                stages = data.get('stages', {})
+            files = data.get('files', {})
+        return cls(path, tag, stages, files)
+
+    def file_hash(self, path):
+        """Hash del archivo; si tamaño y mtime no cambiaron se reutiliza el anterior"""
+        path = os.path.abspath(path)
+        stat = file_stat(path)
+        with self._lock:
+            known = self.files.get(path)
+            if known is not None and known[:2] == stat:
+                return known[2]
+        value = hash_file(path)
+        with self._lock:
+            self.files[path] = stat + [value]
+        return value
+
+    def table_fingerprint(self, value):
+        """Huella de una tabla del contexto, calculada una sola vez por objeto"""
+        with self._lock:
+            known = self._values.get(id(value))
+            if known is not None and known[0] is value:
+                return known[1]
+        fingerprint = content_fingerprint(value)
+        if fingerprint is not None:
+            self.remember(value, fingerprint)
+        return fingerprint
+
+    def remember(self, value, fingerprint):
+        # Se guarda el objeto para que su id no se reutilice durante la ejecución
+        with self._lock:
+            self._values[id(value)] = (value, fingerprint)
+
+    def stage_fingerprint(self, name, func, input_fingerprints, sources=(), artifacts=()):
+        module = source_module(func)
+        return digest({
+            'stage': name,
+            'code': self.file_hash(module) if module and os.path.exists(module) else None,
+            'inputs': input_fingerprints,
+            'sources': {os.path.abspath(path): self.file_hash(path) for path in sources},
+            # Si la etapa escribe otros archivos (p. ej. otros formatos de reporte) se vuelve a ejecutar
+            'artifacts': sorted(os.path.abspath(path) for path in artifacts),
+            'tag': self.tag,
+        })
+
+    def lookup(self, name, fingerprint):
+        """Huellas de las salidas si la etapa puede saltarse; None si hay que ejecutarla"""
+        entry = self.stages.get(name)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        for path, stat in entry['artifacts'].items():
+            if not os.path.exists(path) or file_stat(path) != stat:
+                return None
+        with self._lock:
+            self.skipped.append(name)
+            self._pending[name] = entry
+        return entry['outputs']
+
+    def record(self, name, fingerprint, outputs, artifacts=()):
+        """Registra una etapa ejecutada; se guarda con commit"""
+        if not all(os.path.exists(path) for path in artifacts):
+            # Sin sus archivos en disco la etapa no se podría saltar
+            return
+        entry = {
+            'fingerprint': fingerprint,
+            'outputs': outputs,
+            'artifacts': {os.path.abspath(path): file_stat(path) for path in artifacts},
+        }
+        with self._lock:
+            self._pending[name] = entry
+
+    def commit(self):
+        """Guarda las huellas de esta ejecución como la última ejecución correcta"""
+        self.stages.update(self._pending)
+        self._pending = {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'tag': self.tag, 'stages': self.stages, 'files': self.files}, f, indent=2)
+        logger.info(f"Caché de etapas guardado en {self.path} ({len(self.skipped)} etapas reutilizadas)")
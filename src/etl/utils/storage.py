@@ -0,0 +1,390 @@
+"""
+Capa de almacenamiento para las tablas intermedias del ETL.
+
+Staging, dimensiones, hechos y tabla puente se leen y escriben a través de
+este módulo. El backend CSV mantiene el formato de siempre (el que consume
+Power BI); el backend Parquet guarda los tipos de cada columna, comprime y
+permite leer solo las columnas necesarias. Parquet requiere ``pyarrow``
+(``pip install -e ".[parquet]"``). Al leer y al guardar se aplican los tipos
+declarados para cada tabla (utils/schema.py).
+
+Los hechos se guardan particionados por mes (``save_partitioned_table``):
+un archivo por valor de date_key dentro de un directorio con el nombre de
+la tabla, más un manifiesto ``_partitions.json`` con las filas y el mínimo
+y máximo de cada columna por partición. ``load_partitioned_table`` con un
+rango de fechas abre solo las particiones que caen en él.
+"""
+import json
+import logging
+import os
+
+import pandas as pd
+
+from .profiling import record_read, record_write
+from .schema import apply_schema, read_dtypes
+
+logger = logging.getLogger(__name__)
+
+
+class CsvStorage:
+    """Tablas como CSV UTF-8 sin índice"""
+
+    name = 'csv'
+    extension = '.csv'
+
+    def write(self, df, path):
+        df.to_csv(path, index=False, encoding='utf-8')
+
+    def read(self, path, columns=None, dtype=None):
+        # Solo las celdas vacías son nulas: nombres como 'NA' o el marcador 'NULL' se conservan
+        return pd.read_csv(path, usecols=columns, dtype=dtype, keep_default_na=False, na_values=[''])
+
+    def columns(self, path):
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    def open_writer(self, path):
+        return CsvTableWriter(path)
+
+
+class CsvTableWriter:
+    """Escritura incremental de un CSV: cabecera con el primer bloque, luego append"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._first = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first,
+                  index=False, encoding='utf-8')
+        self._first = False
+        self.rows += len(df)
+
+    def close(self, columns=None):
+        if self._first:
+            # Sin bloques: dejar la tabla con solo la cabecera
+            pd.DataFrame(columns=columns).to_csv(self.path, index=False, encoding='utf-8')
+
+
+class ParquetStorage:
+    """Tablas como Parquet (columnar, tipado y comprimido)"""
+
+    name = 'parquet'
+    extension = '.parquet'
+
+    def __init__(self, compression='snappy'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "El backend parquet requiere pyarrow: pip install -e \".[parquet]\""
+            )
+        self.compression = compression
+
+    def write(self, df, path):
+        df.to_parquet(path, index=False, compression=self.compression)
+
+    def read(self, path, columns=None, dtype=None):
+        # Parquet ya guarda los tipos; dtype solo aplica al CSV
+        return pd.read_parquet(path, columns=columns)
+
+    def columns(self, path):
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+
+    def open_writer(self, path):
+        return ParquetTableWriter(path, self.compression)
+
+
+class ParquetTableWriter:
+    """Escritura incremental de un Parquet, un row group por bloque"""
+
+    def __init__(self, path, compression):
+        self.path = path
+        self.compression = compression
+        self.rows = 0
+        self._writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Cada bloque trae sus propias categorías y un conteo puede ser entero en un
+        # bloque y decimal en otro: se escriben los valores con tipos amplios y el
+        # lector vuelve a aplicar el esquema
+        df = df.astype({column: (dtype.categories.dtype if isinstance(dtype, pd.CategoricalDtype) else 'float64')
+                        for column, dtype in df.dtypes.items()
+                        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_integer_dtype(dtype)})
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        else:
+            # Los bloques siguientes se ajustan al esquema del primero
+            table = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self, columns=None):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            pd.DataFrame(columns=columns).to_parquet(self.path, index=False)
+
+
+STORAGE_BACKENDS = {
+    'csv': CsvStorage,
+    'parquet': ParquetStorage,
+}
+
+_default_storage = CsvStorage()
+
+
+def get_storage(name=None, **options):
+    """Devuelve el backend indicado, o el backend por defecto si name es None"""
+    if name is None:
+        return _default_storage
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Formato de almacenamiento desconocido: '{name}'. Opciones: {sorted(STORAGE_BACKENDS)}"
+        )
+    return STORAGE_BACKENDS[name](**options)
+
+
+def set_default_storage(name, **options):
+    """Cambia el backend que usan todas las etapas del ETL"""
+    global _default_storage
+    _default_storage = get_storage(name, **options)
+    logger.info(f"Almacenamiento de tablas: {_default_storage.name}")
+    return _default_storage
+
+
+def table_path(directory, name, storage=None):
+    storage = storage or get_storage()
+    return os.path.join(directory, name + storage.extension)
+
+
+def table_exists(directory, name, storage=None):
+    return os.path.exists(table_path(directory, name, storage))
+
+
+def find_table_storage(directory, name):
+    """Backend con el que está guardada la tabla: el activo o, si se cambió de formato, el del archivo; None si no existe"""
+    active = get_storage()
+    if table_exists(directory, name, active):
+        return active
+    for backend in STORAGE_BACKENDS.values():
+        storage = backend()
+        if table_exists(directory, name, storage):
+            return storage
+    return None
+
+
+def save_table(df, directory, name, storage=None):
+    """Guarda una tabla en directory con el backend activo"""
+    storage = storage or get_storage()
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(directory, name, storage)
+    storage.write(apply_schema(df, name), path)
+    record_write(path)
+    logger.info(f"Guardado: {path} ({len(df)} filas)")
+    return path
+
+
+def load_table(directory, name, columns=None, storage=None):
+    """Lee una tabla con sus tipos declarados; columns limita la lectura a esas columnas"""
+    storage = storage or get_storage()
+    path = table_path(directory, name, storage)
+    record_read(path)
+    dtype = {column: kind for column, kind in read_dtypes(name).items() if columns is None or column in columns}
+    return apply_schema(storage.read(path, columns=columns, dtype=dtype or None), name)
+
+
+def table_columns(directory, name, storage=None):
+    """Columnas de una tabla sin leer sus filas"""
+    storage = storage or get_storage()
+    return storage.columns(table_path(directory, name, storage))
+
+
+def open_table_writer(directory, name, storage=None):
+    """Abre un writer incremental (write(df) por bloque y close(columns) al final)"""
+    storage = storage or get_storage()
+    os.makedirs(directory, exist_ok=True)
+    return storage.open_writer(table_path(directory, name, storage))
+
+
+PARTITION_MANIFEST = '_partitions.json'
+
+
+def partition_dir(directory, name):
+    return os.path.join(directory, name)
+
+
+def partition_manifest_path(directory, name):
+    """Manifiesto de una tabla particionada; cambia con cada escritura"""
+    return os.path.join(partition_dir(directory, name), PARTITION_MANIFEST)
+
+
+def is_partitioned(directory, name):
+    return os.path.exists(partition_manifest_path(directory, name))
+
+
+def read_partition_manifest(directory, name):
+    with open(partition_manifest_path(directory, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def json_value(value):
+    """Escalar de numpy/pandas como valor JSON (None para nulos)"""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def partition_entry(df, value, file_name, partition_column, storage_name):
+    """Formato, filas y mínimo/máximo por columna numérica de una partición"""
+    numeric = df.select_dtypes(include='number')
+    return {
+        'value': json_value(value),
+        'file': file_name,
+        'format': storage_name,
+        'rows': len(df),
+        'min': {column: json_value(numeric[column].min()) for column in numeric.columns},
+        'max': {column: json_value(numeric[column].max()) for column in numeric.columns},
+    }
+
+
+def write_atomic(storage, df, path):
+    # Se escribe aparte y se renombra: una partición a medio escribir nunca queda en su lugar
+    tmp_path = path + '.tmp'
+    storage.write(df, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_partitioned_table(df, directory, name, partition_column='date_key', partitions=None, storage=None):
+    """Guarda una tabla como un archivo por valor de partition_column.
+
+    Con partitions se reescriben solo esas particiones (las que df ya no
+    tiene se eliminan) y las demás quedan como estaban, también si se
+    escribieron en otro formato: cada entrada del manifiesto guarda el
+    suyo. Sin partitions se reescribe la tabla entera. El manifiesto se escribe al final, así que
+    hasta entonces los lectores ven la versión anterior. Devuelve la ruta
+    del manifiesto.
+    """
+    storage = storage or get_storage()
+    df = apply_schema(df, name)
+    table_dir = partition_dir(directory, name)
+    os.makedirs(table_dir, exist_ok=True)
+    previous = read_partition_manifest(directory, name) if is_partitioned(directory, name) else None
+
+    entries = {}
+    if previous is not None and partitions is not None:
+        rewritten = {json_value(value) for value in partitions}
+        # Las particiones que quedan conservan su formato (en manifiestos anteriores, el de la tabla)
+        entries = {entry['value']: dict(entry, format=entry.get('format', previous['format']))
+                   for entry in previous['partitions'] if entry['value'] not in rewritten}
+        df = df[df[partition_column].isin(list(rewritten))]
+    # Filas sin valor de partición (clave no resuelta) van a la partición "null"
+    for value, part in df.groupby(partition_column, sort=True, dropna=False):
+        file_name = f"{partition_column}={'null' if pd.isna(value) else json_value(value)}{storage.extension}"
+        path = os.path.join(table_dir, file_name)
+        write_atomic(storage, part, path)
+        record_write(path)
+        entries[json_value(value)] = partition_entry(part, value, file_name, partition_column, storage.name)
+
+    manifest = {
+        'partition_column': partition_column,
+        'format': storage.name,
+        'columns': list(df.columns),
+        'partitions': [entries[value] for value in sorted(entries, key=lambda v: (v is not None, v))],
+    }
+    manifest_path = partition_manifest_path(directory, name)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    # Archivos de particiones que ya no figuran (o de otro formato)
+    if previous is not None:
+        current = {entry['file'] for entry in manifest['partitions']}
+        for entry in previous['partitions']:
+            if entry['file'] not in current and os.path.exists(os.path.join(table_dir, entry['file'])):
+                os.remove(os.path.join(table_dir, entry['file']))
+    logger.info(f"Guardado: {table_dir} ({sum(entry['rows'] for entry in manifest['partitions'])} filas "
+                f"en {len(manifest['partitions'])} particiones)")
+    return manifest_path
+
+
+def select_partitions(manifest, start=None, end=None):
+    """Entradas del manifiesto con valor entre start y end (inclusive)"""
+    if start is None and end is None:
+        return list(manifest['partitions'])
+    return [entry for entry in manifest['partitions'] if entry['value'] is not None
+            and (start is None or entry['value'] >= start) and (end is None or entry['value'] <= end)]
+
+
+def load_partitioned_table(directory, name, columns=None, start=None, end=None, storage=None, exclude=None):
+    """Lee las particiones de la tabla entre start y end (valores de la columna de partición).
+
+    Las particiones con valor en exclude no se leen. Una tabla guardada sin
+    particionar (por una versión anterior del ETL) se lee entera y se
+    filtra por date_key.
+    """
+    excluded = {json_value(value) for value in exclude or []}
+    if not is_partitioned(directory, name):
+        df = load_table(directory, name, columns=columns, storage=storage)
+        if (start is not None or end is not None or excluded) and 'date_key' in df.columns:
+            keep = pd.Series(True, index=df.index)
+            if start is not None:
+                keep &= df['date_key'] >= start
+            if end is not None:
+                keep &= df['date_key'] <= end
+            if excluded:
+                keep &= ~df['date_key'].isin(list(excluded))
+            df = df[keep].reset_index(drop=True)
+        return df
+
+    manifest = read_partition_manifest(directory, name)
+    backends = {} if storage is None else {storage.name: storage}
+    table_dir = partition_dir(directory, name)
+    dtype = {column: kind for column, kind in read_dtypes(name).items() if columns is None or column in columns}
+    selected = [entry for entry in select_partitions(manifest, start, end) if entry['value'] not in excluded]
+    logger.debug(f"{name}: {len(selected)} de {len(manifest['partitions'])} particiones")
+    frames = []
+    for entry in selected:
+        path = os.path.join(table_dir, entry['file'])
+        # Cada partición con el backend de su formato (manifiestos anteriores: el de la tabla)
+        entry_format = entry.get('format', manifest['format'])
+        if entry_format not in backends:
+            backends[entry_format] = STORAGE_BACKENDS[entry_format]()
+        record_read(path)
+        frames.append(backends[entry_format].read(path, columns=columns, dtype=dtype or None))
+    if not frames:
+        return apply_schema(pd.DataFrame(columns=columns or manifest['columns']), name)
+    return apply_schema(pd.concat(frames, ignore_index=True), name)
+
+
+def partition_stats(directory, name):
+    """Una fila por partición: valor, filas y mínimo/máximo de cada columna numérica"""
+    manifest = read_partition_manifest(directory, name)
+    rows = []
+    for entry in manifest['partitions']:
+        row = {manifest['partition_column']: entry['value'], 'rows': entry['rows']}
+        for column in entry['min']:
+            row[f'{column}_min'] = entry['min'][column]
+            row[f'{column}_max'] = entry['max'][column]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def stored_table_path(directory, name, storage=None):
+    """Archivo que cambia al reescribir la tabla: el manifiesto si está particionada"""
+    if is_partitioned(directory, name):
+        return partition_manifest_path(directory, name)
+    return table_path(directory, name, storage)
+
+
+def stored_table_columns(directory, name, storage=None):
+    """Columnas de una tabla, particionada o no, sin leer sus filas"""
+    if is_partitioned(directory, name):
+        return read_partition_manifest(directory, name)['columns']
+    return table_columns(directory, name, storage)
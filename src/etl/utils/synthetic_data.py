@@ -0,0 +1,141 @@
+"""
+Exports RFI y GA sintéticos para benchmarks.
+
+Generan archivos con el mismo formato que los exports reales: separador
+punto y coma, BOM UTF-8, meses como ``2021-01`` (RFI) y ``202104`` (GA),
+coma decimal en Pageviews y Session Duration, duraciones ``H:MM:SS``, y
+celdas vacías e impresiones con separador de miles como en los originales.
+Con la misma semilla (``settings.RANDOM_STATE``) el archivo es idéntico.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+RFI_HEADER = ['Campaign', 'Month', 'Site (Site Directory)', 'Placement - DCM', 'Creative',
+              'Creative Dimensions', 'Platform Type', 'Impressions', 'Clicks']
+GA_HEADER = ['Source', 'Month of Year', 'Device Category', 'Ad Content', 'Sessions', 'Users',
+             'New Users', 'Pageviews', 'Session Duration', 'Calculated AToS']
+
+SIZES = ['160x600', '300x250', '728x90', '320x50', '1x1', '(not set)']
+SITE_TOPICS = ['Health', 'News', 'Sports', 'Games', 'Skin Disease News', 'Media']
+PLATFORMS = ['Desktop', 'Smartphone', 'Tablet', 'Connected TV', '']
+DEVICES = np.array(['desktop', 'mobile', 'tablet', 'cross device', ''], dtype=object)
+DEVICE_WEIGHTS = [0.37, 0.32, 0.23, 0.005, 0.075]
+GA_MONTHS = np.array([f'2021{month:02d}' for month in range(1, 13)], dtype=object)
+RFI_MONTHS = np.array([f'2021-{month:02d}' for month in range(1, 13)], dtype=object)
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def rfi_members():
+    """Miembros de las dimensiones RFI (campañas, sitios, placements, creativos)"""
+    return {
+        'campaign': np.array([f'Campaign {i:02d} Dermicool FY21 SDP DTP Media PT' for i in range(1, 6)],
+                             dtype=object),
+        'site': np.array([f'{SITE_TOPICS[i % len(SITE_TOPICS)]} Site {i:03d}' for i in range(60)],
+                         dtype=object),
+        'placement': np.array([f'PL{i:03d}_{"HP" if i % 3 == 0 else "ROS"}_Display' for i in range(200)],
+                              dtype=object),
+        'creative': np.array([f'SD_{1600 + i}_v{1 + i % 4}_Symptom' for i in range(40)], dtype=object),
+    }
+
+
+def ga_members():
+    """Miembros de las dimensiones GA (fuentes y contenidos de anuncio)"""
+    sources = np.array(['Acuity', 'Aptus', 'Facebook', 'GoodRx', 'Healthline', 'HealthUnion',
+                        'MediaIQ', 'Medicx', 'MiQ', 'PulsePoint', 'RemedyHealth', 'Sharecare',
+                        'Swoop', 'WebMD', 'Zeta', 'Emodo', 'AdTheorent', 'AdPrime', 'google'],
+                       dtype=object)
+    ad_contents = [f'{sources[i % len(sources)]}Targeting.SD_{1600 + i % 40}_v3_Symptom.{i % 7}'
+                   for i in range(1000)]
+    ad_contents += ['300x250_AR_FN', '728x90_AR_FN', '160x600_AR_FN']
+    return {'source': sources, 'ad_content': np.array(ad_contents, dtype=object)}
+
+
+def with_thousands(values, rng, share=0.02):
+    """Enteros como texto; una parte con separador de miles ('1,234')"""
+    text = pd.Series(values).astype(str)
+    mask = (rng.random(len(values)) < share) & (values >= 1000)
+    text[mask] = pd.Series(values[mask]).map('{:,}'.format).values
+    return text
+
+
+def decimal_comma(values):
+    """Números con dos decimales y coma decimal ('840,00')"""
+    return pd.Series(values).astype(str) + ',00'
+
+
+def hh_mm_ss(seconds):
+    hours, rest = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(rest, 60)
+    return (pd.Series(hours).astype(str) + ':' + pd.Series(minutes).astype(str).str.zfill(2)
+            + ':' + pd.Series(secs).astype(str).str.zfill(2))
+
+
+def generate_rfi_frame(n_rows, rng):
+    """Bloque del export RFI con las columnas y formatos originales"""
+    members = rfi_members()
+    impressions = rng.lognormal(6, 1.6, n_rows).astype('int64')
+    clicks = rng.binomial(impressions, 0.004)
+    site = members['site'][rng.integers(0, len(members['site']), n_rows)]
+    site[rng.random(n_rows) < 0.001] = ''
+    return pd.DataFrame({
+        'Campaign': members['campaign'][rng.integers(0, len(members['campaign']), n_rows)],
+        'Month': RFI_MONTHS[rng.integers(0, len(RFI_MONTHS), n_rows)],
+        'Site (Site Directory)': site,
+        'Placement - DCM': members['placement'][rng.integers(0, len(members['placement']), n_rows)],
+        'Creative': members['creative'][rng.integers(0, len(members['creative']), n_rows)],
+        'Creative Dimensions': np.array(SIZES, dtype=object)[rng.integers(0, len(SIZES), n_rows)],
+        'Platform Type': np.array(PLATFORMS, dtype=object)[rng.integers(0, len(PLATFORMS), n_rows)],
+        'Impressions': with_thousands(impressions, rng).values,
+        'Clicks': clicks,
+    }, columns=RFI_HEADER)
+
+
+def generate_ga_frame(n_rows, rng):
+    """Bloque del export GA con las columnas y formatos originales"""
+    members = ga_members()
+    sessions = rng.lognormal(2, 1.5, n_rows).astype('int64') + 1
+    users = np.maximum(1, (sessions * rng.uniform(0.6, 1.0, n_rows)).astype('int64'))
+    new_users = (users * rng.uniform(0.5, 1.0, n_rows)).astype('int64')
+    pageviews = (sessions * rng.uniform(1.0, 3.0, n_rows)).astype('int64')
+    duration = (sessions * rng.uniform(0, 120, n_rows)).astype('int64')
+    return pd.DataFrame({
+        'Source': members['source'][rng.integers(0, len(members['source']), n_rows)],
+        'Month of Year': GA_MONTHS[rng.integers(0, len(GA_MONTHS), n_rows)],
+        'Device Category': rng.choice(DEVICES, n_rows, p=DEVICE_WEIGHTS),
+        'Ad Content': members['ad_content'][rng.integers(0, len(members['ad_content']), n_rows)],
+        'Sessions': sessions,
+        'Users': users,
+        'New Users': new_users,
+        'Pageviews': decimal_comma(pageviews).values,
+        'Session Duration': decimal_comma(duration).values,
+        'Calculated AToS': hh_mm_ss(duration // sessions).values,
+    }, columns=GA_HEADER)
+
+
+def write_synthetic_export(path, generate_frame, n_rows, random_state, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Escribe n_rows filas generadas por bloques (memoria acotada para 10M filas)"""
+    rng = np.random.default_rng(random_state)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        written = 0
+        first = True
+        while first or written < n_rows:
+            rows = min(chunk_rows, n_rows - written)
+            generate_frame(rows, rng).to_csv(f, sep=';', header=first, index=False)
+            written += rows
+            first = False
+    return path
+
+
+def generate_synthetic_sources(directory, n_rows, random_state, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Genera (si no existen) RFI y GA sintéticos de n_rows filas; devuelve sus rutas"""
+    rfi_file = os.path.join(directory, f'rfi_{n_rows}_{random_state}.csv')
+    ga_file = os.path.join(directory, f'ga_{n_rows}_{random_state}.csv')
+    if not os.path.exists(rfi_file):
+        write_synthetic_export(rfi_file, generate_rfi_frame, n_rows, random_state, chunk_rows)
+    if not os.path.exists(ga_file):
+        write_synthetic_export(ga_file, generate_ga_frame, n_rows, random_state, chunk_rows)
+    return rfi_file, ga_file
@@ -35,6 +35,76 @@ def clean_numeric(value):
     except:
         return 0
 
+def clean_numeric_series(series, decimal='.', thousands=None, fill_value=0):
+    """Versión vectorizada de clean_numeric para una columna completa.
+
+    Quita '%' y separadores de miles, normaliza la coma decimal cuando
+    decimal=',' y convierte con pd.to_numeric. Las celdas que ya son números
+    (una columna mixta de un xlsx) se toman tal cual. Devuelve (serie,
+    n_fallos): n_fallos son las celdas no vacías que no se pudieron
+    convertir y que, igual que en clean_numeric, quedan como fill_value.
+    """
+    if thousands is None:
+        thousands = ',' if decimal == '.' else '.'
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(float).fillna(fill_value), 0
+    
+    text = series.astype(str).str.strip()
+    text = text.str.replace('%', '', regex=False).str.replace(thousands, '', regex=False)
+    if decimal != '.':
+        text = text.str.replace(decimal, '.', regex=False)
+    missing = series.isna() | (text == '')
+    numeric = pd.to_numeric(text.where(~missing), errors='coerce')
+    # Solo una columna con números sueltos (xlsx) se revisa celda por celda;
+    # las de texto (todo lo leído de un CSV con pandas < 3) siguen vectorizadas
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+        is_number = series.map(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool))
+        if is_number.any():
+            numeric = numeric.where(~is_number, pd.to_numeric(series.where(is_number), errors='coerce'))
+    failed = int((numeric.isna() & ~missing).sum())
+    return numeric.astype(float).fillna(fill_value), failed
+
+class ParseFailures(int):
+    """Cantidad de celdas que no se pudieron convertir, con algunos valores de ejemplo"""
+
+    def __new__(cls, count, samples=()):
+        failures = super().__new__(cls, count)
+        failures.samples = list(samples)
+        return failures
+
+# H:MM:SS o MM:SS; cada parte como la aceptaría int() (signo y espacios opcionales)
+DURATION_PATTERN = r'^\s*([+-]?\d+)\s*:\s*([+-]?\d+)\s*(?::\s*([+-]?\d+)\s*)?$'
+
+def parse_duration_series(series, fill_value=0, sample_size=5):
+    """Convierte a segundos una columna de duraciones, sin recorrerla fila por fila.
+
+    Acepta 'H:MM:SS', 'MM:SS' y segundos con coma o punto decimal ('840,00').
+    Las celdas vacías y '00:00:00' son 0. Devuelve (serie, fallos): las
+    celdas que no se pudieron convertir quedan como fill_value y fallos es un
+    ParseFailures con hasta sample_size valores distintos de ellas.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(float).fillna(fill_value), ParseFailures(0)
+    
+    text = series.astype(str).str.strip()
+    missing = series.isna() | (text == '') | (text == '00:00:00')
+    text = text.str.replace(',', '.', regex=False)
+    seconds = pd.Series(np.nan, index=series.index)
+    
+    has_colon = text.str.contains(':', regex=False) & ~missing
+    if has_colon.any():
+        parts = text[has_colon].str.extract(DURATION_PATTERN).astype(float)
+        with_hours = parts[2].notna()
+        seconds[has_colon] = np.where(with_hours,
+                                      parts[0] * 3600 + parts[1] * 60 + parts[2],
+                                      parts[0] * 60 + parts[1])
+    plain = ~has_colon & ~missing
+    seconds[plain] = pd.to_numeric(text[plain], errors='coerce')
+    
+    failed_mask = seconds.isna() & ~missing
+    samples = series[failed_mask].drop_duplicates().head(sample_size).astype(str).tolist()
+    return seconds.fillna(fill_value).astype(float), ParseFailures(failed_mask.sum(), samples)
+
 def standardize_date(date_str):
     """Estandariza fechas a formato YYYY-MM-DD"""
     try:
@@ -56,4 +126,4 @@ def save_csv(df, path):
     """Guarda DataFrame como CSV con validación"""
     os.makedirs(os.path.dirname(path), exist_ok=True)
     df.to_csv(path, index=False, encoding='utf-8')
-    logging.info(f"Guardado: {path} ({len(df)} filas)") 
\ No newline at end of file
+    logging.info(f"Guardado: {path} ({len(df)} filas)") 
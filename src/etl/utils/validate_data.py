@@ -3,6 +3,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.utils import *
+from utils.storage import load_table
+from utils.matching import match_names
 
 logger = setup_logging()
 
@@ -11,19 +13,22 @@ def get_project_root():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 
-def validate_staging_data():
-    """Valida integridad de datos staging"""
+def get_report_path():
+    return os.path.join(get_project_root(), 'data', 'outputs', 'validation_report.txt')
+
+def validate_staging_data(rfi_df=None, ga_df=None):
+    """Valida integridad de datos staging (lee los CSV si no se pasan los DataFrames)"""
     logger.info("Iniciando validación de datos...")
     
     project_root = get_project_root()
     validation_results = []
     
     # Cargar datos
-    rfi_file = os.path.join(project_root, 'data', 'processed', 'staging', 'rfi_staging.csv')
-    ga_file = os.path.join(project_root, 'data', 'processed', 'staging', 'ga_staging.csv')
-    
-    rfi_df = pd.read_csv(rfi_file)
-    ga_df = pd.read_csv(ga_file)
+    staging_dir = os.path.join(project_root, 'data', 'processed', 'staging')
+    if rfi_df is None:
+        rfi_df = load_table(staging_dir, 'rfi_staging')
+    if ga_df is None:
+        ga_df = load_table(staging_dir, 'ga_staging')
     
     # Validación 1: Verificar nulos críticos
     logger.info("Validando campos nulos...")
@@ -80,24 +85,20 @@ def validate_staging_data():
     rfi_creatives = set(rfi_df['creative'].unique())
     ga_adcontents = set(ga_df['ad_content'].unique())
     
-    # Buscar coincidencias parciales
-    matches = []
-    for creative in rfi_creatives:
-        for adcontent in ga_adcontents:
-            if any(part in adcontent for part in creative.split('_')[:3]):
-                matches.append((creative, adcontent))
+    # Coincidencias por tokens compartidos (ver utils/matching.py)
+    matches = match_names(rfi_df['creative'], ga_df['ad_content'])
     
     validation_results.append("\n=== MAPEO CREATIVE-ADCONTENT ===")
     validation_results.append(f"Creativos únicos (RFI): {len(rfi_creatives)}")
     validation_results.append(f"AdContent únicos (GA): {len(ga_adcontents)}")
     validation_results.append(f"Posibles matches encontrados: {len(matches)}")
+    validation_results.append(f"Creativos con match: {matches['left'].nunique()}")
     
     # Crear directorio de outputs si no existe
-    outputs_dir = os.path.join(project_root, 'data', 'outputs')
-    os.makedirs(outputs_dir, exist_ok=True)
+    report_file = get_report_path()
+    os.makedirs(os.path.dirname(report_file), exist_ok=True)
     
     # Guardar reporte
-    report_file = os.path.join(outputs_dir, 'validation_report.txt')
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(validation_results))
     
@@ -106,4 +107,4 @@ def validate_staging_data():
     return True
 
 if __name__ == "__main__":
-    validate_staging_data() 
\ No newline at end of file
+    validate_staging_data() 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Tests for the materialized aggregate tables
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.transform.create_aggregates import create_all_aggregates
+
+FACT_AD = pd.DataFrame({
+    'date_key': [20210101, 20210101, 20210101, 20210201],
+    'campaign_key': [1, 1, 1, 1],
+    'site_key': [1, 1, 2, 1],
+    'creative_key': [1, 2, 1, 1],
+    'placement_key': [1, 1, 1, 1],
+    'size_key': [1, 1, 2, 1],
+    'impressions': [100.0, 50.0, 30.0, 20.0],
+    'clicks': [1.0, 2.0, 3.0, 4.0],
+})
+FACT_WEB = pd.DataFrame({
+    'date_key': [20210101, 20210101, 20210201],
+    'campaign_key': [1, 1, 1],
+    'source_key': [1, 1, 2],
+    'device_key': [1, 1, 2],
+    'ad_content_key': [1, 2, 1],
+    'users': [5.0, 5.0, 1.0],
+    'new_users': [1.0, 1.0, 1.0],
+    'sessions': [10.0, 10.0, 2.0],
+    'pageviews': [20.0, 5.0, 2.0],
+    'avg_session_duration_sec': [30.0, 60.0, 90.0],
+    'bounce_rate': [0.0, 0.5, 0.1],
+})
+
+
+def test_aggregates_keep_the_fact_totals():
+    """Each aggregate table sums back to the fact totals"""
+    aggregates = create_all_aggregates(FACT_AD, FACT_WEB, save=False)
+
+    for name in ['agg_month_site', 'agg_month_creative_size']:
+        assert aggregates[name]['impressions'].sum() == FACT_AD['impressions'].sum()
+        assert aggregates[name]['row_count'].sum() == len(FACT_AD)
+    assert aggregates['agg_month_device_source']['sessions'].sum() == FACT_WEB['sessions'].sum()
+    assert aggregates['agg_month_site'][['date_key', 'site_key', 'impressions']].values.tolist() == [
+        [20210101, 1, 150.0], [20210101, 2, 30.0], [20210201, 1, 20.0]]
+
+
+def test_averages_can_be_rolled_up_from_sums():
+    """Non-additive measures are stored as sums so averages survive re-aggregation"""
+    aggregates = create_all_aggregates(FACT_AD, FACT_WEB, save=False)
+
+    by_month = aggregates['agg_month_device_source'].groupby('date_key')[['bounce_rate_sum', 'row_count']].sum()
+    assert (by_month['bounce_rate_sum'] / by_month['row_count']).tolist() == pytest.approx(
+        FACT_WEB.groupby('date_key')['bounce_rate'].mean().tolist())
+
+    totals = aggregates['agg_totals'].iloc[0]
+    assert totals['ad_row_count'] == 4 and totals['web_row_count'] == 3
+    assert totals['avg_session_duration_sec_sum'] / totals['web_row_count'] == pytest.approx(60.0)
@@ -0,0 +1,51 @@
+"""
+Tests for the synthetic exports and the benchmark regression check
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.extract.extract_and_clean import clean_ga_frame, clean_rfi_frame
+from etl.run_benchmarks import compare_to_baseline
+from etl.utils.synthetic_data import generate_synthetic_sources
+
+
+def test_synthetic_exports_are_reproducible(tmp_path):
+    """The same seed produces byte-identical files"""
+    first = generate_synthetic_sources(str(tmp_path / 'a'), 500, 42, chunk_rows=500)
+    second = generate_synthetic_sources(str(tmp_path / 'b'), 500, 42, chunk_rows=500)
+
+    for a, b in zip(first, second):
+        assert Path(a).read_bytes() == Path(b).read_bytes()
+
+
+def test_synthetic_exports_match_real_layout(tmp_path):
+    """The extract cleaners parse the synthetic exports without numeric failures"""
+    rfi_file, ga_file = generate_synthetic_sources(str(tmp_path), 1000, 42, chunk_rows=300)
+
+    rfi, rfi_failures = clean_rfi_frame(pd.read_csv(rfi_file, sep=';'))
+    ga, ga_failures = clean_ga_frame(pd.read_csv(ga_file, sep=';'))
+
+    assert sum(rfi_failures.values()) == 0
+    assert sum(ga_failures.values()) == 0
+    assert 0 < len(rfi) <= 1000
+    assert len(ga) == 1000
+    assert (ga['pageviews'] >= ga['sessions']).all()
+
+
+def test_compare_to_baseline_flags_slower_stages():
+    """Only stages slower than the tolerance and above the noise floor are reported"""
+    def run(extract_rate, kpi_rate):
+        return {'runs': {'10000': {'stages': {
+            'extract_rfi': {'wall_seconds': 1.0, 'rows_per_second': extract_rate, 'peak_rss_mb': 100},
+            'kpi_summary': {'wall_seconds': 0.001, 'rows_per_second': kpi_rate, 'peak_rss_mb': 100},
+        }}}}
+
+    baseline = run(10000, 10000)
+
+    assert compare_to_baseline(run(9000, 10), baseline, tolerance=0.25) == []
+    assert len(compare_to_baseline(run(5000, 10000), baseline, tolerance=0.25)) == 1
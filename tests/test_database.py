@@ -0,0 +1,66 @@
+"""
+Tests for the embedded database load target
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "etl"))
+
+from etl.utils.database import get_database, write_tables
+from etl.load.kpi_engine import compute_kpi_aggregates, compute_kpi_aggregates_sql
+
+FACT = pd.DataFrame({
+    'date_key': [20210101, 20210101, 20210201, 20210201],
+    'site_key': pd.array([1, 2, 1, None], dtype='Int64'),
+    'impressions': [100.0, 50.0, 30.0, 20.0],
+    'clicks': [1.0, np.nan, 3.0, 4.0],
+})
+DIM_SITE = pd.DataFrame({'site_key': [1, 2], 'site_name': ['A', 'B']})
+CUTS = {
+    'totals': {'fact': 'fact_ad_performance', 'group_by': [], 'row_count': True,
+               'measures': {'impressions': 'sum', 'clicks': 'mean'}},
+    'by_site': {'fact': 'fact_ad_performance', 'group_by': ['site_key'],
+                'measures': {'impressions': 'sum', 'clicks': 'sum'},
+                'ratios': {'ctr': ('clicks', 'impressions', 100)}},
+    'by_month_site': {'fact': 'fact_ad_performance', 'group_by': ['date_key', 'site_key'],
+                      'measures': {'clicks': 'mean'}},
+}
+
+
+def test_write_tables_creates_typed_tables_with_keys_and_indexes(tmp_path):
+    """Dimensions get a primary key, facts an index per foreign key"""
+    database = get_database('sqlite', str(tmp_path / 'model'))
+    write_tables(database, [('dim_site', DIM_SITE, 'site_key', []),
+                            ('fact_ad_performance', FACT, None, ['date_key', 'site_key'])])
+
+    assert database.path.endswith('.sqlite')
+    connection = sqlite3.connect(database.path)
+    columns = {row[1]: (row[2], row[5]) for row in connection.execute("PRAGMA table_info(dim_site)")}
+    assert columns == {'site_key': ('BIGINT', 1), 'site_name': ('VARCHAR', 0)}
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(fact_ad_performance)")}
+    assert indexes == {'idx_fact_ad_performance_date_key', 'idx_fact_ad_performance_site_key'}
+    assert connection.execute("SELECT COUNT(*), COUNT(site_key) FROM fact_ad_performance").fetchone() == (4, 3)
+
+
+def test_sql_pushdown_matches_the_pandas_engine(tmp_path):
+    """The KPI cuts computed in the database equal the in-memory ones"""
+    database = get_database('sqlite', str(tmp_path / 'model'))
+    write_tables(database, [('fact_ad_performance', FACT, None, ['site_key'])])
+
+    expected = compute_kpi_aggregates({'fact_ad_performance': FACT}, CUTS)
+    result = compute_kpi_aggregates_sql(database, CUTS)
+    for name in CUTS:
+        pd.testing.assert_frame_equal(result[name], expected[name], check_dtype=False)
+
+
+def test_write_tables_replaces_existing_tables(tmp_path):
+    database = get_database('sqlite', str(tmp_path / 'model'))
+    write_tables(database, [('dim_site', DIM_SITE, 'site_key', [])])
+    write_tables(database, [('dim_site', DIM_SITE.head(1), 'site_key', [])])
+    assert database.query("SELECT * FROM dim_site")['site_name'].tolist() == ['A']
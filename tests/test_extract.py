@@ -0,0 +1,111 @@
+"""
+Tests for RFI/GA extraction helpers
+"""
+import sys
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import etl.extract.extract_and_clean as extract_and_clean
+from etl.extract.extract_and_clean import (
+    LINEAGE_COLUMNS,
+    RFI_STAGING_COLUMNS,
+    clean_rfi_frame,
+    find_source_files,
+    merge_failures,
+    read_sources,
+    stream_to_staging,
+)
+from etl.utils.storage import load_table
+from etl.utils.utils import ParseFailures
+
+RFI_SAMPLE = (
+    "Campaign;Month;Site (Site Directory);Placement - DCM;Creative;"
+    "Creative Dimensions;Platform Type;Impressions;Clicks\n"
+    "C1;2021-01;Site A;P1;SD_1623_v3_50;160x600;;494;8\n"
+    "C1;2021-01;Site B;P2;SD_1623_v3_50;300x250;;0;0\n"
+    "C1;2021-02;Site A;P1;SD_1624_v3_Symptom;728x90;;1,200;3\n"
+    "C2;2021-02;;P3;SD_1624_v3_Symptom;728x90;;abc;1\n"
+)
+
+
+def test_chunked_staging_matches_full_extraction(tmp_path):
+    """Streaming by chunks produces the same staging as a full read"""
+    source = tmp_path / "RFI.csv"
+    source.write_text(RFI_SAMPLE, encoding="utf-8")
+
+    rows, failures = stream_to_staging(source, clean_rfi_frame, tmp_path, 'rfi_staging', 2,
+                                       RFI_STAGING_COLUMNS + LINEAGE_COLUMNS)
+
+    expected, expected_failures = read_sources([source], clean_rfi_frame)
+    streamed = load_table(tmp_path, 'rfi_staging')
+    assert rows == len(expected) == 3
+    assert failures == expected_failures == {'impressions': 1, 'clicks': 0}
+    pd.testing.assert_frame_equal(streamed, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_chunked_staging_empty_export(tmp_path):
+    """An export with only the header still produces a staging header"""
+    source = tmp_path / "RFI.csv"
+    source.write_text(RFI_SAMPLE.splitlines()[0] + "\n", encoding="utf-8")
+    staging = tmp_path / "rfi_staging.csv"
+
+    rows, _ = stream_to_staging(source, clean_rfi_frame, tmp_path, 'rfi_staging', 2,
+                                RFI_STAGING_COLUMNS + LINEAGE_COLUMNS)
+
+    assert rows == 0
+    assert list(pd.read_csv(staging).columns) == RFI_STAGING_COLUMNS + LINEAGE_COLUMNS
+
+
+def test_merge_failures_keeps_duration_samples():
+    """Counts add up across chunks and the duration sample stays bounded"""
+    total = {}
+    merge_failures(total, {'sessions': 1, 'session_duration': ParseFailures(2, ['x', 'y'])})
+    merge_failures(total, {'sessions': 2, 'session_duration': ParseFailures(5, ['y', 'a', 'b', 'c', 'd'])})
+
+    assert total['sessions'] == 3
+    assert total['session_duration'] == 7
+    assert total['session_duration'].samples == ['x', 'y', 'a', 'b', 'c']
+
+
+def test_multiple_exports_are_read_in_parallel_with_lineage(tmp_path):
+    """Every export matching the pattern is cleaned, in file order, with its source file and row"""
+    lines = RFI_SAMPLE.splitlines()
+    (tmp_path / "RFI_market_a.csv").write_text("\n".join(lines[:3]) + "\n", encoding="utf-8")
+    (tmp_path / "RFI_market_b.csv").write_text("\n".join([lines[0]] + lines[3:]) + "\n", encoding="utf-8")
+
+    files = find_source_files(str(tmp_path / "RFI*.csv"), None, None)
+    staging, failures = read_sources(files, clean_rfi_frame, max_workers=2)
+
+    assert [Path(path).name for path in files] == ["RFI_market_a.csv", "RFI_market_b.csv"]
+    # The second row of market A has no impressions nor clicks and is filtered out
+    assert staging['source_file'].astype(str).tolist() == ["RFI_market_a.csv", "RFI_market_b.csv",
+                                                           "RFI_market_b.csv"]
+    assert staging['source_row'].tolist() == [1, 1, 2]
+    assert failures == {'impressions': 1, 'clicks': 0}
+
+
+def test_xlsx_export_matches_csv_staging(tmp_path, monkeypatch):
+    """An xlsx export with typed cells gives the same staging as the CSV, and is cached by hash"""
+    monkeypatch.setattr(extract_and_clean, 'get_xlsx_cache_dir', lambda: str(tmp_path / 'cache'))
+    csv_source = tmp_path / "RFI.csv"
+    csv_source.write_text(RFI_SAMPLE, encoding="utf-8")
+    frame = pd.read_csv(csv_source, sep=';')
+    workbook = openpyxl.Workbook()
+    workbook.active.append(list(frame.columns))
+    for row in frame.astype(object).itertuples(index=False):
+        workbook.active.append([None if pd.isna(value) else value for value in row])
+    workbook.save(tmp_path / "RFI.xlsx")
+
+    expected, expected_failures = read_sources([csv_source], clean_rfi_frame)
+    staging, failures = read_sources([tmp_path / "RFI.xlsx"], clean_rfi_frame)
+    cached, _ = read_sources([tmp_path / "RFI.xlsx"], clean_rfi_frame)
+
+    assert failures == expected_failures
+    pd.testing.assert_frame_equal(staging.drop(columns='source_file'), expected.drop(columns='source_file'))
+    pd.testing.assert_frame_equal(cached, staging)
+    assert len(list((tmp_path / 'cache').glob('*.parquet'))) == 1
@@ -0,0 +1,50 @@
+"""
+Tests for surrogate-key resolution in the fact builders
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.transform.create_facts import resolve_keys
+
+DIMENSIONS = {
+    'dim_site': pd.DataFrame({'site_key': [3, 1, 2], 'site_name': ['C site', 'A site', 'B site']}),
+    'dim_device': pd.DataFrame({'device_key': [1, 2], 'device_category': ['desktop', 'mobile']}),
+}
+SPECS = [
+    ('site', 'dim_site', 'site_name', 'site_key'),
+    ('device', 'dim_device', 'device_category', 'device_key'),
+]
+
+
+def test_resolve_keys_matches_left_merge():
+    """Keys agree with the chained left merges they replace"""
+    staging = pd.DataFrame({'site': ['B site', 'C site', 'B site', 'A site'],
+                            'device': ['mobile', 'desktop', 'desktop', 'mobile']})
+
+    keys, unmatched = resolve_keys(staging, DIMENSIONS, SPECS, 'fact_test')
+
+    merged = (staging
+              .merge(DIMENSIONS['dim_site'], left_on='site', right_on='site_name', how='left')
+              .merge(DIMENSIONS['dim_device'], left_on='device', right_on='device_category', how='left'))
+    assert keys['site_key'].tolist() == merged['site_key'].tolist() == [2, 3, 2, 1]
+    assert keys['device_key'].tolist() == merged['device_key'].tolist()
+    assert keys['site_key'].dtype == np.int64
+    assert unmatched == {}
+
+
+def test_resolve_keys_reports_unmatched_members():
+    """Rows without a dimension member get a null key and are reported"""
+    staging = pd.DataFrame({'site': ['A site', 'Z site', 'Z site'],
+                            'device': ['mobile', 'tablet', 'mobile']})
+
+    keys, unmatched = resolve_keys(staging, DIMENSIONS, SPECS, 'fact_test')
+
+    assert keys['site_key'].isna().tolist() == [False, True, True]
+    assert keys['site_key'].iloc[0] == 1
+    assert unmatched == {'site_key': ['Z site'], 'device_key': ['tablet']}
@@ -0,0 +1,125 @@
+"""
+Tests for month-keyed incremental loading
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.incremental import IncrementalState, merge_partitions, partition_fingerprints
+from etl.utils.storage import (is_partitioned, load_partitioned_table, read_partition_manifest,
+                               save_partitioned_table)
+import etl.transform.create_facts as create_facts
+from etl.transform.create_dimensions import merge_dimension_members
+
+RAW = pd.DataFrame({
+    'Month': ['2021-01', '2021-01', '2021-02'],
+    'Impressions': [494.0, 5499.0, 833.0],
+})
+MONTHS = RAW['Month'] + '-01'
+
+
+def test_fingerprints_ignore_row_order():
+    """Reordering rows inside a month keeps its fingerprint"""
+    shuffled = RAW.iloc[[1, 2, 0]]
+
+    assert partition_fingerprints(RAW, MONTHS) == partition_fingerprints(shuffled, MONTHS.iloc[[1, 2, 0]])
+
+
+def test_only_new_or_changed_months_are_detected(tmp_path):
+    """After a commit only modified or new months are reported"""
+    state_file = str(tmp_path / 'state.json')
+    state = IncrementalState.load(state_file)
+    assert state.detect_changes('rfi', RAW, MONTHS) == ['2021-01-01', '2021-02-01']
+    state.commit()
+
+    updated = pd.concat([RAW, pd.DataFrame({'Month': ['2021-03'], 'Impressions': [10.0]})],
+                        ignore_index=True)
+    updated.loc[2, 'Impressions'] = 900.0
+    state = IncrementalState.load(state_file)
+
+    assert state.detect_changes('rfi', updated, updated['Month'] + '-01') == ['2021-02-01', '2021-03-01']
+    assert state.changed_date_keys('rfi') == [20210201, 20210301]
+
+
+def load_incremental(state_file, facts_dir, raw):
+    """One incremental run: rewrite only the changed months of a partitioned fact"""
+    state = IncrementalState.load(state_file)
+    months = raw['Month'] + '-01'
+    changed = state.detect_changes('rfi', raw, months)
+    delta = raw[months.isin(changed).values]
+    fact_delta = pd.DataFrame({'date_key': (delta['Month'].str.replace('-', '') + '01').astype('int32'),
+                               'impressions': delta['Impressions']})
+    date_keys = state.changed_date_keys('rfi')
+    if is_partitioned(facts_dir, 'fact'):
+        save_partitioned_table(fact_delta, facts_dir, 'fact', partitions=date_keys)
+    else:
+        save_partitioned_table(fact_delta, facts_dir, 'fact')
+    state.commit()
+    return changed
+
+
+def test_removed_month_is_dropped_like_a_full_rebuild(tmp_path):
+    """A month that disappears from the export loses its rows, partition and fingerprint"""
+    state_file = str(tmp_path / 'state.json')
+    incremental_dir, full_dir = str(tmp_path / 'incremental'), str(tmp_path / 'full')
+    load_incremental(state_file, incremental_dir, RAW)
+
+    without_february = RAW[RAW['Month'] != '2021-02']
+    assert load_incremental(state_file, incremental_dir, without_february) == ['2021-02-01']
+    load_incremental(str(tmp_path / 'full_state.json'), full_dir, without_february)
+
+    incremental = load_partitioned_table(incremental_dir, 'fact')
+    full = load_partitioned_table(full_dir, 'fact')
+    pd.testing.assert_frame_equal(incremental, full)
+    assert read_partition_manifest(incremental_dir, 'fact') == read_partition_manifest(full_dir, 'fact')
+    assert sorted(p.name for p in (tmp_path / 'incremental' / 'fact').iterdir()) == \
+        sorted(p.name for p in (tmp_path / 'full' / 'fact').iterdir())
+    assert list(IncrementalState.load(state_file).partitions['rfi']) == ['2021-01-01']
+    # Bringing the month back is detected as new again
+    assert load_incremental(state_file, incremental_dir, RAW) == ['2021-02-01']
+
+
+def test_fact_merge_skips_the_old_rows_of_changed_months(tmp_path, monkeypatch):
+    """The old rows of a changed month are never read; only its partition is rewritten"""
+    monkeypatch.setattr(create_facts, 'get_facts_dir', lambda: str(tmp_path))
+    fact = pd.DataFrame({'date_key': [20210101, 20210201, 20210301], 'site_key': [1, 1, 2],
+                         'creative_key': [1, 1, 1], 'placement_key': [1, 1, 1], 'campaign_key': [1, 1, 1],
+                         'impressions': [494.0, 833.0, 10.0], 'clicks': [8.0, 9.0, 1.0]})
+    create_facts.save_fact(fact, 'fact_ad_performance')
+    january = (tmp_path / 'fact_ad_performance' / 'date_key=20210101.csv').stat().st_mtime_ns
+    # The changed month's old file is gone: reading it would fail
+    (tmp_path / 'fact_ad_performance' / 'date_key=20210201.csv').unlink()
+    delta = fact[fact['date_key'] == 20210201].assign(impressions=900.0)
+
+    merged = create_facts.merge_fact_delta(delta, 'fact_ad_performance', [20210201])
+
+    assert merged.sort_values('date_key')['impressions'].tolist() == [494.0, 900.0, 10.0]
+    assert (tmp_path / 'fact_ad_performance' / 'date_key=20210101.csv').stat().st_mtime_ns == january
+    reloaded = create_facts.load_fact('fact_ad_performance')
+    assert reloaded.sort_values('date_key')['impressions'].tolist() == [494.0, 900.0, 10.0]
+
+
+def test_merge_partitions_replaces_changed_months():
+    existing = pd.DataFrame({'date_key': [20210101, 20210201], 'clicks': [1, 2]})
+    delta = pd.DataFrame({'date_key': [20210201, 20210301], 'clicks': [20, 30]})
+
+    merged = merge_partitions(existing, delta, 'date_key', [20210201, 20210301])
+
+    assert merged.to_dict('list') == {'date_key': [20210101, 20210201, 20210301], 'clicks': [1, 20, 30]}
+
+
+def test_new_dimension_members_are_appended():
+    """Only members missing from the loaded dimension are added"""
+    existing = pd.DataFrame({'site_key': [1, 2], 'site_name': ['B site', 'D site']})
+    fresh = pd.DataFrame({'site_key': [1, 3, 4], 'site_name': ['B site', 'A site', 'C site']})
+
+    merged = merge_dimension_members(existing, fresh, 'site_key')
+
+    assert merged.to_dict('list') == {
+        'site_key': [1, 2, 3, 4],
+        'site_name': ['B site', 'D site', 'A site', 'C site'],
+    }
@@ -0,0 +1,30 @@
+"""
+Tests for the surrogate-key registry
+"""
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.key_registry import KeyRegistry
+
+
+def test_new_members_do_not_shift_existing_keys(tmp_path):
+    """A member sorting before the known ones gets the next free key"""
+    path = str(tmp_path / 'key_registry.json')
+    registry = KeyRegistry.load(path)
+    assert registry.assign('dim_site', ['B site', 'C site', 'B site']).tolist() == [1, 2, 1]
+    registry.save()
+
+    registry = KeyRegistry.load(path)
+
+    assert registry.assign('dim_site', ['A site', 'B site', 'C site']).tolist() == [3, 1, 2]
+
+
+def test_seed_keeps_loaded_keys(tmp_path):
+    """Keys of an already loaded dimension are adopted as they are"""
+    registry = KeyRegistry.load(str(tmp_path / 'key_registry.json'))
+    registry.seed('dim_device', ['desktop', 'mobile'], [2, 5])
+
+    assert registry.assign('dim_device', ['mobile', 'tablet', 'desktop']).tolist() == [5, 6, 2]
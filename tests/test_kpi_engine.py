@@ -0,0 +1,60 @@
+"""
+Tests for the declarative KPI aggregation engine
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.load.kpi_engine import compute_kpi_aggregates, fact_columns
+
+FACT = pd.DataFrame({
+    'site_key': pd.array([1, 1, 2, 2, None], dtype='Int64'),
+    'device_key': [1, 2, 1, 1, 2],
+    'clicks': [1.0, 2.0, 3.0, 4.0, 5.0],
+    'impressions': [10.0, 20.0, 30.0, 40.0, 50.0],
+    'bounce_rate': [0.1, 0.2, 0.3, 0.4, 0.5],
+})
+CUTS = {
+    'totals': {'fact': 'fact', 'group_by': [], 'measures': {'clicks': 'sum', 'bounce_rate': 'mean'}},
+    'by_site': {'fact': 'fact', 'group_by': ['site_key'],
+                'measures': {'impressions': 'sum', 'clicks': 'sum', 'bounce_rate': 'mean'},
+                'ratios': {'ctr': ('clicks', 'impressions', 100)}},
+    'by_device': {'fact': 'fact', 'group_by': ['device_key'], 'measures': {'bounce_rate': 'mean'}},
+}
+
+
+def test_cuts_match_direct_groupby():
+    """Every cut equals a separate groupby over the fact"""
+    results = compute_kpi_aggregates({'fact': FACT}, CUTS)
+
+    by_site = FACT.dropna().groupby('site_key').agg(
+        impressions=('impressions', 'sum'), clicks=('clicks', 'sum'), bounce_rate=('bounce_rate', 'mean'))
+    assert results['by_site']['clicks'].tolist() == by_site['clicks'].tolist()
+    assert results['by_site']['bounce_rate'].tolist() == pytest.approx(by_site['bounce_rate'].tolist())
+    assert results['by_site']['ctr'].tolist() == pytest.approx([10.0, 10.0])
+    assert results['by_device']['bounce_rate'].tolist() == pytest.approx([0.8 / 3, 0.35])
+
+
+def test_totals_include_rows_without_dimension_member():
+    """Rows with a null key are left out of the cuts but counted in the totals"""
+    results = compute_kpi_aggregates({'fact': FACT}, CUTS)
+
+    assert results['totals'].loc[0, 'clicks'] == 15.0
+    assert results['totals'].loc[0, 'bounce_rate'] == pytest.approx(0.3)
+    assert results['by_site']['clicks'].sum() == 10.0
+
+
+def test_fact_columns_projects_keys_and_measures():
+    assert fact_columns(CUTS, 'fact') == ['site_key', 'device_key', 'clicks', 'bounce_rate', 'impressions']
+
+
+def test_unknown_aggregation_raises():
+    cuts = {'bad': {'fact': 'fact', 'group_by': [], 'measures': {'clicks': 'median'}}}
+
+    with pytest.raises(ValueError):
+        compute_kpi_aggregates({'fact': FACT}, cuts)
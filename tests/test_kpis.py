@@ -0,0 +1,149 @@
+"""
+Tests for the KPI tables and the analysis report built from them
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import etl.load.generate_analysis_report as generate_analysis_report
+from etl.load.calculate_kpis import KPI_CUTS, calculate_all_kpis, calculate_kpis_by_creative
+from etl.load.kpi_engine import compute_kpi_aggregates
+from etl.load.kpi_format import format_kpis, kpi_value
+
+FACT_AD = pd.DataFrame({
+    'date_key': [20210101, 20210101, 20210201],
+    'site_key': [1, 2, 1],
+    'creative_key': [1, 1, 1],
+    'impressions': [2000000.0, 500.0, 1000.0],
+    'clicks': [2000.0, 5.0, 10.0],
+})
+FACT_WEB = pd.DataFrame({
+    'date_key': [20210101, 20210201],
+    'device_key': [1, 1],
+    'ad_content_key': [1, 1],
+    'users': [8.0, 2.0],
+    'sessions': [10.0, 5.0],
+    'pageviews': [20.0, 5.0],
+    'avg_session_duration_sec': [30.0, 60.0],
+    'bounce_rate': [0.5, 0.1],
+})
+DIMENSIONS = {
+    'dim_site': pd.DataFrame({'site_key': [1, 2], 'site_name': ['Health', 'News'],
+                              'site_category': ['General', 'News']}),
+    'dim_creative': pd.DataFrame({'creative_key': [1], 'creative_name': ['Banner_300x250_v1']}),
+    'dim_ad_content': pd.DataFrame({'ad_content_key': [1], 'ad_content_name': ['x.Banner.300']}),
+    'dim_device': pd.DataFrame({'device_key': [1], 'device_category': ['mobile']}),
+    'bridge_creative_adcontent': pd.DataFrame({'creative_key': [1], 'ad_content_key': [1],
+                                               'confidence_score': [1.0]}),
+}
+
+
+def test_report_is_built_from_in_memory_kpis(tmp_path, monkeypatch):
+    """The KPI tables are computed together and the report needs no staging or CSV reads"""
+    aggregates = compute_kpi_aggregates({'fact_ad_performance': FACT_AD, 'fact_web_analytics': FACT_WEB},
+                                        KPI_CUTS)
+    kpis = calculate_all_kpis(aggregates, DIMENSIONS, save=False, max_workers=4)
+    monkeypatch.setattr(generate_analysis_report, 'get_project_root', lambda: str(tmp_path))
+
+    reports = generate_analysis_report.generate_analysis_report(
+        kpis['kpi_summary'], kpis['kpi_by_site'], kpis['kpi_by_creative'], kpis['kpi_by_device'])
+    report = Path(reports['txt']).read_text(encoding='utf-8').split('\n')
+
+    assert sorted(kpis) == ['kpi_by_creative', 'kpi_by_device', 'kpi_by_site', 'kpi_summary']
+    assert kpis['kpi_by_site']['site_name'].tolist() == ['Health', 'News']
+    assert kpis['kpi_by_creative']['sessions'].tolist() == [15.0]
+    assert "• Clicks totales: 2,015" in report
+    assert (tmp_path / 'data' / 'outputs' / 'analysis_report.txt').exists()
+
+
+def test_report_is_rendered_in_every_format(tmp_path, monkeypatch):
+    """The same sections are written as text, Markdown, HTML and JSON; long lists are capped"""
+    aggregates = compute_kpi_aggregates({'fact_ad_performance': FACT_AD, 'fact_web_analytics': FACT_WEB},
+                                        KPI_CUTS)
+    kpis = calculate_all_kpis(aggregates, DIMENSIONS, save=False)
+    # Many low-CTR sites, one of them with markup in its name
+    sites = pd.DataFrame({'site_name': [f'Site <{i}>' for i in range(30)],
+                          'impressions': [1000.0 * (i + 1) for i in range(30)], 'ctr': 0.05})
+    monkeypatch.setattr(generate_analysis_report, 'get_project_root', lambda: str(tmp_path))
+
+    reports = generate_analysis_report.generate_analysis_report(
+        kpis['kpi_summary'], sites, kpis['kpi_by_creative'], kpis['kpi_by_device'],
+        formats=['txt', 'md', 'html', 'json'])
+
+    text = Path(reports['txt']).read_text(encoding='utf-8')
+    assert "  • Site <29>: 0.05% CTR" in text
+    assert "  • Site <9>: 0.05% CTR" not in text
+    assert "  … y 10 más" in text
+    assert "\n• mobile: 10 usuarios, 15 sesiones\n  - Duración promedio: 45s" in text
+    assert "- Site \\<29\\>: 0.05% CTR" in Path(reports['md']).read_text(encoding='utf-8')
+    assert "<li>Site &lt;29&gt;: 0.05% CTR</li>" in Path(reports['html']).read_text(encoding='utf-8')
+    report = json.loads(Path(reports['json']).read_text(encoding='utf-8'))
+    recommendations = report['sections'][-1]['blocks'][0]
+    assert len(recommendations['items']) == 20
+    assert recommendations['omitted'] == 10
+    devices = report['sections'][3]['blocks'][0]['items']
+    assert devices[0]['details'] == ['Duración promedio: 45s', 'Bounce rate: 30.0%']
+
+
+def test_report_handles_creatives_without_size(tmp_path, monkeypatch):
+    """An empty size list (no NxM in any creative name) is rendered instead of failing"""
+    aggregates = compute_kpi_aggregates({'fact_ad_performance': FACT_AD, 'fact_web_analytics': FACT_WEB},
+                                        KPI_CUTS)
+    dimensions = dict(DIMENSIONS, dim_creative=pd.DataFrame({'creative_key': [1],
+                                                             'creative_name': ['Banner_generico']}))
+    kpis = calculate_all_kpis(aggregates, dimensions, save=False)
+    monkeypatch.setattr(generate_analysis_report, 'get_project_root', lambda: str(tmp_path))
+
+    reports = generate_analysis_report.generate_analysis_report(
+        kpis['kpi_summary'], kpis['kpi_by_site'], kpis['kpi_by_creative'], kpis['kpi_by_device'],
+        formats=['txt', 'json'])
+
+    text = Path(reports['txt']).read_text(encoding='utf-8')
+    assert "Mejor creativo por CTR: Banner_generico" in text
+    assert "Rendimiento por tamaño de creativo:" in text
+    sizes = json.loads(Path(reports['json']).read_text(encoding='utf-8'))['sections'][2]['blocks'][1]
+    assert sizes['items'] == []
+
+
+def test_creative_bounce_rate_is_weighted_by_sessions():
+    """Ad_contents of one creative are combined by sessions, not averaged as equals"""
+    fact_web = pd.DataFrame({
+        'date_key': [20210101, 20210101], 'device_key': [1, 1], 'ad_content_key': [1, 2],
+        'users': [8.0, 4.0], 'sessions': [10.0, 5.0], 'pageviews': [20.0, 5.0],
+        'avg_session_duration_sec': [30.0, 60.0], 'bounce_rate': [0.5, 0.1],
+    })
+    dimensions = dict(DIMENSIONS,
+                      dim_ad_content=pd.DataFrame({'ad_content_key': [1, 2],
+                                                   'ad_content_name': ['x.Banner.300', 'y.Banner.300']}),
+                      bridge_creative_adcontent=pd.DataFrame({'creative_key': [1, 1], 'ad_content_key': [1, 2],
+                                                              'confidence_score': [1.0, 0.8]}))
+    aggregates = compute_kpi_aggregates({'fact_ad_performance': FACT_AD, 'fact_web_analytics': fact_web},
+                                        KPI_CUTS)
+
+    creative = calculate_kpis_by_creative(aggregates, dimensions, save=False).iloc[0]
+
+    # (0.5 * 10 + 0.1 * 5) / 15, where a plain mean would give 0.30
+    assert creative['bounce_rate'] == 0.37
+    assert creative['sessions'] == 15.0
+    assert creative['users'] == 12.0
+
+
+def test_summary_kpis_are_numeric_and_formatted_separately():
+    """Values keep full precision with a unit; display text comes from the formatting layer"""
+    aggregates = compute_kpi_aggregates({'fact_ad_performance': FACT_AD, 'fact_web_analytics': FACT_WEB},
+                                        KPI_CUTS)
+    summary = calculate_all_kpis(aggregates, DIMENSIONS, save=False)['kpi_summary']
+
+    assert summary['value'].dtype == 'float64'
+    assert kpi_value(summary, 'CTR (%)') == 2015 / 2001500 * 100
+    assert kpi_value(summary, 'Avg Bounce Rate (%)') == 30.0
+    display = format_kpis(summary).set_index('metric')['display']
+    assert display['Total Impressions'] == '2,001,500'
+    assert display['CTR (%)'] == '0.10%'
+    assert display['Avg Bounce Rate (%)'] == '30.0%'
+    assert display['Avg Session Duration (sec)'] == '45'
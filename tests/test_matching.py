@@ -0,0 +1,88 @@
+"""
+Tests for the creative / ad_content matching engine
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.matching import match_names, tokenize
+from etl.transform.create_dimensions import create_bridge_table
+from etl.load.calculate_kpis import calculate_kpis_by_creative
+
+
+def test_tokenize_splits_separators_case_and_digits():
+    """Both naming styles share the creative code tokens"""
+    assert tokenize('SD_1623_v3_50') == ['sd', '1623', '50']
+    assert tokenize('AudienceSDOnly.NU1623Unbranded50.160') == [
+        'audience', 'sd', 'only', 'nu', '1623', 'unbranded', '50', '160',
+    ]
+
+
+def test_match_names_scores_by_shared_rare_tokens():
+    """Exact creative names score 1.0, a shared size alone is not a match"""
+    creatives = pd.Series(['SD_1624_v3_Symptom', 'SD_1623_v3_50', '(not set)'])
+    ad_contents = pd.Series([
+        'AcuityCrossixTargeting.SD_1624_v3_Symptom.728',
+        'MiQCrossixTargeting.SD_1623_v3_50.728',
+        'MiQCrossixTargeting.Dermicool_SDP_DTP_TalkToYourDoctor.728',
+        '(not set)',
+    ])
+
+    matches = match_names(creatives, ad_contents)
+
+    assert list(zip(matches['left'], matches['right'])) == [
+        ('SD_1623_v3_50', 'MiQCrossixTargeting.SD_1623_v3_50.728'),
+        ('SD_1624_v3_Symptom', 'AcuityCrossixTargeting.SD_1624_v3_Symptom.728'),
+    ]
+    assert matches['confidence_score'].tolist() == [1.0, 1.0]
+
+
+def test_bridge_table_maps_matches_to_keys():
+    """The bridge holds surrogate keys and a confidence below 1 for partial matches"""
+    dim_creative = pd.DataFrame({
+        'creative_key': [1, 2],
+        'creative_name': ['(not set)', 'Dermicool_SDP_DTP_TalkToYourDoctor_728x90_v1'],
+    })
+    dim_ad_content = pd.DataFrame({
+        'ad_content_key': [10, 11, 12],
+        'ad_content_name': ['AcuityCrossixTargeting.Dermicool_SDP_DTP_TalkToYourDoctor.728',
+                            'AcuityCrossixTargeting.SD_1624_v3_Symptom.320',
+                            'SDAPP.NU2333SpeakUp.320'],
+    })
+
+    bridge = create_bridge_table(dim_creative, dim_ad_content, save=False)
+
+    assert bridge['creative_key'].tolist() == [2]
+    assert bridge['ad_content_key'].tolist() == [10]
+    assert bridge['confidence_score'].dtype == 'float32'
+    assert 0.5 <= bridge['confidence_score'].iloc[0] < 1.0
+
+
+def test_creative_kpis_count_each_ad_content_once():
+    """An ad_content matched by two creatives adds its sessions to the best match only"""
+    dimensions = {
+        'dim_creative': pd.DataFrame({'creative_key': [1, 2], 'creative_name': ['A', 'A_728x90']}),
+        'dim_ad_content': pd.DataFrame({'ad_content_key': [10, 11], 'ad_content_name': ['x.A.728', 'y.A.300']}),
+        'bridge_creative_adcontent': pd.DataFrame({
+            'creative_key': [1, 1, 2, 2],
+            'ad_content_key': [10, 11, 10, 11],
+            'confidence_score': [1.0, 1.0, 0.8, 0.6],
+        }),
+    }
+    aggregates = {
+        'by_creative': pd.DataFrame({'creative_key': [1, 2], 'impressions': [1000, 500],
+                                     'clicks': [10, 5], 'ctr': [1.0, 1.0]}),
+        'by_ad_content': pd.DataFrame({'ad_content_key': [10, 11], 'sessions': [6, 2],
+                                       'users': [4, 2], 'bounce_rate': [0.5, 0.0]}),
+    }
+
+    kpis = calculate_kpis_by_creative(aggregates, dimensions, save=False)
+
+    assert kpis['creative_name'].tolist() == ['A', 'A_728x90']
+    assert kpis['sessions'].iloc[0] == 8
+    assert kpis['bounce_rate'].iloc[0] == 0.38
+    assert pd.isna(kpis['sessions'].iloc[1])
@@ -0,0 +1,109 @@
+"""
+Tests for the in-memory ETL pipeline
+"""
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.pipeline import Pipeline, PipelineContext
+
+
+def test_stages_run_in_dependency_order():
+    """Stages run after the stages that produce their inputs"""
+    calls = []
+    pipeline = Pipeline(PipelineContext(save_csv=False))
+    pipeline.add_stage('double', lambda x, save: calls.append('double') or x * 2,
+                       inputs=['base'], outputs=['doubled'])
+    pipeline.add_stage('base', lambda save: calls.append('base') or 21,
+                       outputs=['base'])
+
+    context = pipeline.run()
+
+    assert calls == ['base', 'double']
+    assert context.get('doubled') == 42
+
+
+def test_save_flag_is_passed_only_to_sinks():
+    """Only sink stages receive the save flag from the context"""
+    received = {}
+    pipeline = Pipeline(PipelineContext(save_csv=False))
+    pipeline.add_stage('producer', lambda save: received.setdefault('save', save) or 1,
+                       outputs=['value'])
+    pipeline.add_stage('report', lambda value: received.setdefault('value', value),
+                       inputs=['value'], sink=False)
+
+    pipeline.run()
+
+    assert received == {'save': False, 'value': 1}
+
+
+def test_multiple_outputs_from_dict():
+    """Stages with several outputs can return a dict keyed by table name"""
+    pipeline = Pipeline()
+    pipeline.add_stage('split', lambda save: {'a': 1, 'b': 2}, outputs=['a', 'b'])
+
+    context = pipeline.run()
+
+    assert context.get('a') == 1
+    assert context.get('b') == 2
+
+
+def test_missing_input_raises():
+    """A stage whose input nobody produces is rejected"""
+    pipeline = Pipeline()
+    pipeline.add_stage('orphan', lambda x, save: x, inputs=['missing'])
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+
+def test_circular_dependency_raises():
+    """Circular dependencies between stages are rejected"""
+    pipeline = Pipeline()
+    pipeline.add_stage('a', lambda b, save: b, inputs=['b'], outputs=['a'])
+    pipeline.add_stage('b', lambda a, save: a, inputs=['a'], outputs=['b'])
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+
+def test_independent_stages_run_in_parallel():
+    """With several workers, stages without dependencies run at the same time"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(value):
+        # Each stage waits for the other one; run in sequence this would time out
+        def stage(save):
+            barrier.wait()
+            return value
+        return stage
+
+    pipeline = Pipeline(PipelineContext(save_csv=False))
+    pipeline.add_stage('left', meet('l'), outputs=['left'])
+    pipeline.add_stage('right', meet('r'), outputs=['right'])
+    pipeline.add_stage('join', lambda left, right, save: left + right,
+                       inputs=['left', 'right'], outputs=['joined'])
+
+    context = pipeline.run(max_workers=2)
+
+    assert context.get('joined') == 'lr'
+
+
+def test_parallel_run_propagates_stage_errors():
+    """A failing stage stops the run and its dependents never start"""
+    calls = []
+
+    def fail(save):
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline()
+    pipeline.add_stage('fail', fail, outputs=['value'])
+    pipeline.add_stage('after', lambda value, save: calls.append(value), inputs=['value'])
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(max_workers=2)
+    assert calls == []
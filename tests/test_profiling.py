@@ -0,0 +1,54 @@
+"""
+Tests for per-stage profiling and the run manifest
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.pipeline import Pipeline, PipelineContext
+from etl.utils.profiling import start_profiling, stop_profiling
+from etl.utils.storage import load_table, save_table
+
+
+def test_pipeline_stages_are_profiled(tmp_path):
+    """Each stage records its rows and the bytes it moved through storage"""
+    def produce(save):
+        df = pd.DataFrame({'value': range(10)})
+        save_table(df, str(tmp_path), 'numbers')
+        return df
+
+    def consume(numbers, save):
+        return load_table(str(tmp_path), 'numbers').head(3)
+
+    pipeline = Pipeline(PipelineContext())
+    pipeline.add_stage('produce', produce, outputs=['numbers'])
+    pipeline.add_stage('consume', consume, inputs=['numbers'], outputs=['head'])
+
+    profiler = start_profiling()
+    try:
+        pipeline.run()
+    finally:
+        stop_profiling()
+
+    manifest_path = profiler.write_manifest(str(tmp_path / 'run_manifest.json'), status='ok')
+    stages = {stage['stage']: stage for stage in json.loads(Path(manifest_path).read_text())['stages']}
+    size = (tmp_path / 'numbers.csv').stat().st_size
+    assert stages['produce']['rows_out'] == 10
+    assert stages['produce']['bytes_written'] == size
+    assert stages['consume']['rows_in'] == 10
+    assert stages['consume']['rows_out'] == 3
+    assert stages['consume']['bytes_read'] == size
+    assert all(stage['status'] == 'ok' and stage['wall_seconds'] >= 0 for stage in stages.values())
+
+
+def test_stages_are_not_profiled_without_profiler():
+    """Without an active profiler the pipeline runs as before"""
+    pipeline = Pipeline(PipelineContext(save_csv=False))
+    pipeline.add_stage('value', lambda save: 1, outputs=['value'])
+
+    assert pipeline.run().get('value') == 1
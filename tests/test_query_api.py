@@ -0,0 +1,88 @@
+"""
+Tests for the query API over the dimensional model
+"""
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.load.query_api import QueryEngine, ResultCache
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A tiny star schema: one fact and the two dimensions it links to"""
+    (tmp_path / 'facts').mkdir()
+    (tmp_path / 'dimensions').mkdir()
+    pd.DataFrame({
+        'date_key': [20210101, 20210101, 20210201, 20210201],
+        'site_key': [1, 2, 1, 3],
+        'impressions': [100.0, 50.0, 30.0, 20.0],
+        'clicks': [1.0, 2.0, 3.0, 4.0],
+    }).to_csv(tmp_path / 'facts' / 'fact_ad_performance.csv', index=False)
+    pd.DataFrame({
+        'site_key': [1, 2, 3],
+        'site_name': ['Health Site', 'News Site', 'Other News'],
+        'site_category': ['Health', 'News', 'News'],
+    }).to_csv(tmp_path / 'dimensions' / 'dim_site.csv', index=False)
+    pd.DataFrame({
+        'date': ['2021-01-01', '2021-02-01'],
+        'date_key': [20210101, 20210201],
+        'month_name': ['January', 'February'],
+        'year': [2021, 2021],
+    }).to_csv(tmp_path / 'dimensions' / 'dim_date.csv', index=False)
+    return tmp_path
+
+
+def test_query_groups_and_filters_by_dimension_attributes(model_dir):
+    """Dimension attributes are resolved through the surrogate keys"""
+    engine = QueryEngine(str(model_dir))
+    result = engine.query('fact_ad_performance', {'impressions': 'sum', 'clicks': 'sum'},
+                          group_by=['site_category'], filters={'month_name': 'February'},
+                          ratios={'ctr': ('clicks', 'impressions', 100)}, order_by=['-clicks'])
+
+    assert result['site_category'].tolist() == ['News', 'Health']
+    assert result['impressions'].tolist() == [20.0, 30.0]
+    assert result['ctr'].tolist() == [20.0, 10.0]
+
+
+def test_repeated_query_is_served_from_cache_until_data_changes(model_dir):
+    """The cache key includes the data version of the tables used"""
+    engine = QueryEngine(str(model_dir))
+    args = ('fact_ad_performance', {'clicks': 'sum'}, ['site_name'])
+    first = engine.query(*args)
+    first.loc[0, 'clicks'] = -1  # a caller mutating its result must not touch the cache
+    second = engine.query(*args)
+    assert engine.cache.info()['hits'] == 1
+    assert second['clicks'].tolist() == [4.0, 2.0, 4.0]
+
+    fact_path = model_dir / 'facts' / 'fact_ad_performance.csv'
+    fact = pd.read_csv(fact_path)
+    fact['clicks'] = fact['clicks'] * 10
+    fact.to_csv(fact_path, index=False)
+    stat = os.stat(fact_path)
+    os.utime(fact_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert engine.query(*args)['clicks'].tolist() == [40.0, 20.0, 40.0]
+    assert engine.cache.info()['hits'] == 1
+
+
+def test_query_rejects_unknown_columns(model_dir):
+    engine = QueryEngine(str(model_dir))
+    with pytest.raises(ValueError, match="desconocidas"):
+        engine.query('fact_ad_performance', {'clicks': 'sum'}, group_by=['device_category'])
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
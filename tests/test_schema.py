@@ -0,0 +1,60 @@
+"""
+Tests for the table dtype registry
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.schema import apply_schema
+from etl.utils.storage import get_storage, load_table, save_table
+
+
+def test_apply_schema_downcasts_declared_columns():
+    """Strings become categoricals, whole counts int32, keys with nulls nullable ints"""
+    staging = pd.DataFrame({
+        'date': ['2021-01-01', '2021-01-01', '2021-02-01'],
+        'device': ['mobile', 'desktop', 'mobile'],
+        'sessions': [3.0, 0.0, 12.0],
+        'avg_session_duration_sec': [840.0, 12.5, 0.0],
+        'extra': ['a', 'b', 'c'],
+    })
+
+    conformed = apply_schema(staging, 'ga_staging')
+
+    assert conformed['date'].dtype == 'category'
+    assert conformed['device'].dtype == 'category'
+    assert conformed['sessions'].dtype == 'int32'
+    assert conformed['avg_session_duration_sec'].dtype == 'float32'
+    assert conformed['extra'].dtype == staging['extra'].dtype
+    assert conformed['sessions'].tolist() == [3, 0, 12]
+
+    fact = apply_schema(pd.DataFrame({'site_key': [1.0, None]}), 'fact_ad_performance')
+    assert str(fact['site_key'].dtype) == 'Int32'
+
+
+def test_apply_schema_keeps_fractional_counts():
+    """A count with decimals is left as float64 instead of being truncated"""
+    staging = pd.DataFrame({'impressions': [815.153, 494.0]})
+
+    conformed = apply_schema(staging, 'rfi_staging')
+
+    assert conformed['impressions'].dtype == 'float64'
+    assert conformed['impressions'].tolist() == [815.153, 494.0]
+
+
+def test_csv_tables_are_read_with_declared_types(tmp_path):
+    """load_table applies the registry to CSV, which stores no types"""
+    storage = get_storage('csv')
+    fact = pd.DataFrame({'date_key': [20210101], 'site_key': [7], 'impressions': [494.0], 'clicks': [8.0]})
+    save_table(fact, tmp_path, 'fact_ad_performance', storage=storage)
+
+    loaded = load_table(tmp_path, 'fact_ad_performance', storage=storage)
+
+    assert dict(loaded.dtypes.astype(str)) == {
+        'date_key': 'int32', 'site_key': 'int32', 'impressions': 'int32', 'clicks': 'int32',
+    }
+    assert (tmp_path / 'fact_ad_performance.csv').read_text().splitlines()[1] == '20210101,7,494,8'
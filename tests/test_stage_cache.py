@@ -0,0 +1,119 @@
+"""
+Tests for content-hash stage caching in the pipeline
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.pipeline import Pipeline, PipelineContext
+from etl.utils.stage_cache import StageCache, code_fingerprint
+
+
+def build(tmp_path, source, calls):
+    """source file -> 'raw' (written to disk) -> 'parity' -> 'report'"""
+    raw_file = tmp_path / 'raw.csv'
+
+    def extract(save):
+        calls.append('extract')
+        df = pd.read_csv(source)
+        df.to_csv(raw_file, index=False)
+        return df
+
+    def parity(raw, save):
+        calls.append('parity')
+        return pd.DataFrame({'even': raw['value'] % 2 == 0})
+
+    def report(parity, save):
+        calls.append('report')
+        return parity
+
+    cache = StageCache.load(str(tmp_path / 'cache.json'))
+    pipeline = Pipeline(PipelineContext(), cache=cache)
+    pipeline.add_stage('extract', extract, outputs=['raw'], sources=[str(source)],
+                       artifacts=[str(raw_file)], load=lambda: pd.read_csv(raw_file))
+    pipeline.add_stage('parity', parity, inputs=['raw'], outputs=['parity'])
+    pipeline.add_stage('report', report, inputs=['parity'], outputs=['report'])
+    return pipeline, cache
+
+
+def run(tmp_path, source):
+    calls = []
+    pipeline, cache = build(tmp_path, source, calls)
+    pipeline.run()
+    cache.commit()
+    return calls, pipeline.context
+
+
+def test_unchanged_run_skips_every_stage(tmp_path):
+    """With the same source file nothing is executed again"""
+    source = tmp_path / 'source.csv'
+    pd.DataFrame({'value': [1, 2, 3]}).to_csv(source, index=False)
+    assert run(tmp_path, source)[0] == ['extract', 'parity', 'report']
+
+    calls, context = run(tmp_path, source)
+
+    assert calls == []
+    # A skipped stage without a loader is recomputed only if its output is requested
+    assert context.get('report')['even'].tolist() == [False, True, False]
+    assert calls == ['parity', 'report']
+
+
+def test_changed_source_reruns_only_until_outputs_stop_changing(tmp_path):
+    """A stage whose re-run gives the same content does not invalidate the next ones"""
+    source = tmp_path / 'source.csv'
+    pd.DataFrame({'value': [1, 2, 3]}).to_csv(source, index=False)
+    run(tmp_path, source)
+
+    pd.DataFrame({'value': [5, 4, 7]}).to_csv(source, index=False)
+    calls, _ = run(tmp_path, source)
+
+    assert calls == ['extract', 'parity']
+
+
+def test_missing_artifact_forces_rerun(tmp_path):
+    source = tmp_path / 'source.csv'
+    pd.DataFrame({'value': [1]}).to_csv(source, index=False)
+    run(tmp_path, source)
+
+    (tmp_path / 'raw.csv').unlink()
+    calls, _ = run(tmp_path, source)
+
+    assert calls == ['extract']
+
+
+def test_changed_helper_module_forces_rerun(tmp_path, monkeypatch):
+    """Editing a helper the stage imports (not the stage's own module) invalidates the cache"""
+    code_dir = tmp_path / 'etl'
+    (code_dir / 'helpers').mkdir(parents=True)
+    helper = code_dir / 'helpers' / 'labels.py'
+    helper.write_text("LABEL = '{:,.0f}'\n", encoding='utf-8')
+    (code_dir / 'stage.py').write_text(
+        "from helpers import labels\n"
+        "def format_total(calls, save):\n"
+        "    calls.append('format')\n"
+        "    return labels.LABEL.format(1234)\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(code_dir))
+
+    def run_stage():
+        for module in ('stage', 'helpers.labels', 'helpers'):
+            sys.modules.pop(module, None)
+        import stage
+        calls = []
+        cache = StageCache.load(str(tmp_path / 'cache.json'), tag={'code': code_fingerprint(str(code_dir))})
+        pipeline = Pipeline(PipelineContext(), cache=cache)
+        pipeline.add_stage('format', lambda save: stage.format_total(calls, save), outputs=['total'])
+        pipeline.run()
+        cache.commit()
+        # A skipped output without a loader is recomputed when requested: copy the calls first
+        return list(calls), pipeline.context.get('total')
+
+    assert run_stage() == (['format'], '1,234')
+    assert run_stage()[0] == []
+
+    helper.write_text("LABEL = '{:.0f}'\n", encoding='utf-8')
+
+    assert run_stage() == (['format'], '1234')
@@ -0,0 +1,141 @@
+"""
+Tests for the table storage backends
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import etl.utils.storage as storage_module
+from etl.utils.storage import (find_table_storage, get_storage, load_partitioned_table, load_table,
+                               open_table_writer, partition_stats, save_partitioned_table, save_table)
+
+FACT = pd.DataFrame({
+    'date_key': [20210101, 20210201],
+    'site_key': [1, 2],
+    'impressions': [494.0, 5499.0],
+    'clicks': [8.0, 81.0],
+})
+
+
+def test_csv_round_trip_with_projection(tmp_path):
+    """CSV tables can be read back restricted to some columns"""
+    storage = get_storage('csv')
+    save_table(FACT, tmp_path, 'fact', storage=storage)
+
+    loaded = load_table(tmp_path, 'fact', columns=['site_key', 'clicks'], storage=storage)
+
+    assert (tmp_path / 'fact.csv').exists()
+    assert list(loaded.columns) == ['site_key', 'clicks']
+    assert loaded['clicks'].tolist() == [8.0, 81.0]
+
+
+def test_parquet_round_trip_keeps_dtypes(tmp_path):
+    """Parquet tables keep their dtypes and support projection"""
+    pytest.importorskip('pyarrow')
+    storage = get_storage('parquet')
+    save_table(FACT, tmp_path, 'fact', storage=storage)
+
+    loaded = load_table(tmp_path, 'fact', columns=['date_key', 'impressions'], storage=storage)
+
+    assert (tmp_path / 'fact.parquet').exists()
+    pd.testing.assert_frame_equal(loaded, FACT[['date_key', 'impressions']])
+
+
+@pytest.mark.parametrize('backend', ['csv', 'parquet'])
+def test_incremental_writer(tmp_path, backend):
+    """Writers append blocks and produce a single table"""
+    if backend == 'parquet':
+        pytest.importorskip('pyarrow')
+    storage = get_storage(backend)
+    writer = open_table_writer(tmp_path, 'fact', storage=storage)
+    writer.write(FACT.iloc[:1])
+    writer.write(FACT.iloc[1:])
+    writer.close(columns=list(FACT.columns))
+
+    loaded = load_table(tmp_path, 'fact', storage=storage)
+
+    assert writer.rows == 2
+    pd.testing.assert_frame_equal(loaded, FACT, check_dtype=False)
+
+
+@pytest.mark.parametrize('backend', ['csv', 'parquet'])
+def test_partitioned_table_reads_only_the_requested_months(tmp_path, backend):
+    """One file per date_key; a date range opens only the matching partitions"""
+    if backend == 'parquet':
+        pytest.importorskip('pyarrow')
+    storage = get_storage(backend)
+    fact = pd.concat([FACT, FACT.assign(date_key=20210301, clicks=[1.0, 2.0])], ignore_index=True)
+    save_partitioned_table(fact, tmp_path, 'fact', storage=storage)
+
+    loaded = load_partitioned_table(tmp_path, 'fact', columns=['date_key', 'clicks'],
+                                    start=20210201, end=20210301, storage=storage)
+
+    assert sorted(p.name for p in (tmp_path / 'fact').iterdir()) == [
+        '_partitions.json', f'date_key=20210101{storage.extension}',
+        f'date_key=20210201{storage.extension}', f'date_key=20210301{storage.extension}',
+    ]
+    assert loaded['date_key'].tolist() == [20210201, 20210301, 20210301]
+    assert loaded['clicks'].tolist() == [81.0, 1.0, 2.0]
+
+    stats = partition_stats(tmp_path, 'fact')
+    assert stats['rows'].tolist() == [1, 1, 2]
+    assert stats['site_key_min'].tolist() == [1, 2, 1]
+    assert stats['impressions_max'].tolist() == [494.0, 5499.0, 5499.0]
+
+
+def test_partitioned_rewrite_replaces_only_the_given_partitions(tmp_path):
+    """Incremental saves keep untouched months and drop months left without rows"""
+    save_partitioned_table(FACT, tmp_path, 'fact')
+    delta = pd.DataFrame({'date_key': [20210301], 'site_key': [3], 'impressions': [7.0], 'clicks': [1.0]})
+
+    save_partitioned_table(delta, tmp_path, 'fact', partitions=[20210201, 20210301])
+
+    loaded = load_partitioned_table(tmp_path, 'fact')
+    assert loaded['date_key'].tolist() == [20210101, 20210301]
+    assert not (tmp_path / 'fact' / 'date_key=20210201.csv').exists()
+
+
+def test_partial_rewrite_in_another_format_keeps_older_partitions_readable(tmp_path):
+    """Switching csv -> parquet between incremental saves reads each partition with its own backend"""
+    pytest.importorskip('pyarrow')
+    save_partitioned_table(FACT, tmp_path, 'fact', storage=get_storage('csv'))
+    delta = pd.DataFrame({'date_key': [20210201], 'site_key': [2], 'impressions': [900.0], 'clicks': [9.0]})
+
+    save_partitioned_table(delta, tmp_path, 'fact', partitions=[20210201], storage=get_storage('parquet'))
+
+    assert sorted(p.name for p in (tmp_path / 'fact').glob('date_key=*')) == \
+        ['date_key=20210101.csv', 'date_key=20210201.parquet']
+    for storage in (None, get_storage('csv'), get_storage('parquet')):
+        loaded = load_partitioned_table(tmp_path, 'fact', storage=storage)
+        assert loaded['impressions'].tolist() == [494.0, 900.0]
+
+
+def test_table_saved_before_a_format_switch_is_still_found(tmp_path, monkeypatch):
+    """Incremental merges of dimensions and staging read the existing table in the format it was written"""
+    pytest.importorskip('pyarrow')
+    save_table(FACT, tmp_path, 'fact', storage=get_storage('csv'))
+    monkeypatch.setattr(storage_module, '_default_storage', get_storage('parquet'))
+
+    assert find_table_storage(tmp_path, 'fact').name == 'csv'
+    assert find_table_storage(tmp_path, 'missing') is None
+    save_table(FACT, tmp_path, 'fact')
+    assert find_table_storage(tmp_path, 'fact').name == 'parquet'
+
+
+def test_unpartitioned_table_is_filtered_on_read(tmp_path):
+    """Facts written as a single file by earlier runs are still readable by range"""
+    save_table(FACT, tmp_path, 'fact')
+
+    loaded = load_partitioned_table(tmp_path, 'fact', start=20210201)
+
+    assert loaded['site_key'].tolist() == [2]
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        get_storage('xlsx')
@@ -0,0 +1,62 @@
+"""
+Tests for ETL utility functions
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from etl.utils.utils import clean_numeric, clean_numeric_series, parse_duration_series
+
+
+def test_clean_numeric_series_matches_clean_numeric():
+    """The vectorized cleaner agrees with the per-cell version"""
+    values = pd.Series(['1,234', '45%', None, np.nan, 'abc', '', ' 7 ', '0.5'])
+
+    cleaned, failed = clean_numeric_series(values)
+
+    assert cleaned.tolist() == values.apply(clean_numeric).tolist()
+    assert failed == 1
+
+
+def test_clean_numeric_series_decimal_comma():
+    """Decimal commas and dot thousands separators are handled"""
+    values = pd.Series(['840,00', '1.234,5', '12'])
+
+    cleaned, failed = clean_numeric_series(values, decimal=',')
+
+    assert cleaned.tolist() == [840.0, 1234.5, 12.0]
+    assert failed == 0
+
+
+def test_clean_numeric_series_mixed_object_column():
+    """Numbers mixed with text (an xlsx column) are taken as they are, not re-parsed as text"""
+    values = pd.Series([1234.5, '840,00', 12, None], dtype=object)
+
+    cleaned, failed = clean_numeric_series(values, decimal=',')
+
+    assert cleaned.tolist() == [1234.5, 840.0, 12.0, 0.0]
+    assert failed == 0
+
+
+def test_clean_numeric_series_numeric_input():
+    """Numeric columns only get their missing values filled"""
+    cleaned, failed = clean_numeric_series(pd.Series([1, 2.5, None]))
+
+    assert cleaned.tolist() == [1.0, 2.5, 0.0]
+    assert failed == 0
+
+
+def test_parse_duration_series_formats():
+    """H:MM:SS, MM:SS and decimal-comma seconds; bad cells become 0 and are sampled"""
+    values = pd.Series(['1:02:03', '05:30', '840,00', '', None, '00:00:00', 'abc', 'abc', '1:2:3:4'])
+
+    seconds, failed = parse_duration_series(values)
+
+    assert seconds.tolist() == [3723.0, 330.0, 840.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert failed == 3
+    assert failed.samples == ['abc', '1:2:3:4']